@@ -1,10 +1,12 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from routers import upload, routing
 from routers import claims as claims_api
 from routers import pathway as pathway_api
 from routers import chat as chat_api
+from routers import jobs as jobs_api
+from services import analysis_pool, dataset_index, job_queue, ocr_pool, schema_registry
+from services.file_serving import DocumentFiles
 import logging
 import sys
 
@@ -35,7 +37,26 @@ app.include_router(routing.router)
 app.include_router(claims_api.router)
 app.include_router(pathway_api.router)
 app.include_router(chat_api.router)
-app.mount("/files", StaticFiles(directory="uploads"), name="files")
+app.include_router(jobs_api.router)
+app.mount("/files", DocumentFiles(directory="uploads"), name="files")
+
+@app.on_event("startup")
+def preload_schema_validators():
+    logger.info(f"Compiled {schema_registry.preload()} schema validators")
+
+@app.on_event("startup")
+def load_dataset_index():
+    logger.info(f"Dataset index: {dataset_index.load()} sample claims")
+
+@app.on_event("startup")
+async def start_job_workers():
+    job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_worker_pools():
+    await job_queue.stop()
+    analysis_pool.shutdown()
+    ocr_pool.shutdown()
 
 @app.get("/")
 def root():
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+import json
+
+from services import job_queue
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+# Seconds between keep-alive comments on an idle event stream
+KEEPALIVE_SECONDS = 15.0
+
+
+@router.get("/stats")
+async def job_stats():
+    """Queue depth, worker utilization and job counters."""
+    return job_queue.stats()
+
+
+def _get_job(job_id: str) -> job_queue.Job:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.get("/{job_id}")
+async def job_status(job_id: str):
+    """Current status, stage history and (once done) the result of a job."""
+    return _get_job(job_id).to_dict()
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: the job's status on every stage change, until it finishes."""
+    job = _get_job(job_id)
+
+    async def stream():
+        version = -1
+        while True:
+            if job.version != version:
+                version = job.version
+                yield f"event: {job.status}\ndata: {json.dumps(job.to_dict(), default=str)}\n\n"
+                if job.status in job_queue.TERMINAL:
+                    return
+            elif not await job.wait_for_change(version, KEEPALIVE_SECONDS):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
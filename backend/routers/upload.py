@@ -1,20 +1,201 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Response
-from fastapi.responses import FileResponse
-from typing import Optional, Dict
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Awaitable, Callable, Optional, Dict
+import asyncio
+import json
 import logging
-from services.file_service import save_uploaded_file
-from services.ocr_service import analyze_claim_document
+import time
+from services.file_serving import document_response
+from services.file_service import StoredUpload, UploadBudget, UploadTooLarge, read_upload, store_upload
+from services.ocr_service import analyze_claim_document, classify_document
 from services.ml_service import score_claim_multi_file
 from services.routing_service import apply_routing_rules
 from services.claim_store import add_claim
+from services import analysis_pool, bulk_intake, dataset_index, document_store, extraction_cache, job_queue, layout_extractor, sample_cache
 from pathlib import Path
 import random
-import re
 import mimetypes
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/upload", tags=["Upload"])
 
+def _no_report(stage: str, **progress) -> None:
+    pass
+
+
+async def _for_each_document(items, process) -> None:
+    """Run process(file_type, item) for all documents of a claim concurrently.
+
+    Latency follows the slowest document rather than the sum; the first
+    failure (in form order) is raised as an HTTPException.
+    """
+    outcomes = await asyncio.gather(*(process(file_type, item) for file_type, item in items), return_exceptions=True)
+    for (file_type, _), outcome in zip(items, outcomes):
+        if isinstance(outcome, UploadTooLarge):
+            raise HTTPException(status_code=413, detail=str(outcome))
+        if isinstance(outcome, HTTPException):
+            raise outcome
+        if isinstance(outcome, BaseException):
+            logger.error(f"Error processing {file_type} file: {outcome}", exc_info=outcome)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error processing {file_type} file: {str(outcome)}"
+            )
+
+
+async def _process_stored_claim(
+    report: Callable[..., None],
+    claim_number: str,
+    claim_type: str,
+    name: Optional[str],
+    email: Optional[str],
+    stored_files: Dict[str, StoredUpload],
+    commit: Optional[Callable[[dict], Awaitable[dict]]] = None,
+) -> dict:
+    """Background half of an async upload: analyse stored files, then finish the claim."""
+    analyses = {}
+    report("analyzing", documents_total=len(stored_files), documents_done=0)
+
+    async def analyze(file_type: str, stored: StoredUpload) -> None:
+        analyses[file_type] = await analysis_pool.run(analyze_claim_document, stored.path, digest=stored.sha256)
+        report("analyzing", documents_done=len(analyses))
+
+    await _for_each_document(list(stored_files.items()), analyze)
+    return await _finish_claim(
+        claim_number,
+        claim_type,
+        name,
+        email,
+        {k: v.path for k, v in stored_files.items()},
+        {k: v.url for k, v in stored_files.items()},
+        {k: analyses[k] for k in stored_files},
+        report,
+        commit,
+    )
+
+
+async def _finish_claim(
+    claim_number: str,
+    claim_type: str,
+    name: Optional[str],
+    email: Optional[str],
+    saved_files: Dict[str, str],
+    file_urls: Dict[str, str],
+    analyses: Dict[str, dict],
+    report: Callable[..., None] = _no_report,
+    commit: Optional[Callable[[dict], Awaitable[dict]]] = None,
+) -> dict:
+    """Score, route and persist an analysed claim; returns the upload response.
+
+    commit, if given, persists the claim record instead of add_claim (bulk
+    intake passes its batcher here).
+    """
+    # ML Scoring with multiple files
+    report("scoring")
+    logger.info("Running ML scoring...")
+    try:
+        ml_scores = await analysis_pool.run(score_claim_multi_file, analyses, claim_type, saved_files)
+        logger.info(f"ML scores: fraud={ml_scores.get('fraud_score')}, complexity={ml_scores.get('complexity_score')}")
+    except Exception as e:
+        logger.error(f"Error in ML scoring: {e}", exc_info=True)
+        # Return default scores if ML fails
+        ml_scores = {
+            "fraud_score": 0.0,
+            "complexity_score": 1.0,
+            "severity_level": "Low",
+            "claim_category": claim_type,
+            "insurance_type": "vehicle" if claim_type == "accident" else "health",
+            "error": str(e)
+        }
+    
+    # Prepare claim data for Pathway pipeline
+    claim_data = {
+        "claim_number": claim_number,
+        "claim_type": claim_type,
+        "name": name,
+        "email": email,
+        "files": saved_files,
+        "file_urls": file_urls,
+        "analyses": analyses,
+    }
+    
+    # Apply Dynamic Routing Rules (with Pathway if available)
+    report("routing")
+    logger.info("Applying routing rules...")
+    try:
+        # Ensure claim_type is in claim_data for routing
+        claim_data["claim_type"] = claim_type
+        routing_result = apply_routing_rules(ml_scores, claim_data=claim_data)
+    except Exception as e:
+        logger.error(f"Error in routing: {e}", exc_info=True)
+        # Default routing if routing fails
+        routing_result = {
+            "routing_team": "Fast Track",
+            "adjuster": "Standard Adjuster",
+            "routing_reasons": ["Default routing due to error"],
+            "error": str(e)
+        }
+    
+    # Convert file_urls dict to attachments array format
+    attachments_array = [
+        {"filename": f"{file_type.upper()}.pdf", "url": url, "type": file_type}
+        for file_type, url in file_urls.items()
+        if url
+    ]
+    
+    # Persist claim for Team Panel/queues
+    report("persisting")
+    claim_record = {
+        "claim_number": claim_number,
+        "claim_type": claim_type,
+        "name": name,
+        "email": email,
+        "files": file_urls,
+        "attachments": attachments_array,  # Also store as array for frontend compatibility
+        "analyses": analyses,
+        "severity": ml_scores.get("severity_level", "Low"),
+        "severity_level": ml_scores.get("severity_level", "Low"),  # Ensure both fields
+        "confidence": 1.0 - float(ml_scores.get("fraud_score", 0.0)),
+        "routing_team": routing_result.get("routing_team", "Fast Track"),
+        "final_adjuster": routing_result.get("adjuster", "Standard Adjuster"),
+        "final_team": routing_result.get("routing_team", "Fast Track"),  # Alias for compatibility
+        "queue": routing_result.get("routing_team", "Fast Track"),  # Store as queue too
+        "ml_scores": {
+            "fraud_score": ml_scores.get("fraud_score", 0.0),
+            "complexity_score": ml_scores.get("complexity_score", 1.0),
+            "severity_level": ml_scores.get("severity_level", "Low"),
+            "fraud_label": ml_scores.get("fraud_label", 0),
+            "claim_category": ml_scores.get("claim_category", claim_type),
+            "litigation_score": ml_scores.get("litigation_score", 0.0),
+            "litigation_flag": ml_scores.get("litigation_flag", False),
+            "litigation_reasons": ml_scores.get("litigation_reasons", []),
+            "subrogation_score": ml_scores.get("subrogation_score", 0.0),
+            "subrogation_flag": ml_scores.get("subrogation_flag", False),
+            "subrogation_reasons": ml_scores.get("subrogation_reasons", []),
+            "features": ml_scores.get("features", {}),
+        },
+        "routing": routing_result,
+        "status": "Processing",
+    }
+    stored = await commit(claim_record) if commit is not None else add_claim(claim_record)
+
+    # Combine results
+    logger.info(f"Claim {claim_number} processed successfully. Team: {routing_result.get('routing_team')}")
+    return {
+        "id": stored.get("id"),
+        "status": "uploaded",
+        "claim_number": claim_number,
+        "claim_type": claim_type,
+        "files": file_urls,
+        "attachments": attachments_array,  # Include attachments array in response
+        "analyses": {k: {"insurance_type": v.get("insurance_type"), "document_type": v.get("document_type")} for k, v in analyses.items()},
+        "ml_scores": ml_scores,
+        "routing": routing_result,
+        "final_team": routing_result.get("routing_team", "Fast Track"),
+        "final_adjuster": routing_result.get("adjuster", "Standard Adjuster"),
+    }
+
+
 @router.post("/")
 async def upload_claim_file(
     claim_number: str = Form(..., description="Claim number used as filename"),
@@ -29,11 +210,15 @@ async def upload_claim_file(
     fir: Optional[UploadFile] = File(None),
     rc: Optional[UploadFile] = File(None),
     dl: Optional[UploadFile] = File(None),
+    mode: str = Query("sync", description="'sync' (default) or 'async': return 202 with a job id once files are stored"),
 ):
     """
     Upload claim with multiple files based on claim type.
     Medical: acord, loss, hospital
     Accident: acord, loss, fir, rc, dl
+
+    In async mode the files are stored, processing is queued and the
+    response is 202 with a job id to poll at /jobs/{id}.
     """
     try:
         if not claim_number or not claim_number.strip():
@@ -42,6 +227,9 @@ async def upload_claim_file(
         if claim_type not in ["medical", "accident"]:
             raise HTTPException(status_code=400, detail="claim_type must be 'medical' or 'accident'")
 
+        if mode not in ["sync", "async"]:
+            raise HTTPException(status_code=400, detail="mode must be 'sync' or 'async'")
+
         # Validate required files based on claim type
         if claim_type == "medical":
             if not acord or not loss or not hospital:
@@ -68,131 +256,76 @@ async def upload_claim_file(
                 "dl": dl,
             }
         
-        # Save all files
+        # Size limit shared by all files of this claim
+        budget = UploadBudget()
+        present = [(file_type, file_obj) for file_type, file_obj in files.items() if file_obj]
+
+        logger.info(f"Processing {claim_type} claim: {claim_number}")
+
+        if mode == "async":
+            if job_queue.is_full():
+                raise HTTPException(status_code=503, detail="Claim processing queue is full, retry later")
+            # Files are persisted before answering; the job reads them from disk
+            stored_files: Dict[str, StoredUpload] = {}
+
+            async def store(file_type: str, file_obj: UploadFile) -> None:
+                stored_files[file_type] = await store_upload(
+                    file_obj, claim_number, budget, keep_data=False, doc_type=file_type
+                )
+
+            await _for_each_document(present, store)
+            stored_files = {k: stored_files[k] for k, _ in present}
+            try:
+                job = job_queue.submit(
+                    "claim",
+                    lambda job: _process_stored_claim(job.advance, claim_number, claim_type, name, email, stored_files),
+                    info={
+                        "claim_number": claim_number,
+                        "claim_type": claim_type,
+                        "files": {k: v.url for k, v in stored_files.items()},
+                    },
+                )
+            except job_queue.QueueFull as e:
+                # The queue filled up while the files were stored: the claim
+                # was never queued, so don't keep its documents around
+                await asyncio.to_thread(document_store.remove_claim, claim_number)
+                raise HTTPException(status_code=503, detail=str(e))
+            logger.info(f"Queued claim {claim_number} as job {job.id}")
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "job_id": job.id,
+                    "status": job.status,
+                    "claim_number": claim_number,
+                    "claim_type": claim_type,
+                    "files": {k: v.url for k, v in stored_files.items()},
+                    "status_url": f"/jobs/{job.id}",
+                    "events_url": f"/jobs/{job.id}/events",
+                },
+            )
+
         saved_files = {}
         file_urls = {}
         analyses = {}
-        
-        logger.info(f"Processing {claim_type} claim: {claim_number}")
-        
-        for file_type, file_obj in files.items():
-            if file_obj:
-                try:
-                    saved_path, public_url = await save_uploaded_file(file_obj, f"{claim_number}_{file_type}")
-                    saved_files[file_type] = saved_path
-                    file_urls[file_type] = public_url
-                    # Analyze each document
-                    logger.info(f"Analyzing {file_type} document...")
-                    analyses[file_type] = analyze_claim_document(saved_path)
-                    logger.info(f"Analysis complete for {file_type}")
-                except Exception as e:
-                    logger.error(f"Error processing {file_type} file: {e}", exc_info=True)
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"Error processing {file_type} file: {str(e)}"
-                    )
-        
-        # ML Scoring with multiple files
-        logger.info("Running ML scoring...")
-        try:
-            ml_scores = score_claim_multi_file(analyses, claim_type, saved_files)
-            logger.info(f"ML scores: fraud={ml_scores.get('fraud_score')}, complexity={ml_scores.get('complexity_score')}")
-        except Exception as e:
-            logger.error(f"Error in ML scoring: {e}", exc_info=True)
-            # Return default scores if ML fails
-            ml_scores = {
-                "fraud_score": 0.0,
-                "complexity_score": 1.0,
-                "severity_level": "Low",
-                "claim_category": claim_type,
-                "insurance_type": "vehicle" if claim_type == "accident" else "health",
-                "error": str(e)
-            }
-        
-        # Prepare claim data for Pathway pipeline
-        claim_data = {
-            "claim_number": claim_number,
-            "claim_type": claim_type,
-            "name": name,
-            "email": email,
-            "files": saved_files,
-            "file_urls": file_urls,
-            "analyses": analyses,
-        }
-        
-        # Apply Dynamic Routing Rules (with Pathway if available)
-        logger.info("Applying routing rules...")
-        try:
-            # Ensure claim_type is in claim_data for routing
-            claim_data["claim_type"] = claim_type
-            routing_result = apply_routing_rules(ml_scores, claim_data=claim_data)
-        except Exception as e:
-            logger.error(f"Error in routing: {e}", exc_info=True)
-            # Default routing if routing fails
-            routing_result = {
-                "routing_team": "Fast Track",
-                "adjuster": "Standard Adjuster",
-                "routing_reasons": ["Default routing due to error"],
-                "error": str(e)
-            }
-        
-        # Convert file_urls dict to attachments array format
-        attachments_array = [
-            {"filename": f"{file_type.upper()}.pdf", "url": url, "type": file_type}
-            for file_type, url in file_urls.items()
-            if url
-        ]
-        
-        # Persist claim for Team Panel/queues
-        claim_record = {
-            "claim_number": claim_number,
-            "claim_type": claim_type,
-            "name": name,
-            "email": email,
-            "files": file_urls,
-            "attachments": attachments_array,  # Also store as array for frontend compatibility
-            "analyses": analyses,
-            "severity": ml_scores.get("severity_level", "Low"),
-            "severity_level": ml_scores.get("severity_level", "Low"),  # Ensure both fields
-            "confidence": 1.0 - float(ml_scores.get("fraud_score", 0.0)),
-            "routing_team": routing_result.get("routing_team", "Fast Track"),
-            "final_adjuster": routing_result.get("adjuster", "Standard Adjuster"),
-            "final_team": routing_result.get("routing_team", "Fast Track"),  # Alias for compatibility
-            "queue": routing_result.get("routing_team", "Fast Track"),  # Store as queue too
-            "ml_scores": {
-                "fraud_score": ml_scores.get("fraud_score", 0.0),
-                "complexity_score": ml_scores.get("complexity_score", 1.0),
-                "severity_level": ml_scores.get("severity_level", "Low"),
-                "fraud_label": ml_scores.get("fraud_label", 0),
-                "claim_category": ml_scores.get("claim_category", claim_type),
-                "litigation_score": ml_scores.get("litigation_score", 0.0),
-                "litigation_flag": ml_scores.get("litigation_flag", False),
-                "litigation_reasons": ml_scores.get("litigation_reasons", []),
-                "subrogation_score": ml_scores.get("subrogation_score", 0.0),
-                "subrogation_flag": ml_scores.get("subrogation_flag", False),
-                "subrogation_reasons": ml_scores.get("subrogation_reasons", []),
-                "features": ml_scores.get("features", {}),
-            },
-            "routing": routing_result,
-            "status": "Processing",
-        }
-        stored = add_claim(claim_record)
 
-        # Combine results
-        logger.info(f"Claim {claim_number} processed successfully. Team: {routing_result.get('routing_team')}")
-        return {
-            "id": stored.get("id"),
-            "status": "uploaded",
-            "claim_number": claim_number,
-            "claim_type": claim_type,
-            "files": file_urls,
-            "attachments": attachments_array,  # Include attachments array in response
-            "analyses": {k: {"insurance_type": v.get("insurance_type"), "document_type": v.get("document_type")} for k, v in analyses.items()},
-            "ml_scores": ml_scores,
-            "routing": routing_result,
-            "final_team": routing_result.get("routing_team", "Fast Track"),
-            "final_adjuster": routing_result.get("adjuster", "Standard Adjuster"),
-        }
+        async def store_and_analyze(file_type: str, file_obj: UploadFile) -> None:
+            # Stored and hashed in one pass off the event loop; analysed from memory
+            stored = await store_upload(file_obj, claim_number, budget, doc_type=file_type)
+            saved_files[file_type] = stored.path
+            file_urls[file_type] = stored.url
+            logger.info(f"Analyzing {file_type} document...")
+            analyses[file_type] = await analysis_pool.run(
+                analyze_claim_document, stored.path, data=stored.data, digest=stored.sha256
+            )
+            logger.info(f"Analysis complete for {file_type}")
+
+        await _for_each_document(present, store_and_analyze)
+        # Keep the documents in their form order
+        saved_files = {k: saved_files[k] for k, _ in present}
+        file_urls = {k: file_urls[k] for k, _ in present}
+        analyses = {k: analyses[k] for k, _ in present}
+
+        return await _finish_claim(claim_number, claim_type, name, email, saved_files, file_urls, analyses)
     
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -205,95 +338,233 @@ async def upload_claim_file(
         )
 
 
+@router.post("/bulk")
+async def bulk_upload_claims(
+    archive: Optional[UploadFile] = File(None, description="zip/tar of claim folders"),
+    manifest: Optional[UploadFile] = File(None, description="NDJSON, one claim per line"),
+    concurrency: int = Query(bulk_intake.CONCURRENCY, ge=1, le=64, description="Claims processed at once"),
+    batch_size: int = Query(bulk_intake.BATCH_SIZE, ge=1, le=1000, description="Claims per claim-store commit"),
+):
+    """
+    Intake many claims at once (back-office migrations, partner feeds).
+
+    Each claim goes through the same analyze -> score -> route pipeline as
+    POST /upload/, a bounded number at a time, and is committed to the claim
+    store in batches. The response is NDJSON: one line per claim as it
+    finishes (status "ok" or "error"), then a final {"summary": ...} line.
+    See services/bulk_intake.py for the archive and manifest formats.
+    """
+    if not archive and not manifest:
+        raise HTTPException(status_code=400, detail="Provide an archive and/or a manifest")
+
+    sources = []
+    try:
+        if archive:
+            sources.append(await asyncio.to_thread(bulk_intake.open_archive, archive.file, archive.filename))
+        if manifest:
+            sources.append(await asyncio.to_thread(bulk_intake.open_manifest, manifest.file))
+    except bulk_intake.BulkInputError as e:
+        for source in sources:
+            source.close()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    total = sum(len(source.entries) for source in sources)
+    logger.info(f"Bulk intake: {total} claims, concurrency {concurrency}, batch size {batch_size}")
+    batcher = bulk_intake.ClaimBatcher(batch_size)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def process(
+        source: bulk_intake.ClaimSource,
+        entry: bulk_intake.ClaimEntry,
+        release: Callable[[], None],
+    ) -> dict:
+        problem = bulk_intake.validate(entry)
+        if problem:
+            return {"claim_number": entry.claim_number, "status": "error", "error": problem}
+
+        async def commit(claim_record: dict) -> dict:
+            # Analysis is done: let the next claim start while this one
+            # waits for its batch, or batches could never fill up
+            release()
+            return await batcher.add(claim_record)
+
+        try:
+            # Documents of one claim share a size budget, like a multipart upload
+            budget = UploadBudget()
+            stored_files = {}
+            for file_type, (original_name, opener) in entry.files.items():
+                stored_files[file_type] = await asyncio.to_thread(
+                    bulk_intake.store_document, source, opener, original_name,
+                    entry.claim_number, file_type, budget,
+                )
+            result = await _process_stored_claim(
+                _no_report, entry.claim_number, entry.claim_type, entry.name, entry.email,
+                stored_files, commit=commit,
+            )
+        except Exception as e:
+            error = str(getattr(e, "detail", None) or e)
+            logger.error(f"Bulk intake of claim {entry.claim_number} failed: {error}", exc_info=True)
+            return {"claim_number": entry.claim_number, "status": "error", "error": error}
+        return {
+            "claim_number": entry.claim_number,
+            "status": "ok",
+            "id": result.get("id"),
+            "claim_type": entry.claim_type,
+            "routing_team": result.get("final_team"),
+            "severity_level": result["ml_scores"].get("severity_level"),
+            "fraud_score": result["ml_scores"].get("fraud_score"),
+            "files": result.get("files"),
+        }
+
+    async def stream():
+        started = time.monotonic()
+        results: asyncio.Queue = asyncio.Queue()
+
+        tasks = []
+
+        async def run(source, entry) -> None:
+            released = False
+
+            def release() -> None:
+                nonlocal released
+                if not released:
+                    released = True
+                    slots.release()
+
+            try:
+                outcome = await process(source, entry, release)
+            finally:
+                release()
+            await results.put(outcome)
+
+        async def produce() -> None:
+            # Entries are started only as slots free up, so a large archive
+            # never has more than `concurrency` claims being analyzed
+            for source in sources:
+                for entry in source.entries:
+                    await slots.acquire()
+                    tasks.append(asyncio.create_task(run(source, entry)))
+            await asyncio.gather(*tasks)
+            await batcher.flush()
+            await results.put(None)
+
+        producer = asyncio.create_task(produce())
+        ok = failed = 0
+        try:
+            while True:
+                outcome = await results.get()
+                if outcome is None:
+                    break
+                if outcome["status"] == "ok":
+                    ok += 1
+                else:
+                    failed += 1
+                yield json.dumps(outcome, default=str) + "\n"
+            await producer
+            summary = {
+                "total": total,
+                "ok": ok,
+                "failed": failed,
+                "seconds": round(time.monotonic() - started, 2),
+                "commits": batcher.commits,
+            }
+            logger.info(f"Bulk intake finished: {summary}")
+            yield json.dumps({"summary": summary}) + "\n"
+        finally:
+            # Client went away or something failed: stop in-flight claims
+            # before closing the archives they read from
+            pending = [task for task in (producer, *tasks) if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for source in sources:
+                source.close()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.post("/classify")
+async def classify_upload(file: UploadFile = File(...)):
+    """Detect insurance/document type from the first page(s) only.
+
+    Stops as soon as the type is known, without extracting or OCRing the
+    rest of the document, and does not store the file or create a claim.
+    """
+    try:
+        data = await read_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    try:
+        return classify_document(file.filename or "upload.pdf", data=data)
+    except Exception as e:
+        logger.error(f"Error classifying {file.filename}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error classifying file: {str(e)}")
+
+
+@router.get("/cache/stats")
+async def extraction_cache_stats():
+    """Counters for the extraction cache, layout plans, dataset index, sample cache and document store."""
+    return {
+        **extraction_cache.stats(),
+        "layout_plans": layout_extractor.stats(),
+        "dataset_index": dataset_index.stats(),
+        "sample_cache": sample_cache.stats(),
+        "documents": await asyncio.to_thread(document_store.stats),
+    }
+
+
+@router.get("/documents/{claim_number}")
+async def list_claim_documents(claim_number: str):
+    """Documents stored for a claim (type, content hash, size, URL)."""
+    documents = await asyncio.to_thread(document_store.claim_documents, claim_number)
+    return {"claim_number": claim_number, "documents": documents}
+
+
+@router.delete("/documents/{claim_number}")
+async def delete_claim_documents(claim_number: str):
+    """Forget a claim's documents; files no other claim shares are deleted."""
+    removed = await asyncio.to_thread(document_store.remove_claim, claim_number)
+    if not removed["documents"]:
+        raise HTTPException(status_code=404, detail=f"No documents stored for claim {claim_number}")
+    return {"claim_number": claim_number, **removed}
+
+
 @router.get("/auto")
 async def auto_upload_sample(
     claim_type: Optional[str] = Query(None, description="'medical' or 'accident'; random if not provided"),
     name: Optional[str] = Query("Auto Sample", description="Optional name to attach"),
     email: Optional[str] = Query("sample@demo.local", description="Optional email to attach"),
+    pipeline: str = Query("cached", description="'cached' (default) reuses precomputed analyses and scores when available; 'full' always runs them"),
 ):
     """Create a sample claim by auto-selecting matching documents from the dataset.
 
     Picks a random index and selects the corresponding required docs from ml/dataset/* folders.
+    Samples precomputed by scripts/precompute_samples.py go straight to routing and persistence.
     """
     try:
-        base_dir = Path(__file__).resolve().parent.parent.parent
-        dataset = base_dir / "ml" / "dataset"
+        if pipeline not in ["cached", "full"]:
+            raise HTTPException(status_code=400, detail="pipeline must be 'cached' or 'full'")
 
         # Choose claim type if not provided
         ct = claim_type if claim_type in ("medical", "accident") else random.choice(["medical", "accident"])
 
-        def choose_accident() -> Dict[str, str]:
-            acc = dataset / "accident"
-            acord_dir = acc / "accord_form_100"
-            acord_files = sorted([p for p in acord_dir.glob("*.pdf")])
-            if not acord_files:
-                raise HTTPException(status_code=500, detail="No accident samples found")
-            f = random.choice(acord_files)
-            # Extract CLM id base e.g., CLM-2025-0001-ACC_SAFE
-            m = re.search(r"(CLM-\d{4}-\d{4}-ACC_(SAFE|RISK))_acord\.pdf$", f.name)
-            if not m:
-                raise HTTPException(status_code=500, detail=f"Unexpected filename format: {f.name}")
-            clm_base = m.group(1)
-
-            loss = acc / "loss_reports_100" / f"{clm_base}_loss.pdf"
-            rc = acc / "rc_documents_100" / f"{clm_base}_rc.pdf"
-            dl = acc / "dl_documents_100" / f"{clm_base}_dl.pdf"
-            # police file contains CLM base embedded
-            police_dir = acc / "police_reports_100"
-            police = None
-            for p in police_dir.glob("*.pdf"):
-                if clm_base in p.name and p.name.endswith("_police.pdf"):
-                    police = p
-                    break
-            if police is None:
-                raise HTTPException(status_code=500, detail=f"Matching police report not found for {clm_base}")
-
-            files = {
-                "acord": str(f),
-                "loss": str(loss),
-                "fir": str(police),
-                "rc": str(rc),
-                "dl": str(dl),
-            }
-            for k, v in files.items():
-                if not Path(v).exists():
-                    raise HTTPException(status_code=500, detail=f"Missing {k} document for {clm_base}")
-            return files
-
-        def choose_medical() -> Dict[str, str]:
-            hea = dataset / "health"
-            acord_dir = hea / "accord_form_100"
-            acord_files = sorted([p for p in acord_dir.glob("*.pdf")])
-            if not acord_files:
-                raise HTTPException(status_code=500, detail="No medical samples found")
-            f = random.choice(acord_files)
-            # Extract CLM id base e.g., CLM-2025-0001-HEA_SAFE
-            m = re.search(r"(CLM-\d{4}-\d{4}-HEA_(SAFE|RISK))_acord\.pdf$", f.name)
-            if not m:
-                raise HTTPException(status_code=500, detail=f"Unexpected filename format: {f.name}")
-            clm_base = m.group(1)
-
-            loss = hea / "loss_reports_100" / f"{clm_base}_loss.pdf"
-            hospital = hea / "hospital_bills_100" / f"{clm_base}_hospital.pdf"
-            files = {
-                "acord": str(f),
-                "loss": str(loss),
-                "hospital": str(hospital),
-            }
-            for k, v in files.items():
-                if not Path(v).exists():
-                    raise HTTPException(status_code=500, detail=f"Missing {k} document for {clm_base}")
-            return files
-
-        selected_files = choose_accident() if ct == "accident" else choose_medical()
+        sample = dataset_index.choose(ct)
+        if sample is None:
+            raise HTTPException(status_code=500, detail=f"No {ct} samples found")
+        claim_number, paths = sample
+        selected_files = {k: str(v) for k, v in paths.items()}
 
-        # Analyze docs
-        analyses = {}
-        for key, path in selected_files.items():
-            analyses[key] = analyze_claim_document(path)
+        cached = sample_cache.get(claim_number) if pipeline == "cached" else None
+        if cached is not None:
+            analyses, ml_scores = cached["analyses"], cached["ml_scores"]
+        else:
+            # Analyze docs
+            analyses = {}
+            for key, path in selected_files.items():
+                analyses[key] = analyze_claim_document(path)
 
-        # ML scoring
-        ml_scores = score_claim_multi_file(analyses, ct, selected_files)
+            # ML scoring
+            ml_scores = score_claim_multi_file(analyses, ct, selected_files)
 
         # Prepare routing
         claim_data = {
@@ -301,12 +572,6 @@ async def auto_upload_sample(
         }
         routing_result = apply_routing_rules(ml_scores, claim_data=claim_data)
 
-        # Claim number from base
-        # Prefer claim id from acord filename
-        base_name = Path(selected_files.get("acord", "")).name
-        claim_number_match = re.search(r"(CLM-\d{4}-\d{4}-[A-Z]{3}_(SAFE|RISK))_acord\.pdf$", base_name)
-        claim_number = claim_number_match.group(1) if claim_number_match else f"CLM-{random.randint(100000,999999)}"
-
         # Build attachments (non-public dataset paths; for display only)
         attachments_array = []
         for doc_type, p in selected_files.items():
@@ -352,6 +617,7 @@ async def auto_upload_sample(
             "status": "uploaded",
             "claim_number": claim_number,
             "claim_type": ct,
+            "pipeline": "cached" if cached is not None else "full",
             "files": selected_files,
             "attachments": attachments_array,
             "analyses": {k: {"insurance_type": v.get("insurance_type"), "document_type": v.get("document_type")} for k, v in analyses.items()},
@@ -376,68 +642,13 @@ async def auto_select_sample(
     Returns a structure with claim_type, claim_number (base), and file_urls pointing to a file-serving endpoint.
     Frontend will fetch each file and attach to its FormData before manual submit.
     """
-    base_dir = Path(__file__).resolve().parent.parent.parent
-    dataset = base_dir / "ml" / "dataset"
     ct = claim_type if claim_type in ("medical", "accident") else random.choice(["medical", "accident"])
 
-    def select_accident():
-        acc = dataset / "accident"
-        acord_dir = acc / "accord_form_100"
-        acord_files = sorted(acord_dir.glob("*.pdf"))
-        if not acord_files:
-            raise HTTPException(status_code=500, detail="No accident samples found")
-        f = random.choice(acord_files)
-        m = re.search(r"(CLM-\d{4}-\d{4}-ACC_(SAFE|RISK))_acord\.pdf$", f.name)
-        if not m:
-            raise HTTPException(status_code=500, detail=f"Unexpected filename format: {f.name}")
-        clm_base = m.group(1)
-        mapping = {
-            "acord": acc / "accord_form_100" / f"{clm_base}_acord.pdf",
-            "loss": acc / "loss_reports_100" / f"{clm_base}_loss.pdf",
-            "rc": acc / "rc_documents_100" / f"{clm_base}_rc.pdf",
-            "dl": acc / "dl_documents_100" / f"{clm_base}_dl.pdf",
-        }
-        # police/fir doc
-        police_dir = acc / "police_reports_100"
-        police = None
-        for p in police_dir.glob("*.pdf"):
-            if clm_base in p.name and p.name.endswith("_police.pdf"):
-                police = p
-                break
-        if not police:
-            raise HTTPException(status_code=500, detail=f"Police report missing for {clm_base}")
-        mapping["fir"] = police
-        for k, v in mapping.items():
-            if not v.exists():
-                raise HTTPException(status_code=500, detail=f"Missing {k} doc for {clm_base}")
-        return clm_base, mapping
-
-    def select_medical():
-        hea = dataset / "health"
-        acord_dir = hea / "accord_form_100"
-        acord_files = sorted(acord_dir.glob("*.pdf"))
-        if not acord_files:
-            raise HTTPException(status_code=500, detail="No medical samples found")
-        f = random.choice(acord_files)
-        m = re.search(r"(CLM-\d{4}-\d{4}-HEA_(SAFE|RISK))_acord\.pdf$", f.name)
-        if not m:
-            raise HTTPException(status_code=500, detail=f"Unexpected filename format: {f.name}")
-        clm_base = m.group(1)
-        mapping = {
-            "acord": hea / "accord_form_100" / f"{clm_base}_acord.pdf",
-            "loss": hea / "loss_reports_100" / f"{clm_base}_loss.pdf",
-            "hospital": hea / "hospital_bills_100" / f"{clm_base}_hospital.pdf",
-        }
-        for k, v in mapping.items():
-            if not v.exists():
-                raise HTTPException(status_code=500, detail=f"Missing {k} doc for {clm_base}")
-        return clm_base, mapping
-
     try:
-        if ct == "accident":
-            clm_base, mapping = select_accident()
-        else:
-            clm_base, mapping = select_medical()
+        sample = dataset_index.choose(ct)
+        if sample is None:
+            raise HTTPException(status_code=500, detail=f"No {ct} samples found")
+        clm_base, mapping = sample
 
         # Return file URLs referencing a secure file endpoint
         file_urls = {k: f"/upload/auto/file?path={v}" for k, v in mapping.items()}
@@ -455,9 +666,13 @@ async def auto_select_sample(
 
 
 @router.get("/auto/file")
-async def get_auto_file(path: str = Query(..., description="Absolute dataset file path returned from /auto/select")):
+async def get_auto_file(
+    request: Request,
+    path: str = Query(..., description="Absolute dataset file path returned from /auto/select"),
+):
     """Serve a dataset PDF after validating it's within the dataset directory.
     This avoids exposing arbitrary filesystem paths.
+    Sent with a content-hash ETag (304 on repeat views) and Range support.
     """
     base_dir = Path(__file__).resolve().parent.parent.parent
     dataset_root = (base_dir / "ml" / "dataset").resolve()
@@ -467,4 +682,11 @@ async def get_auto_file(path: str = Query(..., description="Absolute dataset fil
     if not requested.exists():
         raise HTTPException(status_code=404, detail="File not found")
     mime, _ = mimetypes.guess_type(str(requested))
-    return FileResponse(str(requested), media_type=mime or "application/pdf", filename=requested.name)
+    # Hashing a file the first time it is served runs off the event loop
+    return await asyncio.to_thread(
+        document_response,
+        str(requested),
+        request.headers,
+        media_type=mime or "application/pdf",
+        filename=requested.name,
+    )
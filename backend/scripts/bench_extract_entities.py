@@ -0,0 +1,98 @@
+"""
+Microbenchmark: compiled field specs vs. per-field regex search.
+
+Extracts text from every dataset PDF once, then times extract_entities over
+all of them with the compiled single-pass scanner and with the previous
+approach (one label regex search per field, kept here as the baseline),
+checking that both produce identical entities.
+
+Usage (from backend/): python scripts/bench_extract_entities.py [--repeat N]
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from services import ocr_service  # noqa: E402
+from services.field_specs import FIELD_SPECS  # noqa: E402
+
+DATASET_DIR = BACKEND_DIR.parent / "ml" / "dataset"
+
+
+def _label_value(text: str, labels: List[str], value_pattern: str = r"([^\n\r]+)") -> Optional[str]:
+    pattern = re.compile(rf"(?im)\b(?:{'|'.join(map(re.escape, labels))})\b\s*[:\-]?\s*{value_pattern}")
+    m = pattern.search(text)
+    if m:
+        return m.group(1).strip()
+    return None
+
+
+def _regex_value(text: str, pattern: str, flags=re.I) -> Optional[str]:
+    m = re.search(pattern, text, flags)
+    if not m:
+        return None
+    # If a capturing group exists, use it; otherwise use the whole match
+    val = m.group(1) if m.lastindex else m.group(0)
+    return val.strip()
+
+
+def extract_entities_per_field(text: str, insurance_type: str, document_type: str) -> dict:
+    """Reference implementation: rescan the whole text once per field."""
+    fields = FIELD_SPECS.get((insurance_type, document_type))
+    if not fields:
+        return {}
+    out = {}
+    for f in fields:
+        value = ocr_service._first(
+            _label_value(text, list(f.labels), f.value),
+            _regex_value(text, f.fallback) if f.fallback else None,
+        )
+        out[f.name] = ocr_service._CONVERTERS[f.kind](value)
+    return {k: v for k, v in out.items() if v is not None}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the dataset per implementation")
+    args = parser.parse_args()
+
+    pdfs = sorted(DATASET_DIR.glob("*/*/*.pdf"))
+    if not pdfs:
+        sys.exit(f"No PDFs found under {DATASET_DIR}")
+
+    docs = []
+    for p in pdfs:
+        text, _ = ocr_service.extract_text(str(p))
+        insurance_type = ocr_service.detect_insurance_type(text)
+        docs.append((text, insurance_type, ocr_service.detect_document_type(text, insurance_type)))
+
+    mismatches = sum(
+        1 for text, it, dt in docs
+        if ocr_service.extract_entities(text, it, dt) != extract_entities_per_field(text, it, dt)
+    )
+
+    def bench(fn) -> float:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for text, it, dt in docs:
+                fn(text, it, dt)
+        return time.perf_counter() - start
+
+    per_field = bench(extract_entities_per_field)
+    compiled = bench(ocr_service.extract_entities)
+    n = len(docs) * args.repeat
+
+    print(f"documents: {len(docs)} x {args.repeat} passes")
+    print(f"per-field regex : {per_field:.3f}s ({per_field / n * 1e6:.1f} us/doc)")
+    print(f"compiled spec   : {compiled:.3f}s ({compiled / n * 1e6:.1f} us/doc)")
+    print(f"speedup         : {per_field / compiled:.2f}x")
+    print(f"mismatches      : {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
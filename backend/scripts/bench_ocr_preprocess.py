@@ -0,0 +1,129 @@
+"""
+Benchmark: OCR time and accuracy with and without image preprocessing.
+
+Builds a "phone photo" benchmark set from dataset DL/RC PDFs: each page is
+rendered at high DPI, skewed, framed with a dark border, unevenly lit and
+noised. The PDF's own text layer is the ground truth. Every image is OCRed
+with ocr_service._ocr_image_pil twice (CLAIMWISE_OCR_PREPROCESS off / on)
+and scored by character-level similarity to the ground truth.
+
+Real photos can be benchmarked instead with --images DIR, where each
+image has a sibling .txt file with its expected text.
+
+Usage (from backend/): python scripts/bench_ocr_preprocess.py [--limit N] [--images DIR]
+"""
+import argparse
+import difflib
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from services import ocr_service  # noqa: E402
+
+DATASET_DIR = BACKEND_DIR.parent / "ml" / "dataset" / "accident"
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+
+def accuracy(ocr_text: str, truth: str) -> float:
+    return difflib.SequenceMatcher(None, _normalize(ocr_text), _normalize(truth)).ratio()
+
+
+def synthetic_photos(limit: int, seed: int = 0):
+    """Yield (name, PIL image, ground truth) degraded like handheld photos."""
+    import fitz  # type: ignore
+    import numpy as np  # type: ignore
+    from PIL import Image, ImageOps  # type: ignore
+
+    rng = np.random.default_rng(seed)
+    pdfs = sorted(DATASET_DIR.glob("dl_documents_100/*.pdf")) + sorted(DATASET_DIR.glob("rc_documents_100/*.pdf"))
+    for pdf in pdfs[::max(1, len(pdfs) // max(limit, 1))][:limit]:
+        with fitz.open(str(pdf)) as doc:
+            truth = doc[0].get_text("text")
+            pix = doc[0].get_pixmap(dpi=600)
+            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        img = img.rotate(float(rng.uniform(-4, 4)), expand=True, fillcolor=(255, 255, 255))
+        img = ImageOps.expand(img, border=int(rng.integers(40, 160)), fill=(25, 25, 25))
+        arr = np.asarray(img).astype(np.float32)
+        h, w = arr.shape[:2]
+        lighting = np.linspace(0.65, 1.0, w, dtype=np.float32)[None, :, None]
+        arr = arr * lighting + rng.normal(0, 18, (h, w, 1)).astype(np.float32)
+        photo = Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+        photo.info["dpi"] = (600, 600)
+        yield pdf.name, photo, truth
+
+
+def image_dir(path: Path, limit: int):
+    from PIL import Image  # type: ignore
+
+    count = 0
+    for img_path in sorted(path.iterdir()):
+        truth_path = img_path.with_suffix(".txt")
+        if not ocr_service._is_image(str(img_path)) or not truth_path.exists():
+            continue
+        with Image.open(img_path) as img:
+            img.load()
+            yield img_path.name, img.copy(), truth_path.read_text(encoding="utf-8")
+        count += 1
+        if count >= limit:
+            break
+
+
+def run(img, preprocess: bool):
+    ocr_service.OCR_PREPROCESS = preprocess
+    timings, image_meta = {}, {}
+    start = time.perf_counter()
+    text = ocr_service._ocr_image_pil(img.copy(), timings=timings, image_meta=image_meta)
+    return text, time.perf_counter() - start, timings, image_meta.get("deskew_degrees")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=20, help="number of images")
+    parser.add_argument("--images", type=Path, help="directory of images with .txt ground truth")
+    args = parser.parse_args()
+
+    samples = list(image_dir(args.images, args.limit) if args.images else synthetic_photos(args.limit))
+    if not samples:
+        sys.exit("No benchmark images found")
+
+    rows = {False: [], True: []}
+    steps = {}
+    skews = []
+    for name, img, truth in samples:
+        for preprocess in (False, True):
+            text, seconds, timings, skew = run(img, preprocess)
+            rows[preprocess].append((seconds, accuracy(text, truth)))
+            for step, ms in timings.items():
+                steps.setdefault(step, []).append(ms)
+            if skew is not None:
+                skews.append(abs(skew))
+        print(
+            f"{name:48s} raw {rows[False][-1][0]:6.2f}s acc {rows[False][-1][1]:.3f} | "
+            f"pre {rows[True][-1][0]:6.2f}s acc {rows[True][-1][1]:.3f}"
+        )
+
+    print(f"\nimages: {len(samples)}")
+    for preprocess, label in ((False, "without stage"), (True, "with stage   ")):
+        seconds = [r[0] for r in rows[preprocess]]
+        acc = [r[1] for r in rows[preprocess]]
+        print(
+            f"{label}: mean {statistics.mean(seconds):.2f}s/image "
+            f"(total {sum(seconds):.1f}s), mean accuracy {statistics.mean(acc):.3f}"
+        )
+    print("preprocessing steps (mean):")
+    for step, values in steps.items():
+        print(f"  {step:13s} {statistics.mean(values):8.2f} ms")
+    if skews:
+        print(f"mean |skew| corrected: {statistics.mean(skews):.2f} deg")
+
+
+if __name__ == "__main__":
+    main()
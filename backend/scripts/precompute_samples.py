@@ -0,0 +1,46 @@
+"""
+Precompute analyses and ML scores for every dataset sample claim.
+
+Runs analyze_claim_document and score_claim_multi_file over each complete
+sample in ml/dataset and writes the results to the sample cache, which
+/upload/auto then uses instead of re-running the pipeline (see
+services/sample_cache.py). Re-run after changing the dataset, the models or
+the extractor. With --claim-type, samples of the other type stay in the store
+(unless --replace, or the store is out of date).
+
+Usage (from backend/): python scripts/precompute_samples.py [--claim-type accident|medical] [--replace]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from services import sample_cache  # noqa: E402
+from services.ml_service import score_claim_multi_file  # noqa: E402
+from services.ocr_service import analyze_claim_document  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--claim-type", choices=["accident", "medical"], help="only this claim type (default: both)")
+    parser.add_argument("--replace", action="store_true", help="drop samples not recomputed by this run")
+    args = parser.parse_args()
+
+    claim_types = (args.claim_type,) if args.claim_type else ("accident", "medical")
+    start = time.perf_counter()
+
+    def progress(base: str, done: int, total: int) -> None:
+        print(f"[{done}/{total}] {base}", flush=True)
+
+    written = sample_cache.build(analyze_claim_document, score_claim_multi_file, claim_types, progress, replace=args.replace)
+    elapsed = time.perf_counter() - start
+    size_kb = sample_cache.STORE_PATH.stat().st_size / 1024
+    print(f"samples : {written} in {elapsed:.1f}s")
+    print(f"store   : {sample_cache.STORE_PATH} ({size_kb:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Bounded thread pool for document analysis in request handlers.
+
+analyze_claim_document is CPU-bound (PyMuPDF, entity extraction) or waits
+on the OCR process pool; calling it directly from an async endpoint stalls
+the event loop for every other request. Handlers await run(...) instead, so
+the documents of one claim are analysed side by side and the loop stays
+free. Threads (not processes) keep the in-process extraction cache and
+layout plans shared; Tesseract engines are per thread (tesseract_engine).
+
+Config (env):
+  CLAIMWISE_ANALYSIS_WORKERS  worker threads (default: cores + 1, max 8)
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+WORKERS = max(1, int(os.getenv("CLAIMWISE_ANALYSIS_WORKERS", str(min((os.cpu_count() or 1) + 1, 8)))))
+
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            logger.info(f"Starting analysis pool: {WORKERS} threads")
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="claimwise-analysis")
+        return _executor
+
+
+async def run(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run fn(*args, **kwargs) on the analysis pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown() -> None:
+    """Stop the pool (called on application shutdown)."""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
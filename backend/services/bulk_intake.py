@@ -0,0 +1,322 @@
+"""
+Claim entries and batched commits for bulk intake (POST /upload/bulk).
+
+Two input formats are accepted:
+
+  - a zip or tar(.gz) archive of claim folders: each top-level folder is one
+    claim, named by its claim number, holding one PDF/image per document with
+    the document type in its file name (acord, loss, hospital, fir/police, rc,
+    dl - e.g. CLM-1_acord.pdf). An optional claim.json in the folder sets
+    claim_number, claim_type, name and email.
+  - an NDJSON manifest, one claim per line:
+      {"claim_number": "...", "claim_type": "accident", "name": "...",
+       "email": "...", "files": {"acord": "<path>", "loss": "<path>", ...}}
+    Relative paths resolve against the first of CLAIMWISE_BULK_ROOTS and every
+    path must lie under one of them (default: ml/dataset).
+
+When claim_type is not given it is inferred from the documents present.
+
+Processed claims are written to claim_store in batches (ClaimBatcher), so
+a migration of thousands of claims rewrites claims.json once per batch
+instead of once per claim.
+
+Config (env):
+  CLAIMWISE_BULK_CONCURRENCY      claims processed at once (default 4)
+  CLAIMWISE_BULK_BATCH_SIZE       claims per claim-store commit (default 50)
+  CLAIMWISE_BULK_COMMIT_INTERVAL  seconds before a partial batch is committed (default 1.0)
+  CLAIMWISE_BULK_ROOTS            os.pathsep-separated directories manifests may read from
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import tarfile
+import threading
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from . import claim_store
+from .file_service import StoredUpload, UploadBudget, store_stream
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY = max(1, int(os.getenv("CLAIMWISE_BULK_CONCURRENCY", "4")))
+BATCH_SIZE = max(1, int(os.getenv("CLAIMWISE_BULK_BATCH_SIZE", "50")))
+COMMIT_INTERVAL = float(os.getenv("CLAIMWISE_BULK_COMMIT_INTERVAL", "1.0"))
+
+_DEFAULT_ROOT = Path(__file__).resolve().parent.parent.parent / "ml" / "dataset"
+ROOTS = [
+    Path(p).resolve()
+    for p in os.getenv("CLAIMWISE_BULK_ROOTS", str(_DEFAULT_ROOT)).split(os.pathsep)
+    if p.strip()
+]
+
+DOCUMENT_EXTENSIONS = {".pdf", ".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".webp"}
+# File-name token -> document type
+_DOC_TOKENS = {
+    "acord": "acord",
+    "accord": "acord",
+    "loss": "loss",
+    "hospital": "hospital",
+    "fir": "fir",
+    "police": "fir",
+    "rc": "rc",
+    "dl": "dl",
+}
+
+
+# Documents each claim type needs, in upload form order
+REQUIRED_DOCUMENTS = {
+    "medical": ["acord", "loss", "hospital"],
+    "accident": ["acord", "loss", "fir", "rc", "dl"],
+}
+
+
+class BulkInputError(ValueError):
+    """The bulk upload is not a readable archive or manifest."""
+
+
+@dataclass
+class ClaimEntry:
+    claim_number: str
+    claim_type: Optional[str] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+    # document type -> (original file name, opener returning a binary stream)
+    files: Dict[str, Tuple[str, Callable[[], BinaryIO]]] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def document_type_for(filename: str) -> Optional[str]:
+    """Document type named in a file name, e.g. "CLM-1_police.pdf" -> "fir"."""
+    stem, ext = os.path.splitext(os.path.basename(filename).lower())
+    if ext not in DOCUMENT_EXTENSIONS:
+        return None
+    for token in reversed(re.split(r"[^a-z0-9]+", stem)):
+        if token in _DOC_TOKENS:
+            return _DOC_TOKENS[token]
+    return None
+
+
+def infer_claim_type(doc_types) -> Optional[str]:
+    doc_types = set(doc_types)
+    if doc_types & {"fir", "rc", "dl"}:
+        return "accident"
+    if "hospital" in doc_types:
+        return "medical"
+    return None
+
+
+def validate(entry: ClaimEntry) -> Optional[str]:
+    """Why entry cannot be processed, or None. Drops documents the claim type does not use."""
+    if entry.error:
+        return entry.error
+    if not entry.claim_number.strip():
+        return "claim_number is required"
+    if entry.claim_type not in REQUIRED_DOCUMENTS:
+        return "claim_type must be 'medical' or 'accident'"
+    required = REQUIRED_DOCUMENTS[entry.claim_type]
+    missing = [doc_type for doc_type in required if doc_type not in entry.files]
+    if missing:
+        return f"{entry.claim_type.capitalize()} claims require: {', '.join(required)} (missing {', '.join(missing)})"
+    entry.files = {doc_type: entry.files[doc_type] for doc_type in required}
+    return None
+
+
+def _apply_claim_json(entry: ClaimEntry, raw: bytes) -> None:
+    try:
+        info = json.loads(raw.decode("utf-8"))
+    except Exception as e:
+        entry.error = f"claim.json is not valid JSON: {e}"
+        return
+    entry.claim_number = str(info.get("claim_number") or entry.claim_number)
+    entry.claim_type = info.get("claim_type") or entry.claim_type
+    entry.name = info.get("name", entry.name)
+    entry.email = info.get("email", entry.email)
+
+
+class ClaimSource:
+    """Claim entries from an archive or manifest, plus a lock serialising reads.
+
+    tarfile members share one underlying stream, so documents are read one
+    at a time under read_lock (zip reads take it too, for simplicity).
+    """
+
+    def __init__(self, entries: List[ClaimEntry], closer: Optional[Callable[[], None]] = None):
+        self.entries = entries
+        self.read_lock = threading.Lock()
+        self._closer = closer
+
+    def close(self) -> None:
+        if self._closer is not None:
+            self._closer()
+
+
+def store_document(
+    source: ClaimSource,
+    opener: Callable[[], BinaryIO],
+    original_name: str,
+    claim_number: str,
+    doc_type: str,
+    budget: UploadBudget,
+) -> StoredUpload:
+    """Copy one document of an entry into the document store (blocking; run on a worker thread)."""
+    with source.read_lock:
+        with opener() as src:
+            return store_stream(src, original_name, claim_number, budget, keep_data=False, doc_type=doc_type)
+
+
+def _folder_entries(members: List[Tuple[str, Callable[[], BinaryIO]]]) -> List[ClaimEntry]:
+    """Group (member path, opener) pairs by top-level folder into claims."""
+    entries: Dict[str, ClaimEntry] = {}
+    claim_json: Dict[str, Callable[[], BinaryIO]] = {}
+    for member_path, opener in members:
+        parts = [p for p in member_path.replace("\\", "/").split("/") if p and p != "."]
+        if len(parts) < 2 or parts[0].startswith("__MACOSX") or parts[-1].startswith("."):
+            continue
+        folder = parts[0]
+        entry = entries.setdefault(folder, ClaimEntry(claim_number=folder))
+        if parts[-1].lower() == "claim.json":
+            claim_json[folder] = opener
+            continue
+        doc_type = document_type_for(parts[-1])
+        if doc_type is None:
+            continue
+        if doc_type in entry.files:
+            entry.error = f"More than one {doc_type} document in {folder}/"
+        entry.files[doc_type] = (parts[-1], opener)
+    for folder, opener in claim_json.items():
+        with opener() as f:
+            _apply_claim_json(entries[folder], f.read())
+    for entry in entries.values():
+        entry.claim_type = entry.claim_type or infer_claim_type(entry.files)
+    return list(entries.values())
+
+
+def open_archive(fileobj: BinaryIO, filename: str) -> ClaimSource:
+    """Read the member list of a zip or tar archive (contents are read lazily)."""
+    fileobj.seek(0)
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        zf = zipfile.ZipFile(fileobj)
+        members = [
+            (info.filename, (lambda info=info: zf.open(info)))
+            for info in zf.infolist()
+            if not info.is_dir()
+        ]
+        return ClaimSource(_folder_entries(members), zf.close)
+    fileobj.seek(0)
+    try:
+        tf = tarfile.open(fileobj=fileobj, mode="r:*")
+    except tarfile.TarError as e:
+        raise BulkInputError(f"{filename or 'archive'} is not a zip or tar archive: {e}")
+    members = [
+        (member.name, (lambda member=member: tf.extractfile(member)))
+        for member in tf.getmembers()
+        if member.isfile()
+    ]
+    return ClaimSource(_folder_entries(members), tf.close)
+
+
+def _resolve_manifest_path(raw: str) -> Path:
+    path = Path(raw)
+    if not path.is_absolute():
+        if not ROOTS:
+            raise ValueError(f"Relative path {raw!r} but CLAIMWISE_BULK_ROOTS is empty")
+        path = ROOTS[0] / path
+    path = path.resolve()
+    if not any(path == root or root in path.parents for root in ROOTS):
+        raise ValueError(f"{raw!r} is outside the allowed bulk intake directories")
+    if not path.is_file():
+        raise ValueError(f"{raw!r} not found")
+    return path
+
+
+def _manifest_entry(line_no: int, line: str) -> ClaimEntry:
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError as e:
+        return ClaimEntry(claim_number=f"line-{line_no}", error=f"Line {line_no} is not valid JSON: {e}")
+    if not isinstance(item, dict):
+        return ClaimEntry(claim_number=f"line-{line_no}", error=f"Line {line_no} is not a JSON object")
+    entry = ClaimEntry(
+        claim_number=str(item.get("claim_number") or f"line-{line_no}"),
+        claim_type=item.get("claim_type"),
+        name=item.get("name"),
+        email=item.get("email"),
+    )
+    files = item.get("files")
+    if not isinstance(files, dict) or not files:
+        entry.error = "files must map document type to path"
+        return entry
+    try:
+        for doc_type, raw_path in files.items():
+            path = _resolve_manifest_path(str(raw_path))
+            entry.files[_DOC_TOKENS.get(str(doc_type).lower(), str(doc_type).lower())] = (
+                path.name,
+                (lambda path=path: open(path, "rb")),
+            )
+    except ValueError as e:
+        entry.error = str(e)
+    entry.claim_type = entry.claim_type or infer_claim_type(entry.files)
+    return entry
+
+
+def open_manifest(fileobj: BinaryIO) -> ClaimSource:
+    fileobj.seek(0)
+    entries = []
+    for line_no, raw in enumerate(fileobj, start=1):
+        line = raw.decode("utf-8", errors="replace").strip()
+        if line:
+            entries.append(_manifest_entry(line_no, line))
+    return ClaimSource(entries)
+
+
+class ClaimBatcher:
+    """Collects claim records and commits them to claim_store in batches.
+
+    add() resolves once the record's batch is on disk. A batch is written
+    when it reaches batch_size or interval seconds after its first record.
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE, interval: float = COMMIT_INTERVAL):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.commits = 0
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def add(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((record, fut))
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.interval, lambda: asyncio.ensure_future(self.flush()))
+        return await fut
+
+    async def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            stored = await asyncio.to_thread(claim_store.add_claims, [record for record, _ in batch])
+        except Exception as e:
+            logger.error(f"Committing {len(batch)} bulk claims failed: {e}", exc_info=True)
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        self.commits += 1
+        for (_, fut), claim in zip(batch, stored):
+            if not fut.done():
+                fut.set_result(claim)
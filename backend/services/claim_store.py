@@ -64,53 +64,66 @@ def _now_iso() -> str:
     return datetime.utcnow().isoformat() + "Z"
 
 
-def add_claim(record: Dict[str, Any]) -> Dict[str, Any]:
-    """Insert a claim record and persist to disk.
+def _build_claim(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalise an incoming record into the stored claim shape.
 
     Expected minimal keys: claim_number, claimant, claim_type, queue
     """
+    claim_number = record.get("claim_number", "")
+    claim = {
+        "id": record.get("id") or claim_number or str(uuid.uuid4()),
+        "claim_number": claim_number,  # Ensure claim_number is stored
+        "claimant": record.get("claimant") or record.get("name") or "Unknown",
+        "policy_no": record.get("policy_no") or claim_number or "",
+        "loss_type": record.get("loss_type") or record.get("claim_type", "accident"),
+        "claim_type": record.get("claim_type", record.get("loss_type", "accident")),
+        "created_at": record.get("created_at") or _now_iso(),
+        "severity": record.get("severity") or record.get("severity_level") or "Low",
+        "severity_level": record.get("severity_level") or record.get("severity") or "Low",
+        "confidence": float(record.get("confidence", 0.9)),
+        "queue": record.get("queue") or record.get("routing_team") or record.get("final_team") or "Fast Track",
+        "routing_team": record.get("routing_team") or record.get("final_team") or record.get("queue") or "Fast Track",
+        "final_team": record.get("final_team") or record.get("routing_team") or record.get("queue") or "Fast Track",
+        "status": record.get("status") or "Processing",
+        "email": record.get("email"),
+        "description": record.get("description") or "",
+        "rationale": record.get("rationale") or "",
+        "evidence": record.get("evidence") or [],
+        "ai_analysis": record.get("ai_analysis") or {},
+        "sources": record.get("sources") or [],
+        "attachments": (
+            record.get("attachments") if isinstance(record.get("attachments"), list) else
+            ([{"filename": k, "url": v} for k, v in record.get("files", {}).items()] 
+             if isinstance(record.get("files"), dict) else
+             record.get("files") if isinstance(record.get("files"), list) else
+             [])
+        ),
+        "assignee": record.get("assignee") or record.get("final_adjuster"),
+        "adjuster": record.get("adjuster") or record.get("final_adjuster") or record.get("assignee"),
+        "ml_scores": record.get("ml_scores") or {},
+        "routing": record.get("routing"),
+        # Extract individual scores from ml_scores for easier access
+        "fraud_score": record.get("ml_scores", {}).get("fraud_score") if record.get("ml_scores") else None,
+        "complexity_score": record.get("ml_scores", {}).get("complexity_score") if record.get("ml_scores") else None,
+    }
+    return _sanitize(claim)
+
+
+def add_claim(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert a claim record and persist to disk."""
+    return add_claims([record])[0]
+
+
+def add_claims(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Insert several claim records with a single write to disk.
+
+    Later records end up first, as if add_claim were called for each in turn.
+    """
+    claims = [_build_claim(record) for record in records]
     with _lock:
-        claim_number = record.get("claim_number", "")
-        claim = {
-            "id": record.get("id") or claim_number or str(uuid.uuid4()),
-            "claim_number": claim_number,  # Ensure claim_number is stored
-            "claimant": record.get("claimant") or record.get("name") or "Unknown",
-            "policy_no": record.get("policy_no") or claim_number or "",
-            "loss_type": record.get("loss_type") or record.get("claim_type", "accident"),
-            "claim_type": record.get("claim_type", record.get("loss_type", "accident")),
-            "created_at": record.get("created_at") or _now_iso(),
-            "severity": record.get("severity") or record.get("severity_level") or "Low",
-            "severity_level": record.get("severity_level") or record.get("severity") or "Low",
-            "confidence": float(record.get("confidence", 0.9)),
-            "queue": record.get("queue") or record.get("routing_team") or record.get("final_team") or "Fast Track",
-            "routing_team": record.get("routing_team") or record.get("final_team") or record.get("queue") or "Fast Track",
-            "final_team": record.get("final_team") or record.get("routing_team") or record.get("queue") or "Fast Track",
-            "status": record.get("status") or "Processing",
-            "email": record.get("email"),
-            "description": record.get("description") or "",
-            "rationale": record.get("rationale") or "",
-            "evidence": record.get("evidence") or [],
-            "ai_analysis": record.get("ai_analysis") or {},
-            "sources": record.get("sources") or [],
-            "attachments": (
-                record.get("attachments") if isinstance(record.get("attachments"), list) else
-                ([{"filename": k, "url": v} for k, v in record.get("files", {}).items()] 
-                 if isinstance(record.get("files"), dict) else
-                 record.get("files") if isinstance(record.get("files"), list) else
-                 [])
-            ),
-            "assignee": record.get("assignee") or record.get("final_adjuster"),
-            "adjuster": record.get("adjuster") or record.get("final_adjuster") or record.get("assignee"),
-            "ml_scores": record.get("ml_scores") or {},
-            "routing": record.get("routing"),
-            # Extract individual scores from ml_scores for easier access
-            "fraud_score": record.get("ml_scores", {}).get("fraud_score") if record.get("ml_scores") else None,
-            "complexity_score": record.get("ml_scores", {}).get("complexity_score") if record.get("ml_scores") else None,
-        }
-    claim = _sanitize(claim)
-    _claims.insert(0, claim)
-    _save()
-    return claim
+        _claims[0:0] = reversed(claims)
+        _save()
+    return claims
 
 
 def list_claims(queue: Optional[str] = None, limit: Optional[int] = None, offset: Optional[int] = None) -> List[Dict[str, Any]]:
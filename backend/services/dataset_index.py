@@ -0,0 +1,209 @@
+"""
+Index of the sample claims in ml/dataset for /upload/auto and /upload/auto/select.
+
+The dataset keeps each document type of a claim in its own folder, named by
+the claim's base id (CLM-2025-0001-ACC_SAFE); police reports carry an extra
+PR-… prefix. Instead of globbing and scanning those folders per request, the
+index maps every base id with a complete document set to its files, per
+claim type, so picking a random sample or looking one up is a dict access.
+
+The index is built on first use (or at startup), saved next to the claims
+store, and reloaded from there on the next start. It is rebuilt whenever the
+modification time of any dataset folder changes, i.e. when files are added,
+removed or renamed.
+
+Config (env):
+  CLAIMWISE_DATASET_DIR           dataset root (default: ml/dataset)
+  CLAIMWISE_DATASET_INDEX_PATH    where the index is saved; empty keeps it in memory only
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATASET_DIR = Path(os.getenv(
+    "CLAIMWISE_DATASET_DIR",
+    str(Path(__file__).resolve().parent.parent.parent / "ml" / "dataset"),
+)).resolve()
+INDEX_PATH = os.getenv(
+    "CLAIMWISE_DATASET_INDEX_PATH",
+    str(Path(__file__).parent.parent / "data" / "dataset_index.json"),
+)
+
+# Bump when the index format changes
+INDEX_VERSION = 1
+
+# claim type -> (dataset sub-folder, {document type: folder}), documents in upload form order
+LAYOUT: Dict[str, Tuple[str, Dict[str, str]]] = {
+    "accident": ("accident", {
+        "acord": "accord_form_100",
+        "loss": "loss_reports_100",
+        "fir": "police_reports_100",
+        "rc": "rc_documents_100",
+        "dl": "dl_documents_100",
+    }),
+    "medical": ("health", {
+        "acord": "accord_form_100",
+        "loss": "loss_reports_100",
+        "hospital": "hospital_bills_100",
+    }),
+}
+
+# File-name suffix of each document type
+_SUFFIXES = {"acord": "acord", "loss": "loss", "fir": "police", "rc": "rc", "dl": "dl", "hospital": "hospital"}
+_BASE_RE = re.compile(r"(CLM-\d{4}-\d{4}-[A-Z]{3}_(?:SAFE|RISK))_([a-z]+)\.pdf$")
+
+_lock = threading.Lock()
+_index: Optional[Dict[str, Any]] = None
+_stats: Dict[str, int] = {"builds": 0, "loads": 0, "lookups": 0}
+
+
+# (key in the saved index, absolute path) of every dataset folder, for the mtime check
+_FOLDERS: List[Tuple[str, str]] = [
+    (f"{sub}/{folder}", os.path.join(DATASET_DIR, sub, folder))
+    for sub, docs in LAYOUT.values()
+    for folder in docs.values()
+]
+
+
+def _mtimes() -> Dict[str, int]:
+    """Modification time of every dataset folder (0 if missing)."""
+    out = {}
+    for key, folder in _FOLDERS:
+        try:
+            out[key] = os.stat(folder).st_mtime_ns
+        except OSError:
+            out[key] = 0
+    return out
+
+
+def _build(mtimes: Dict[str, int]) -> Dict[str, Any]:
+    """Scan the dataset folders once and group complete document sets by base id."""
+    started = time.perf_counter()
+    claim_types = {}
+    for claim_type, (sub, docs) in LAYOUT.items():
+        found: Dict[str, Dict[str, str]] = {}
+        for doc_type, folder in docs.items():
+            try:
+                names = os.listdir(DATASET_DIR / sub / folder)
+            except OSError:
+                continue
+            for name in names:
+                m = _BASE_RE.search(name)
+                if m and m.group(2) == _SUFFIXES[doc_type]:
+                    found.setdefault(m.group(1), {})[doc_type] = f"{sub}/{folder}/{name}"
+        complete = {
+            base: {doc_type: files[doc_type] for doc_type in docs}
+            for base, files in sorted(found.items())
+            if len(files) == len(docs)
+        }
+        if len(complete) < len(found):
+            logger.warning(f"Dataset index: {len(found) - len(complete)} {claim_type} samples have missing documents")
+        claim_types[claim_type] = {"bases": list(complete), "documents": complete}
+    _stats["builds"] += 1
+    logger.info(
+        f"Built dataset index in {(time.perf_counter() - started) * 1000:.1f} ms: "
+        + ", ".join(f"{len(v['bases'])} {k}" for k, v in claim_types.items())
+    )
+    return {"version": INDEX_VERSION, "root": str(DATASET_DIR), "mtimes": mtimes, "claim_types": claim_types}
+
+
+def _load(mtimes: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    if not INDEX_PATH or not os.path.exists(INDEX_PATH):
+        return None
+    try:
+        with open(INDEX_PATH, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable dataset index {INDEX_PATH}: {e}")
+        return None
+    if index.get("version") != INDEX_VERSION or index.get("root") != str(DATASET_DIR) or index.get("mtimes") != mtimes:
+        return None
+    _stats["loads"] += 1
+    return index
+
+
+def _save(index: Dict[str, Any]) -> None:
+    if not INDEX_PATH:
+        return
+    try:
+        os.makedirs(os.path.dirname(INDEX_PATH) or ".", exist_ok=True)
+        tmp = f"{INDEX_PATH}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, INDEX_PATH)
+    except OSError as e:
+        logger.warning(f"Could not save dataset index to {INDEX_PATH}: {e}")
+
+
+def _current() -> Dict[str, Any]:
+    """The index, reloaded or rebuilt if a dataset folder changed since it was made."""
+    global _index
+    mtimes = _mtimes()
+    index = _index
+    if index is not None and index["mtimes"] == mtimes:
+        return index
+    with _lock:
+        if _index is None or _index["mtimes"] != mtimes:
+            _index = _load(mtimes)
+            if _index is None:
+                _index = _build(mtimes)
+                _save(_index)
+        return _index
+
+
+def load() -> int:
+    """Load or build the index (called at startup); returns the number of samples."""
+    return sum(len(v["bases"]) for v in _current()["claim_types"].values())
+
+
+def fingerprint() -> Dict[str, int]:
+    """Folder mtimes the current index was built from; changes whenever the dataset does."""
+    return dict(_current()["mtimes"])
+
+
+def _paths(relative: Dict[str, str]) -> Dict[str, Path]:
+    return {doc_type: DATASET_DIR / rel for doc_type, rel in relative.items()}
+
+
+def choose(claim_type: str) -> Optional[Tuple[str, Dict[str, Path]]]:
+    """A random complete sample of claim_type as (base id, {document type: path}), or None."""
+    entry = _current()["claim_types"].get(claim_type)
+    _stats["lookups"] += 1
+    if not entry or not entry["bases"]:
+        return None
+    base = random.choice(entry["bases"])
+    return base, _paths(entry["documents"][base])
+
+
+def bases(claim_type: str) -> List[str]:
+    """Base ids of all complete samples of claim_type, sorted."""
+    entry = _current()["claim_types"].get(claim_type)
+    return list(entry["bases"]) if entry else []
+
+
+def lookup(base: str) -> Optional[Tuple[str, Dict[str, Path]]]:
+    """(claim type, {document type: path}) of a sample base id, or None."""
+    _stats["lookups"] += 1
+    for claim_type, entry in _current()["claim_types"].items():
+        relative = entry["documents"].get(base)
+        if relative is not None:
+            return claim_type, _paths(relative)
+    return None
+
+
+def stats() -> Dict[str, Any]:
+    index = _index
+    return {
+        **_stats,
+        "samples": {k: len(v["bases"]) for k, v in index["claim_types"].items()} if index else {},
+    }
@@ -0,0 +1,206 @@
+"""
+Content-addressed storage for uploaded claim documents.
+
+Each distinct file is stored once under uploads/objects/, sharded by its
+SHA-256 (objects/ab/cd/abcd….pdf), so no directory grows with the number of
+uploads and identical bytes uploaded for several claims share one object.
+Which claim uses which document lives separately in a small SQLite database
+(stdlib sqlite3, next to claims.json): listing a claim's documents and
+cleaning up after a claim are indexed queries, not directory scans.
+
+Objects are immutable: a URL under /files/objects/ always returns the same
+bytes. Files uploaded before this layout stay where they are (flat in
+uploads/) and keep being served.
+
+Config (env):
+  CLAIMWISE_DOCUMENT_DB  mapping database (default: data/documents.sqlite3)
+"""
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+UPLOAD_FOLDER = "uploads"
+OBJECTS_DIR = os.path.join(UPLOAD_FOLDER, "objects")
+# Uploads in progress: next to uploads/ (same filesystem, so commit's
+# os.replace is a rename) but outside the directory served under /files
+INCOMING_DIR = UPLOAD_FOLDER + "_incoming"
+DB_PATH = os.getenv(
+    "CLAIMWISE_DOCUMENT_DB",
+    str(Path(__file__).parent.parent / "data" / "documents.sqlite3"),
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    sha256 TEXT PRIMARY KEY,
+    ext TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    claim_number TEXT NOT NULL,
+    doc_type TEXT NOT NULL,
+    sha256 TEXT NOT NULL REFERENCES objects(sha256),
+    original_name TEXT,
+    stored_at TEXT NOT NULL,
+    UNIQUE (claim_number, doc_type, sha256)
+);
+CREATE INDEX IF NOT EXISTS documents_by_sha ON documents (sha256);
+"""
+
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+_stats: Dict[str, int] = {"stored": 0, "deduplicated": 0, "removed": 0}
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _conn = conn
+    return _conn
+
+
+def _now_iso() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def _extension(original_name: str) -> str:
+    """Lower-cased extension of original_name (".pdf"), or "" if it has none or an odd one."""
+    _, dot, ext = (original_name or "").rpartition(".")
+    ext = ext.lower()
+    return f".{ext}" if dot and re.fullmatch(r"[a-z0-9]{1,8}", ext) else ""
+
+
+def object_path(sha256: str, ext: str) -> Tuple[str, str]:
+    """(file path, public URL) of the object with this digest."""
+    relative = f"objects/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+    return os.path.join(UPLOAD_FOLDER, *relative.split("/")), f"/files/{relative}"
+
+
+def incoming_file() -> str:
+    """Create an empty temp file on the uploads filesystem to stream a new upload into."""
+    os.makedirs(INCOMING_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=INCOMING_DIR)
+    os.close(fd)
+    return path
+
+
+def commit(
+    tmp_path: str,
+    sha256: str,
+    size: int,
+    original_name: str,
+    claim_number: str,
+    doc_type: str = "",
+) -> Tuple[str, str]:
+    """Move a fully written temp file into the object store and record it for the claim.
+
+    If an object with the same digest already exists the temp file is
+    dropped instead. Returns the object's (file path, public URL).
+    """
+    with _lock:
+        db = _db()
+        row = db.execute("SELECT ext FROM objects WHERE sha256 = ?", (sha256,)).fetchone()
+        ext = row[0] if row else _extension(original_name)
+        file_path, url = object_path(sha256, ext)
+        if row and os.path.exists(file_path):
+            os.remove(tmp_path)
+            _stats["deduplicated"] += 1
+        else:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            os.replace(tmp_path, file_path)
+            os.chmod(file_path, 0o644)
+            _stats["stored"] += 1
+        now = _now_iso()
+        db.execute(
+            "INSERT OR IGNORE INTO objects (sha256, ext, size, stored_at) VALUES (?, ?, ?, ?)",
+            (sha256, ext, size, now),
+        )
+        db.execute(
+            "INSERT OR IGNORE INTO documents (claim_number, doc_type, sha256, original_name, stored_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (claim_number, doc_type, sha256, original_name, now),
+        )
+    return file_path, url
+
+
+def find(sha256: str) -> Optional[Dict[str, Any]]:
+    """Object metadata (path, url, size, ext) for a digest, or None."""
+    with _lock:
+        row = _db().execute("SELECT ext, size FROM objects WHERE sha256 = ?", (sha256,)).fetchone()
+    if row is None:
+        return None
+    file_path, url = object_path(sha256, row[0])
+    return {"sha256": sha256, "path": file_path, "url": url, "size": row[1], "ext": row[0]}
+
+
+def claim_documents(claim_number: str) -> List[Dict[str, Any]]:
+    """Documents stored for a claim, oldest first."""
+    with _lock:
+        rows = _db().execute(
+            "SELECT d.doc_type, d.sha256, d.original_name, d.stored_at, o.ext, o.size"
+            " FROM documents d JOIN objects o ON o.sha256 = d.sha256"
+            " WHERE d.claim_number = ? ORDER BY d.rowid",
+            (claim_number,),
+        ).fetchall()
+    out = []
+    for doc_type, sha256, original_name, stored_at, ext, size in rows:
+        _, url = object_path(sha256, ext)
+        out.append({
+            "doc_type": doc_type,
+            "sha256": sha256,
+            "original_name": original_name,
+            "size": size,
+            "url": url,
+            "stored_at": stored_at,
+        })
+    return out
+
+
+def remove_claim(claim_number: str) -> Dict[str, int]:
+    """Forget a claim's documents and delete objects no other claim uses."""
+    with _lock:
+        db = _db()
+        shas = [r[0] for r in db.execute(
+            "SELECT DISTINCT sha256 FROM documents WHERE claim_number = ?", (claim_number,)
+        )]
+        db.execute("BEGIN")
+        try:
+            removed = db.execute("DELETE FROM documents WHERE claim_number = ?", (claim_number,)).rowcount
+            orphans = []
+            for sha in shas:
+                if db.execute("SELECT 1 FROM documents WHERE sha256 = ? LIMIT 1", (sha,)).fetchone():
+                    continue
+                row = db.execute("SELECT ext FROM objects WHERE sha256 = ?", (sha,)).fetchone()
+                orphans.append((sha, row[0] if row else ""))
+            db.executemany("DELETE FROM objects WHERE sha256 = ?", [(sha,) for sha, _ in orphans])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        for sha, ext in orphans:
+            try:
+                os.remove(object_path(sha, ext)[0])
+            except FileNotFoundError:
+                pass
+        _stats["removed"] += len(orphans)
+    return {"documents": removed, "objects_deleted": len(orphans)}
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        db = _db()
+        objects, total_bytes = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects").fetchone()
+        documents = db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    return {**_stats, "objects": objects, "object_bytes": total_bytes, "documents": documents}
@@ -0,0 +1,282 @@
+"""
+Content-addressed cache for extracted document text.
+
+Entries are keyed by the SHA-256 of the file bytes plus the extractor version,
+so the same bytes are never run through PyMuPDF/Tesseract twice no matter
+which path (upload, retry, /upload/auto sample) they arrive through.
+
+Two tiers:
+  - in-process LRU (bounded by entry count)
+  - on-disk JSON store, sharded by the first two hex chars of the digest,
+    bounded by CLAIMWISE_EXTRACT_CACHE_DISK_MB: once over it, entries from
+    older extractor versions and then the least recently used are deleted
+    until the store is back under 90% of the bound
+
+Partial results (OCR timed out) are kept apart, in memory for a few minutes
+only, so the pipeline that produced them can read the text back.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever extract_text changes in a way that alters its output.
+EXTRACTOR_VERSION = "6"
+
+MEMORY_MAX_ENTRIES = int(os.getenv("CLAIMWISE_EXTRACT_CACHE_SIZE", "256"))
+DISK_DIR = Path(os.getenv(
+    "CLAIMWISE_EXTRACT_CACHE_DIR",
+    str(Path(__file__).parent.parent / "data" / "extraction_cache"),
+))
+DISK_ENABLED = os.getenv("CLAIMWISE_EXTRACT_CACHE_DISK", "1") != "0"
+# Size bound of the disk tier in MB (0 disables pruning)
+DISK_MAX_MB = float(os.getenv("CLAIMWISE_EXTRACT_CACHE_DISK_MB", "1024"))
+# Seconds partial results (OCR ran out of time) are kept, memory only
+PARTIAL_TTL = float(os.getenv("CLAIMWISE_EXTRACT_CACHE_PARTIAL_TTL", "600"))
+
+_CHUNK_SIZE = 1024 * 1024
+_PRUNE_TO = 0.9
+
+_lock = threading.RLock()
+_memory: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+# key -> (expiry on the monotonic clock, text, meta); see put_partial
+_partial: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+# Bytes in the disk tier; measured on the first store, then kept up to date
+_disk_lock = threading.Lock()
+_disk_bytes: Optional[int] = None
+_stats: Dict[str, int] = {
+    "memory_hits": 0,
+    "disk_hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "evictions": 0,
+    "partial_hits": 0,
+    "disk_pruned": 0,
+}
+
+
+def digest_bytes(data: bytes) -> str:
+    """Return the SHA-256 hex digest of an in-memory buffer."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def digest_file(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _key(digest: str) -> str:
+    return f"{digest}-v{EXTRACTOR_VERSION}"
+
+
+def _disk_path(key: str) -> Path:
+    return DISK_DIR / key[:2] / f"{key}.json"
+
+
+def _disk_entries():
+    """(path, stat) of every entry file in the disk tier."""
+    for path in DISK_DIR.glob("*/*.json"):
+        try:
+            yield path, path.stat()
+        except OSError:
+            continue
+
+
+def _prune_disk(target: int) -> int:
+    """Delete disk entries until at most target bytes remain; returns the bytes left.
+
+    Entries of older extractor versions go first, then by last use (mtime,
+    refreshed on disk hits).
+    """
+    entries = list(_disk_entries())
+    total = sum(st.st_size for _, st in entries)
+    current = f"-v{EXTRACTOR_VERSION}.json"
+    entries.sort(key=lambda e: (e[0].name.endswith(current), e[1].st_mtime))
+    pruned = 0
+    for path, st in entries:
+        if total <= target:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= st.st_size
+        pruned += 1
+    with _lock:
+        _stats["disk_pruned"] += pruned
+    logger.info(f"Pruned {pruned} extraction cache entries from {DISK_DIR} ({total} bytes left)")
+    return total
+
+
+def _account_disk(added: int) -> None:
+    """Track the disk tier's size after a store and prune it past DISK_MAX_MB."""
+    global _disk_bytes
+    if DISK_MAX_MB <= 0:
+        return
+    limit = int(DISK_MAX_MB * 1024 * 1024)
+    with _disk_lock:
+        if _disk_bytes is None:
+            _disk_bytes = sum(st.st_size for _, st in _disk_entries())
+        else:
+            _disk_bytes += added
+        if _disk_bytes > limit:
+            _disk_bytes = _prune_disk(int(limit * _PRUNE_TO))
+
+
+def _remember(key: str, value: Tuple[str, Dict[str, Any]]) -> None:
+    """Insert into the LRU tier, evicting the oldest entries past the bound."""
+    _memory[key] = value
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_MAX_ENTRIES:
+        _memory.popitem(last=False)
+        _stats["evictions"] += 1
+
+
+def _copy_meta(meta: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """Copy of a cached meta, with its lists and dicts (warnings, pages...) copied too."""
+    copied = {k: v.copy() if isinstance(v, (list, dict)) else v for k, v in meta.items()}
+    copied["cache"] = source
+    return copied
+
+
+def get(digest: str, allow_partial: bool = False) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Look up extracted (text, meta) for a content digest.
+
+    Returns a fresh copy of meta so callers may annotate it freely. With
+    allow_partial, a recent partial result (put_partial) is returned when
+    there is no complete one.
+    """
+    key = _key(digest)
+    with _lock:
+        hit = _memory.get(key)
+        if hit is not None:
+            _memory.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return hit[0], _copy_meta(hit[1], "memory")
+        if allow_partial:
+            partial = _partial.get(key)
+            if partial is not None and partial[0] > time.monotonic():
+                _stats["partial_hits"] += 1
+                return partial[1], _copy_meta(partial[2], "partial")
+
+    if DISK_ENABLED:
+        path = _disk_path(key)
+        if path.exists():
+            try:
+                payload = json.loads(path.read_text(encoding="utf-8"))
+                value = (payload["text"], payload.get("meta") or {})
+                with _lock:
+                    _remember(key, value)
+                    _stats["disk_hits"] += 1
+                try:
+                    # Last use, for pruning
+                    os.utime(path)
+                except OSError:
+                    pass
+                return value[0], _copy_meta(value[1], "disk")
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+
+    with _lock:
+        _stats["misses"] += 1
+    return None
+
+
+def put(digest: str, text: str, meta: Dict[str, Any]) -> None:
+    """Store extracted (text, meta) under a content digest in both tiers."""
+    key = _key(digest)
+    meta = {k: v for k, v in meta.items() if k != "cache"}
+    with _lock:
+        _remember(key, (text, meta))
+        _stats["stores"] += 1
+
+    if DISK_ENABLED:
+        path = _disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Unique temp name: two workers may store the same digest at once
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.stem, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"text": text, "meta": meta}, f, ensure_ascii=False)
+                added = os.path.getsize(tmp)
+                try:
+                    added -= path.stat().st_size
+                except OSError:
+                    pass
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            _account_disk(added)
+        except Exception as e:
+            logger.warning(f"Failed to persist extraction cache entry {key}: {e}")
+
+
+def put_partial(digest: str, text: str, meta: Dict[str, Any]) -> None:
+    """Keep a partial result (meta["partial"]) in memory for PARTIAL_TTL seconds.
+
+    Partial text is not served to get() by default, so a new upload of the
+    same bytes still gets a full OCR attempt, but the analysis that produced
+    it can read it back (document_text) without OCRing the document again.
+    """
+    if PARTIAL_TTL <= 0:
+        return
+    key = _key(digest)
+    meta = {k: v for k, v in meta.items() if k != "cache"}
+    now = time.monotonic()
+    with _lock:
+        _partial[key] = (now + PARTIAL_TTL, text, meta)
+        _partial.move_to_end(key)
+        while _partial and (len(_partial) > MEMORY_MAX_ENTRIES or next(iter(_partial.values()))[0] <= now):
+            _partial.popitem(last=False)
+
+
+def stats() -> Dict[str, Any]:
+    """Return hit/miss counters and current tier sizes."""
+    with _lock:
+        lookups = _stats["memory_hits"] + _stats["disk_hits"] + _stats["misses"]
+        hits = _stats["memory_hits"] + _stats["disk_hits"]
+        return {
+            **_stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(_memory),
+            "partial_entries": len(_partial),
+            "memory_max_entries": MEMORY_MAX_ENTRIES,
+            "disk_enabled": DISK_ENABLED,
+            "disk_bytes": _disk_bytes,
+            "disk_max_mb": DISK_MAX_MB,
+            "extractor_version": EXTRACTOR_VERSION,
+        }
+
+
+def clear(memory_only: bool = True) -> None:
+    """Drop cached entries (memory tier only unless memory_only=False)."""
+    global _disk_bytes
+    with _lock:
+        _memory.clear()
+        _partial.clear()
+        for k in _stats:
+            _stats[k] = 0
+    if not memory_only and DISK_ENABLED and DISK_DIR.exists():
+        for p in DISK_DIR.glob("*/*.json"):
+            try:
+                p.unlink()
+            except OSError:
+                pass
+        with _disk_lock:
+            _disk_bytes = None
@@ -0,0 +1,230 @@
+"""
+Declarative field-extraction specs for ocr_service.extract_entities.
+
+Each (insurance_type, document_type) pair lists the fields to pull out of a
+document as label/value-pattern pairs. At import time every spec is compiled
+into a single scanner: one pass over the text finds every label occurrence,
+and each field then only tries its value pattern at the positions where one
+of its own labels was seen.
+
+Matching semantics are the same as the old per-field
+`(?im)\\b(?:label|...)\\b\\s*[:\\-]?\\s*<value>` search: the earliest label
+occurrence whose value pattern matches wins, and labels are tried in listed
+order at a given position.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern, Tuple
+
+LINE = r"([^\n\r]+)"
+ID = r"([A-Za-z0-9-]+)"
+DATE = r"(\d{4}-\d{2}-\d{2})"
+MONEY = r"([\d,]+(?:\.\d+)?)"
+YEAR = r"(\d{4})"
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    labels: Tuple[str, ...]
+    value: str = LINE
+    kind: str = "str"  # str | bool | number
+    fallback: Optional[str] = None  # standalone regex used if no label matches
+
+
+def F(name: str, labels: List[str], value: str = LINE, kind: str = "str", fallback: Optional[str] = None) -> Field:
+    return Field(name, tuple(labels), value, kind, fallback)
+
+
+# Identifiers shared by most document types
+CLAIM_ID = F("claim_id", ["Claim ID", "Claim"], r"([A-Z]{3,}-[A-Za-z0-9-]+)", fallback=r"\b(CL[Ml]-[A-Za-z0-9-]{6,})\b")
+RC_NO = F("rc_no", ["RC No", "RC Number", "Registration Certificate"], ID, fallback=r"\bRC-?[A-Za-z0-9-]+\b")
+DL_NO = F("dl_no", ["DL No", "Driving License", "Driver Licence"], ID, fallback=r"\bDL-?[A-Za-z0-9-]+\b")
+REGISTRATION = F(
+    "registration",
+    ["Registration", "Vehicle No", "Vehicle Number"],
+    r"([A-Za-z]{2}\s*\d{1,2}\s*[A-Za-z]{1,3}\s*\d{3,5}|[A-Za-z0-9-]+)",
+    fallback=r"\b[A-Z]{2}\s?\d{1,2}\s?[A-Z]{1,3}\s?\d{3,5}\b",
+)
+POLICE_REPORT_NO = F("police_report_no", ["Police Report No", "PR No"], ID)
+
+
+FIELD_SPECS: Dict[Tuple[str, str], List[Field]] = {
+    ("vehicle", "accord"): [
+        CLAIM_ID,
+        F("policy_number", ["Policy Number", "Policy No"], ID),
+        F("insurance_start_date", ["Insurance Start Date", "Policy Start"], DATE),
+        F("insurance_expiry_date", ["Insurance Expiry Date", "Policy End"], DATE),
+        F("incident_type", ["Incident Type", "Accident Type"]),
+        F("incident_date", ["Incident Date", "Accident Date"], DATE),
+        REGISTRATION,
+        F("location", ["Location", "Accident Location"]),
+        RC_NO,
+        DL_NO,
+        F("injuries_reported", ["Injuries Reported", "Injuries"], kind="bool"),
+        F("estimated_damage_cost", ["Estimated Damage Cost", "Damage Cost", "Estimated Damage"], MONEY, "number"),
+        F("police_report_filed", ["Police Report Filed"], kind="bool"),
+        POLICE_REPORT_NO,
+    ],
+    ("vehicle", "dl"): [
+        CLAIM_ID,
+        DL_NO,
+        F("name", ["Name"]),
+        F("dob", ["DOB", "Date of Birth"], DATE),
+        F("address", ["Address"]),
+        F("valid_from", ["Valid From", "Issue Date"], DATE),
+        F("valid_to", ["Valid To", "Expiry Date"], DATE),
+        F("issuing_authority", ["Issuing Authority", "RTO"]),
+        F("remarks", ["Remarks", "Notes"]),
+    ],
+    ("vehicle", "loss"): [
+        CLAIM_ID,
+        F("inspection_date", ["Inspection Date"], DATE),
+        F("loss_date", ["Loss Date"], DATE),
+        F("inspection_location", ["Inspection Location", "Assessment Site"]),
+        REGISTRATION,
+        RC_NO,
+        DL_NO,
+        F("injuries_reported", ["Injuries Reported"], kind="bool"),
+        F("estimated_damage_cost", ["Estimated Damage Cost", "Estimated Cost"], MONEY, "number"),
+        F("approved_repair_amount", ["Approved Repair Amount", "Approved Amount"], MONEY, "number"),
+        F("total_loss", ["Total Loss"], kind="bool"),
+        F("claim_status", ["Claim Status", "Status"]),
+    ],
+    ("vehicle", "fir"): [
+        POLICE_REPORT_NO,
+        CLAIM_ID,
+        F("report_date", ["Report Date"], DATE),
+        F("incident_date", ["Incident Date"], DATE),
+        F("location", ["Location"]),
+        REGISTRATION,
+        RC_NO,
+        DL_NO,
+        F("injuries_reported", ["Injuries Reported"], kind="bool"),
+        F("estimated_damage_cost", ["Estimated Damage Cost", "Damage Cost"], MONEY, "number"),
+    ],
+    ("vehicle", "rc"): [
+        CLAIM_ID,
+        RC_NO,
+        REGISTRATION,
+        F("owner", ["Owner", "Owner Name"]),
+        F("vehicle_model", ["Vehicle Model", "Model", "Make and Model"]),
+        F("manufacture_year", ["Manufacture Year", "Year of Manufacture"], YEAR),
+        F("fuel_type", ["Fuel Type", "Fuel"]),
+        F("color", ["Color", "Colour"]),
+        F("notes", ["Notes", "Remarks"]),
+    ],
+    ("health", "accord"): [
+        CLAIM_ID,
+        F("policy_number", ["Policy Number", "Policy No"], ID),
+        F("insurance_start_date", ["Insurance Start Date", "Policy Start"], DATE),
+        F("insurance_expiry_date", ["Insurance Expiry Date", "Policy End"], DATE),
+        F("incident_type", ["Incident Type"]),
+        F("incident_date", ["Incident Date"], DATE),
+        F("location", ["Location", "Treatment Location"]),
+        F("patient_id", ["Patient ID"], ID),
+        F("hospital_code", ["Hospital Code"], ID),
+        F("injuries_reported", ["Injuries Reported", "Injuries"], kind="bool"),
+        F("estimated_damage_cost", ["Estimated Damage Cost", "Estimated Cost"], MONEY, "number"),
+        F("police_report_filed", ["Police Report Filed"], kind="bool"),
+        POLICE_REPORT_NO,
+        F("diagnosis", ["Diagnosis"]),
+        F("hospital", ["Hospital"]),
+    ],
+    ("health", "hospital"): [
+        CLAIM_ID,
+        F("patient_id", ["Patient ID"], ID),
+        F("hospital_code", ["Hospital Code"], ID),
+        F("prescription", ["Prescription"]),
+        F("admission_date", ["Admission Date"], DATE),
+        F("discharge_date", ["Discharge Date"], DATE),
+        F("bill_amount", ["Bill Amount", "Bill"], MONEY, "number"),
+    ],
+    ("health", "loss"): [
+        CLAIM_ID,
+        F("inspection_date", ["Inspection Date"], DATE),
+        F("loss_date", ["Loss Date"], DATE),
+        F("inspection_location", ["Inspection Location"]),
+        F("injuries_reported", ["Injuries Reported"], kind="bool"),
+        F("estimated_damage_cost", ["Estimated Damage Cost", "Estimated Cost"], MONEY, "number"),
+        F("approved_repair_amount", ["Approved Repair Amount", "Approved Amount"], MONEY, "number"),
+        F("total_loss", ["Total Loss"], kind="bool"),
+        F("claim_status", ["Claim Status", "Status"]),
+        F("medical_notes", ["Medical Notes", "Notes"]),
+    ],
+}
+
+
+@dataclass
+class _CompiledField:
+    field: Field
+    labels: Tuple[str, ...]  # lowercased, in priority order
+    value_re: Pattern[str]
+    fallback_re: Optional[Pattern[str]]
+
+
+class CompiledSpec:
+    """One document spec compiled into a single label scanner."""
+
+    def __init__(self, fields: List[Field]):
+        labels = {label.lower() for f in fields for label in f.labels}
+        # Longest first so the lookahead reports the longest label at each
+        # position; shorter labels that also match there are derived below.
+        ordered = sorted(labels, key=len, reverse=True)
+        alternation = "|".join(re.escape(label) for label in ordered)
+        # Zero-width lookahead so overlapping occurrences are all visited
+        # (e.g. "Location" inside "Accident Location").
+        self.scanner = re.compile(rf"(?=\b({alternation})\b)", re.I)
+        self.also_matches: Dict[str, Tuple[str, ...]] = {
+            longer: tuple(
+                shorter for shorter in ordered
+                if longer.startswith(shorter)
+                and (len(shorter) == len(longer) or not (longer[len(shorter)].isalnum() or longer[len(shorter)] == "_"))
+            )
+            for longer in ordered
+        }
+        self.fields = [
+            _CompiledField(
+                field=f,
+                labels=tuple(label.lower() for label in f.labels),
+                value_re=re.compile(rf"\s*[:\-]?\s*{f.value}", re.I | re.M),
+                fallback_re=re.compile(f.fallback, re.I) if f.fallback else None,
+            )
+            for f in fields
+        ]
+
+    def _label_index(self, text: str) -> Dict[int, Tuple[str, ...]]:
+        """Single pass over the text: start position -> labels found there."""
+        return {m.start(): self.also_matches[m.group(1).lower()] for m in self.scanner.finditer(text)}
+
+    def scan(self, text: str) -> Dict[str, Optional[str]]:
+        """Return raw (unconverted) string values for every field in the spec."""
+        index = self._label_index(text)
+        positions = sorted(index)
+        values: Dict[str, Optional[str]] = {}
+        for cf in self.fields:
+            value = None
+            for pos in positions:
+                found = index[pos]
+                for label in cf.labels:
+                    if label not in found:
+                        continue
+                    m = cf.value_re.match(text, pos + len(label))
+                    if m:
+                        value = m.group(1).strip()
+                        break
+                if value is not None:
+                    break
+            if not value and cf.fallback_re is not None:
+                m = cf.fallback_re.search(text)
+                if m:
+                    value = (m.group(1) if m.lastindex else m.group(0)).strip()
+            values[cf.field.name] = value or None
+        return values
+
+
+COMPILED_SPECS: Dict[Tuple[str, str], CompiledSpec] = {
+    key: CompiledSpec(fields) for key, fields in FIELD_SPECS.items()
+}
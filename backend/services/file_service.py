@@ -1,58 +1,189 @@
+import asyncio
+import hashlib
 import os
-import re
+import threading
+from dataclasses import dataclass
+from typing import BinaryIO, Optional, Tuple
 from fastapi import UploadFile
-import shutil
 
-UPLOAD_FOLDER = "uploads"
+from . import document_store
+from .document_store import UPLOAD_FOLDER
+
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-def _sanitize_name(name: str) -> str:
-    """Sanitize user-provided claim number to a safe filename base."""
-    # Allow alphanumerics, dot, underscore, dash; replace others with underscore
-    safe = re.sub(r"[^A-Za-z0-9._-]+", "_", name or "")
-    # Trim leading/trailing separators; ensure non-empty
-    safe = safe.strip("._-") or "claim"
-    return safe
+CHUNK_SIZE = 1024 * 1024
+# Size limits in MB (0 disables): per uploaded file, and per claim across its files
+MAX_FILE_BYTES = int(float(os.getenv("CLAIMWISE_MAX_UPLOAD_MB", "25")) * 1024 * 1024)
+MAX_CLAIM_BYTES = int(float(os.getenv("CLAIMWISE_MAX_CLAIM_UPLOAD_MB", "100")) * 1024 * 1024)
+
+
+class UploadTooLarge(ValueError):
+    """An upload went over the per-file or per-claim size limit."""
+
+
+class UploadBudget:
+    """Bytes still allowed for one claim's uploads, shared by its files.
+
+    Files of a claim may be streamed concurrently, so bytes are taken from
+    the budget chunk by chunk under a lock.
+    """
+
+    def __init__(self, max_bytes: int = MAX_CLAIM_BYTES):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def _error(self, name: str) -> UploadTooLarge:
+        return UploadTooLarge(f"{name}: claim uploads exceed the {self.max_bytes / (1024 * 1024):g} MB per-claim limit")
+
+    def check(self, name: str, size: int) -> None:
+        """Raise if size more bytes would not fit (nothing is taken)."""
+        if self.max_bytes and self.used + size > self.max_bytes:
+            raise self._error(name)
+
+    def take(self, name: str, size: int) -> None:
+        with self._lock:
+            if self.max_bytes and self.used + size > self.max_bytes:
+                raise self._error(name)
+            self.used += size
+
+    def release(self, size: int) -> None:
+        with self._lock:
+            self.used -= size
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    url: str
+    sha256: str
+    size: int
+    data: Optional[bytes] = None
+
+
+def _check_size(name: str, size: int) -> None:
+    if MAX_FILE_BYTES and size > MAX_FILE_BYTES:
+        raise UploadTooLarge(f"{name}: file exceeds the {MAX_FILE_BYTES / (1024 * 1024):g} MB per-file limit")
+
+
+def _stream_to_disk(
+    src: BinaryIO, file_path: str, name: str, budget: Optional[UploadBudget], keep_data: bool
+) -> Tuple[Optional[bytes], str, int]:
+    """Copy src to file_path in chunks, hashing and size-checking each chunk.
+
+    Runs on a worker thread. The partial file is removed if a limit is hit
+    or the copy fails. Returns (content if keep_data, sha256 hex, size).
+    """
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    try:
+        if src.seekable():
+            src.seek(0)
+        with open(file_path, "wb") as out:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                _check_size(name, size + len(chunk))
+                if budget is not None:
+                    budget.take(name, len(chunk))
+                size += len(chunk)
+                digest.update(chunk)
+                out.write(chunk)
+                if keep_data:
+                    chunks.append(chunk)
+    except BaseException:
+        if budget is not None:
+            budget.release(size)
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+        raise
+    return (b"".join(chunks) if keep_data else None), digest.hexdigest(), size
+
+
+def store_stream(
+    src: BinaryIO,
+    original_name: str,
+    claim_number: str,
+    budget: Optional[UploadBudget] = None,
+    keep_data: bool = True,
+    doc_type: str = "",
+) -> StoredUpload:
+    """Blocking core of store_upload for any readable binary stream.
+
+    The stream is written to a temp file, then moved into the content-
+    addressed object store (document_store) under its SHA-256 and recorded
+    as claim_number's doc_type document. Also used directly (on a worker
+    thread) for bulk intake, where documents come from archive members or
+    manifest paths rather than multipart uploads.
+    """
+    tmp_path = document_store.incoming_file()
+    data, sha256, size = _stream_to_disk(src, tmp_path, original_name or claim_number, budget, keep_data)
+    try:
+        file_path, url = document_store.commit(tmp_path, sha256, size, original_name, claim_number, doc_type)
+    except BaseException:
+        if budget is not None:
+            budget.release(size)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return StoredUpload(path=file_path, url=url, sha256=sha256, size=size, data=data)
+
+
+async def store_upload(
+    file: UploadFile,
+    claim_number: str,
+    budget: Optional[UploadBudget] = None,
+    keep_data: bool = True,
+    doc_type: str = "",
+) -> StoredUpload:
+    """Stream an upload into the document store off the event loop.
+
+    The content is hashed (SHA-256, as used by the extraction cache) and
+    checked against the per-file and per-claim limits in the same pass;
+    UploadTooLarge is raised as soon as a limit is crossed. With keep_data
+    the bytes are also returned, so analysis can run from memory.
+    """
+    name = file.filename or claim_number
+    # Reject early when the client declared the size
+    if file.size is not None:
+        _check_size(name, file.size)
+        if budget is not None:
+            budget.check(name, file.size)
+    return await asyncio.to_thread(
+        store_stream, file.file, file.filename or "", claim_number, budget, keep_data, doc_type
+    )
 
 
 async def save_uploaded_file(file: UploadFile, claim_number: str):
-    """Save uploaded file using the claim number as the filename.
+    """Save an uploaded file as a document of claim_number.
 
-    The original file extension is preserved. If a file with the same
-    name already exists, a numeric suffix is appended (e.g., CLM123-1.pdf).
-    Returns the absolute file_path and the public URL.
+    Returns the file_path and the public URL.
     """
+    stored = await store_upload(file, claim_number, keep_data=False)
+    return stored.path, stored.url
+
+
+def _read_limited(src: BinaryIO, name: str) -> bytes:
+    src.seek(0)
+    chunks = []
+    size = 0
+    while True:
+        chunk = src.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        _check_size(name, size)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
 
-    # Derive extension from original filename (includes leading dot if present)
-    original_name = file.filename or ""
-    _, dot, ext = original_name.rpartition(".")
-    extension = f".{ext}" if dot else ""
-
-    base = _sanitize_name(claim_number)
-    # Treat Swagger's default 'string' like 'claim'
-    m = re.fullmatch(r"(?i)string(?:[\s._-]?(\d+))?", base)
-    if m:
-        digits = m.group(1)
-        base = f"claim{digits}" if digits else "claim"
-    # If the provided value is just digits (e.g., "1"), prefix with 'claim'
-    elif re.fullmatch(r"\d+", base):
-        base = f"claim{base}"
-    filename = f"{base}{extension}"
-    file_path = os.path.join(UPLOAD_FOLDER, filename)
-
-    # Avoid overwriting: add incremental suffix if needed
-    if os.path.exists(file_path):
-        counter = 1
-        while True:
-            candidate = f"{base}-{counter}{extension}"
-            candidate_path = os.path.join(UPLOAD_FOLDER, candidate)
-            if not os.path.exists(candidate_path):
-                filename = candidate
-                file_path = candidate_path
-                break
-            counter += 1
-
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    return file_path, f"/files/{filename}"
+async def read_upload(file: UploadFile) -> bytes:
+    """Read an upload into memory (not stored) under the per-file limit."""
+    name = file.filename or "upload"
+    if file.size is not None:
+        _check_size(name, file.size)
+    return await asyncio.to_thread(_read_limited, file.file, name)
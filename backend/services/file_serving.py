@@ -0,0 +1,125 @@
+"""
+HTTP responses for claim documents: /files (uploads) and /upload/auto/file.
+
+Reviewers re-open the same PDFs while paging through claims, so documents
+are served with a strong ETag equal to the SHA-256 of their content and
+answered with 304 when the client already has them:
+
+  - uploads/objects/… (document_store) are immutable, their digest is in
+    the file name and they are sent with Cache-Control: immutable, so
+    browsers do not even revalidate;
+  - other files (uploads from before the object store, dataset samples) are
+    hashed once per (path, mtime, size) and sent with no-cache, so every
+    view is a cheap conditional request.
+
+Range / If-Range requests (partial reads of large scanned PDFs) and
+zero-copy transfer via the ASGI pathsend extension, where the server
+supports it, come from Starlette's FileResponse. Without pathsend, files are
+streamed in STREAM_CHUNK_SIZE pieces instead of Starlette's 64 KiB default.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import stat
+import threading
+from collections import OrderedDict
+from email.utils import parsedate
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from .extraction_cache import digest_file
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+_OBJECT_RE = re.compile(r"(?:^|/)objects/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(?:\.[a-z0-9]{1,8})?$")
+_DIGEST_CACHE_SIZE = 4096
+
+_lock = threading.Lock()
+_digests: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+
+
+def content_digest(path: str, stat_result: os.stat_result) -> str:
+    """SHA-256 of a file, remembered until its mtime or size changes."""
+    match = _OBJECT_RE.search(path.replace(os.sep, "/"))
+    if match:
+        return match.group(1)
+    with _lock:
+        cached = _digests.get(path)
+        if cached and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+            _digests.move_to_end(path)
+            return cached[2]
+    digest = digest_file(path)
+    with _lock:
+        _digests[path] = (stat_result.st_mtime_ns, stat_result.st_size, digest)
+        while len(_digests) > _DIGEST_CACHE_SIZE:
+            _digests.popitem(last=False)
+    return digest
+
+
+def _not_modified(response_headers: Headers, request_headers: Headers) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or response_headers["etag"] in tags
+    # If-Modified-Since only counts when there is no If-None-Match
+    if_modified_since = parsedate(request_headers.get("if-modified-since") or "")
+    last_modified = parsedate(response_headers.get("last-modified") or "")
+    return if_modified_since is not None and last_modified is not None and if_modified_since >= last_modified
+
+
+def document_response(
+    path: str,
+    request_headers: Headers,
+    stat_result: Optional[os.stat_result] = None,
+    status_code: int = 200,
+    media_type: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> Response:
+    """FileResponse with a content-hash ETag, caching headers and 304 handling."""
+    stat_result = stat_result or os.stat(path)
+    immutable = _OBJECT_RE.search(path.replace(os.sep, "/")) is not None
+    headers = {
+        "etag": f'"{content_digest(path, stat_result)}"',
+        "cache-control": IMMUTABLE if immutable else REVALIDATE,
+    }
+    response = FileResponse(
+        path,
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+        filename=filename,
+        stat_result=stat_result,
+    )
+    if _not_modified(response.headers, request_headers):
+        return NotModifiedResponse(response.headers)
+    response.chunk_size = STREAM_CHUNK_SIZE
+    return response
+
+
+class DocumentFiles(StaticFiles):
+    """StaticFiles for uploads/ with document_response's ETags and caching.
+
+    Hashing a file that is not in the object store reads all of it, so the
+    response is built on a worker thread rather than the event loop.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            try:
+                full_path, stat_result = await asyncio.to_thread(self.lookup_path, path)
+            except (OSError, ValueError):
+                # StaticFiles turns these into the right HTTP errors below
+                stat_result = None
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                return await asyncio.to_thread(
+                    document_response, str(full_path), Headers(scope=scope), stat_result
+                )
+        return await super().get_response(path, scope)
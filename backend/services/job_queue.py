@@ -0,0 +1,226 @@
+"""
+Background claim-processing jobs.
+
+POST /upload/?mode=async stores a claim's files, queues the rest of the
+pipeline (analysis, scoring, routing, persistence) here and returns 202 with
+a job id. A fixed number of worker tasks on the event loop take jobs from a
+bounded queue; the CPU-heavy steps inside a job still run on analysis_pool
+and ocr_pool. Each job records the stages it has been through, so clients
+can poll GET /jobs/{id} or follow GET /jobs/{id}/events.
+
+Jobs live in memory only: the last CLAIMWISE_JOB_HISTORY finished jobs are
+kept for status queries and a restart forgets them (processed claims are in
+claim_store).
+
+Config (env):
+  CLAIMWISE_JOB_WORKERS     jobs processed at once (default 2)
+  CLAIMWISE_JOB_QUEUE_SIZE  queued jobs before new ones are refused (default 100)
+  CLAIMWISE_JOB_HISTORY     finished jobs kept for status queries (default 1000)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+WORKERS = max(1, int(os.getenv("CLAIMWISE_JOB_WORKERS", "2")))
+QUEUE_SIZE = max(1, int(os.getenv("CLAIMWISE_JOB_QUEUE_SIZE", "100")))
+HISTORY = max(1, int(os.getenv("CLAIMWISE_JOB_HISTORY", "1000")))
+
+TERMINAL = ("done", "failed")
+
+
+class QueueFull(RuntimeError):
+    """The job queue is at CLAIMWISE_JOB_QUEUE_SIZE."""
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class Job:
+    """One queued unit of work and its stage-by-stage progress."""
+
+    def __init__(self, kind: str, run: Callable[["Job"], Awaitable[Any]], info: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.info = info or {}
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress: Dict[str, Any] = {}
+        self.stages: List[Dict[str, Any]] = [{"stage": "queued", "at": _now()}]
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = _now()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.version = 0
+        self._run = run
+        self._queued_mono = time.monotonic()
+        self._started_mono: Optional[float] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        self.version += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def advance(self, stage: str, **progress: Any) -> None:
+        """Record progress; a new stage name is appended to the stage history."""
+        if stage != self.stage:
+            self.stage = stage
+            self.stages.append({"stage": stage, "at": _now()})
+            self.progress = {}
+        self.progress.update(progress)
+        self._notify()
+
+    async def wait_for_change(self, version: int, timeout: float) -> bool:
+        """Wait until the job changes past version; False on timeout."""
+        if self.version != version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "stages": self.stages,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            **self.info,
+        }
+        if self.status == "queued":
+            out["queue_position"] = _queue_position(self)
+        if self.status == "done":
+            out["result"] = self.result
+        if self.error is not None:
+            out["error"] = self.error
+        return out
+
+
+_jobs: "OrderedDict[str, Job]" = OrderedDict()
+_queue: Optional[asyncio.Queue] = None
+_pending: List[Job] = []  # queued jobs in order, for queue_position
+_workers: List[asyncio.Task] = []
+_started_mono: Optional[float] = None
+_busy = 0
+_stats: Dict[str, float] = {"completed": 0, "failed": 0, "busy_seconds": 0.0, "wait_seconds": 0.0}
+
+
+def _queue_position(job: Job) -> Optional[int]:
+    try:
+        return _pending.index(job) + 1
+    except ValueError:
+        return None
+
+
+def _forget_old() -> None:
+    finished = [job_id for job_id, job in _jobs.items() if job.status in TERMINAL]
+    for job_id in finished[: max(0, len(finished) - HISTORY)]:
+        del _jobs[job_id]
+
+
+async def _worker(n: int) -> None:
+    global _busy
+    assert _queue is not None
+    while True:
+        job: Job = await _queue.get()
+        _pending.remove(job)
+        _busy += 1
+        job._started_mono = time.monotonic()
+        _stats["wait_seconds"] += job._started_mono - job._queued_mono
+        job.status = "running"
+        job.started_at = _now()
+        job.advance("started")
+        try:
+            job.result = await job._run(job)
+            job.status = "done"
+            _stats["completed"] += 1
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(getattr(e, "detail", None) or e)
+            _stats["failed"] += 1
+            logger.error(f"Job {job.id} ({job.kind}) failed: {job.error}", exc_info=True)
+        finally:
+            _busy -= 1
+            _stats["busy_seconds"] += time.monotonic() - job._started_mono
+            job.finished_at = _now()
+            job.advance(job.status)
+            _forget_old()
+            _queue.task_done()
+
+
+def start() -> None:
+    """Start the worker tasks on the running event loop (idempotent)."""
+    global _queue, _started_mono
+    if _workers:
+        return
+    _queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    _started_mono = time.monotonic()
+    _workers.extend(asyncio.get_running_loop().create_task(_worker(n)) for n in range(WORKERS))
+    logger.info(f"Started {WORKERS} job workers (queue size {QUEUE_SIZE})")
+
+
+async def stop() -> None:
+    """Cancel the worker tasks (called on application shutdown)."""
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+def is_full() -> bool:
+    return _queue is not None and _queue.full()
+
+
+def submit(kind: str, run: Callable[[Job], Awaitable[Any]], info: Optional[Dict[str, Any]] = None) -> Job:
+    """Queue run(job) and return the job; raises QueueFull if the queue is full."""
+    start()
+    assert _queue is not None
+    job = Job(kind, run, info)
+    try:
+        _queue.put_nowait(job)
+    except asyncio.QueueFull:
+        raise QueueFull(f"Job queue is full ({QUEUE_SIZE} jobs waiting)")
+    _pending.append(job)
+    _jobs[job.id] = job
+    return job
+
+
+def get(job_id: str) -> Optional[Job]:
+    return _jobs.get(job_id)
+
+
+def stats() -> Dict[str, Any]:
+    """Queue depth, worker utilization and job counters."""
+    now = time.monotonic()
+    running = [job for job in _jobs.values() if job.status == "running" and job._started_mono is not None]
+    busy_seconds = _stats["busy_seconds"] + sum(now - job._started_mono for job in running)
+    uptime = (now - _started_mono) if _started_mono is not None else 0.0
+    started = _stats["completed"] + _stats["failed"] + len(running)
+    return {
+        "workers": WORKERS,
+        "busy_workers": _busy,
+        "queue_depth": len(_pending),
+        "queue_capacity": QUEUE_SIZE,
+        "utilization": round(busy_seconds / (WORKERS * uptime), 3) if uptime > 0 else 0.0,
+        "completed": int(_stats["completed"]),
+        "failed": int(_stats["failed"]),
+        "mean_wait_seconds": round(_stats["wait_seconds"] / started, 3) if started else 0.0,
+        "tracked_jobs": len(_jobs),
+    }
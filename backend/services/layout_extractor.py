@@ -0,0 +1,138 @@
+"""
+Layout-aware key/value extraction for templated PDFs.
+
+Our ACORD, loss, FIR, RC, DL and hospital documents are generated from
+fixed templates: one "Label: value" pair per text line at fixed positions.
+While the text layer is read, each line's words (page.get_text("words"))
+are split at the first word ending in ":" into a label and a value span.
+
+The sequence of labels and their positions is the layout fingerprint. The
+first document with a given (insurance type, document type, fingerprint) has
+its labels matched against field_specs once, giving an extraction plan of
+field -> line index. Every later document with that fingerprint is
+extracted by indexing straight into its value list, with no label
+scanning. The value pattern is then applied to the short value span.
+Pairing by position also stops labels inside titles or other labels
+("Registration Certificate", "Hospital Code:") from being read as values.
+
+Fields a plan cannot place (unknown layouts, OCR-only pages, labels the
+template lacks) are filled by the regex path in field_specs.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .field_specs import CompiledSpec
+
+PLAN_CACHE_SIZE = 512
+# Label positions are compared on this grid (points) so sub-point
+# rendering differences don't split a template into several layouts
+_GRID = 4.0
+
+_lock = threading.Lock()
+_plans: "OrderedDict[Tuple[str, str, str], Dict[str, int]]" = OrderedDict()
+_stats: Dict[str, int] = {"plan_hits": 0, "plans_built": 0}
+
+
+def page_lines(page, page_num: int) -> List[Tuple[str, str, str]]:
+    """Return (label, value, position key) for each "Label: value" line of a page."""
+    lines: "OrderedDict[Tuple[int, int], List[Tuple[float, float, str]]]" = OrderedDict()
+    for x0, y0, _x1, _y1, word, block_no, line_no, _word_no in page.get_text("words", sort=False):
+        lines.setdefault((block_no, line_no), []).append((x0, y0, word))
+
+    out: List[Tuple[str, str, str]] = []
+    for words in lines.values():
+        for i, (_, _, word) in enumerate(words):
+            if word.endswith(":"):
+                label = " ".join(w for _, _, w in words[: i + 1])[:-1].strip()
+                value = " ".join(w for _, _, w in words[i + 1:])
+                x0, y0 = words[0][0], words[0][1]
+                out.append((label, value, f"{page_num}:{round(x0 / _GRID)}:{round(y0 / _GRID)}"))
+                break
+    return out
+
+
+def build_layout(lines: List[Tuple[str, str, str]]) -> Optional[Dict[str, Any]]:
+    """Summarise extracted label lines as a JSON-safe layout record."""
+    if not lines:
+        return None
+    h = hashlib.sha1()
+    for label, _, pos in lines:
+        h.update(f"{label.lower()}@{pos}\n".encode("utf-8"))
+    return {
+        "fingerprint": h.hexdigest(),
+        "labels": [label for label, _, _ in lines],
+        "values": [value for _, value, _ in lines],
+    }
+
+
+def _build_plan(spec: CompiledSpec, labels: List[str]) -> Dict[str, int]:
+    """Map each field to the first line whose label is one of the field's labels.
+
+    Mirrors the regex path, which takes the earliest label occurrence whose
+    value pattern matches; the value check happens at lookup time.
+    """
+    lowered = [label.lower() for label in labels]
+    plan: Dict[str, int] = {}
+    for cf in spec.fields:
+        for idx, label in enumerate(lowered):
+            if label in cf.labels:
+                plan[cf.field.name] = idx
+                break
+    return plan
+
+
+def _plan_for(key: Tuple[str, str, str], spec: CompiledSpec, labels: List[str]) -> Dict[str, int]:
+    with _lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+            _stats["plan_hits"] += 1
+            return plan
+    plan = _build_plan(spec, labels)
+    with _lock:
+        _plans[key] = plan
+        _stats["plans_built"] += 1
+        while len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
+
+
+def scan(
+    spec: CompiledSpec, layout: Optional[Dict[str, Any]], text: str, insurance_type: str, document_type: str
+) -> Dict[str, Optional[str]]:
+    """Raw field values for a document, from its layout plan where possible.
+
+    Same contract as CompiledSpec.scan: {field name: stripped string or None}.
+    """
+    if not layout:
+        return spec.scan(text)
+    values: List[str] = layout["values"]
+    plan = _plan_for((insurance_type, document_type, layout["fingerprint"]), spec, layout["labels"])
+
+    out: Dict[str, Optional[str]] = {}
+    regex_values: Optional[Dict[str, Optional[str]]] = None
+    for cf in spec.fields:
+        value = None
+        idx = plan.get(cf.field.name)
+        if idx is not None:
+            # search, not match: money spans start with a currency glyph
+            m = cf.value_re.search(values[idx])
+            if m:
+                value = m.group(1).strip() or None
+        if value is None:
+            # Not placed by the plan (or the span didn't fit the pattern):
+            # defer to the full regex path for this field
+            if regex_values is None:
+                regex_values = spec.scan(text)
+            value = regex_values[cf.field.name]
+        out[cf.field.name] = value
+    return out
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return {**_stats, "plans": len(_plans)}
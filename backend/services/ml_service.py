@@ -4,6 +4,8 @@ Integrates with fraud_detection_system models
 """
 import os
 import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, Optional, Tuple, Any
 import logging
@@ -29,6 +31,8 @@ except ImportError as e:
     logger.warning(f"ML dependencies not available: {e}")
     HAS_ML_DEPS = False
 
+import keyword_engine  # noqa: E402  (dependency-free, shared with ocr_service)
+
 MODELS_DIR = ML_FRAUD_DIR / "models"
 
 
@@ -58,20 +62,58 @@ def load_ml_models():
     return models
 
 
+CATEGORY_HEALTH_WORDS = keyword_engine.register(
+    "ml.category_health", ["hospital", "diagnosis", "medical", "treatment", "admission", "patient"]
+)
+CATEGORY_VEHICLE_WORDS = keyword_engine.register(
+    "ml.category_vehicle", ["accident", "vehicle", "registration", "rc", "dl", "police", "rear collision"]
+)
+
+
 def detect_category(text: Optional[str]) -> str:
     """Detect claim category (accident/health) from text"""
     if not text:
         return "accident"  # default
     
-    t = text.lower()
-    health_score = sum(1 for word in ["hospital", "diagnosis", "medical", "treatment", "admission", "patient"] if word in t)
-    vehicle_score = sum(1 for word in ["accident", "vehicle", "registration", "rc", "dl", "police", "rear collision"] if word in t)
+    hits = keyword_engine.scan(text)
+    health_score = hits.hit_count("ml.category_health")
+    vehicle_score = hits.hit_count("ml.category_vehicle")
     
     if health_score > vehicle_score:
         return "health"
     return "accident"
 
 
+_FIELDS_CACHE_SIZE = 256
+_fields_cache: "OrderedDict[Tuple[str, str, int], Dict[str, Any]]" = OrderedDict()
+_fields_lock = threading.Lock()
+
+
+def preprocess_fields(text: str, doc_kind: str, digest: Optional[str] = None) -> Dict[str, Any]:
+    """preprocess.extract_fields_from_text, memoised per document content.
+
+    When the text's content digest is known (analysis text_summary.sha256),
+    re-scoring the same document reuses the fields parsed the first time.
+    The key includes the text length: document_text may hand over only the
+    preview or a partial OCR, and fields parsed from those must not stand in
+    for the full text once it is available.
+    """
+    if not digest:
+        return extract_fields_from_text(text, doc_kind)
+    key = (digest, doc_kind, len(text or ""))
+    with _fields_lock:
+        fields = _fields_cache.get(key)
+        if fields is not None:
+            _fields_cache.move_to_end(key)
+            return dict(fields)
+    fields = extract_fields_from_text(text, doc_kind)
+    with _fields_lock:
+        _fields_cache[key] = fields
+        while len(_fields_cache) > _FIELDS_CACHE_SIZE:
+            _fields_cache.popitem(last=False)
+    return dict(fields)
+
+
 def extract_documents_from_analysis(analysis: Dict) -> Dict[str, Optional[Dict]]:
     """Extract document data from OCR analysis result"""
     extraction = analysis.get("extraction", {})
@@ -150,77 +192,31 @@ def score_claim_multi_file(
         rc_entities = rc_analysis.get("extraction", {}) if rc_analysis else {}
         dl_entities = dl_analysis.get("extraction", {}) if dl_analysis else {}
         
-        # Get full text from analyses (try to get more text, not just preview)
-        # The preview is limited to 500 chars, but we need more for severity keyword analysis
-        acord_full_text = ""
-        loss_full_text = ""
-        hospital_full_text = ""
-        fir_full_text = ""
-        
-        # Try to get full text from file if available, otherwise use preview
-        if acord_analysis:
-            acord_path = file_paths.get("acord") if file_paths else None
-            if acord_path:
-                try:
-                    from .ocr_service import extract_text
-                    acord_full_text, _ = extract_text(acord_path)
-                except Exception as e:
-                    logger.warning(f"Failed to extract full text from acord: {e}")
-                    acord_full_text = acord_analysis.get("text_summary", {}).get("preview", "")
-            else:
-                acord_full_text = acord_analysis.get("text_summary", {}).get("preview", "")
-        
-        if loss_analysis:
-            loss_path = file_paths.get("loss") if file_paths else None
-            if loss_path:
-                try:
-                    from .ocr_service import extract_text
-                    loss_full_text, _ = extract_text(loss_path)
-                except Exception as e:
-                    logger.warning(f"Failed to extract full text from loss: {e}")
-                    loss_full_text = loss_analysis.get("text_summary", {}).get("preview", "")
-            else:
-                loss_full_text = loss_analysis.get("text_summary", {}).get("preview", "")
-        
-        if hospital_analysis and claim_type == "medical":
-            hospital_path = file_paths.get("hospital") if file_paths else None
-            if hospital_path:
-                try:
-                    from .ocr_service import extract_text
-                    hospital_full_text, _ = extract_text(hospital_path)
-                except Exception as e:
-                    logger.warning(f"Failed to extract full text from hospital: {e}")
-                    hospital_full_text = hospital_analysis.get("text_summary", {}).get("preview", "")
-            else:
-                hospital_full_text = hospital_analysis.get("text_summary", {}).get("preview", "")
-        
-        if fir_analysis and claim_type == "accident":
-            fir_path = file_paths.get("fir") if file_paths else None
-            if fir_path:
-                try:
-                    from .ocr_service import extract_text
-                    fir_full_text, _ = extract_text(fir_path)
-                except Exception as e:
-                    logger.warning(f"Failed to extract full text from fir: {e}")
-                    fir_full_text = fir_analysis.get("text_summary", {}).get("preview", "")
-            else:
-                fir_full_text = fir_analysis.get("text_summary", {}).get("preview", "")
-        
-        # Extract entities with text for severity keyword analysis
-        # Use the full text for better severity detection
-        import sys
-        from pathlib import Path
-        ML_PREPROCESS_DIR = Path(__file__).parent.parent.parent / "ml" / "fraud_detection_system"
-        if str(ML_PREPROCESS_DIR) not in sys.path:
-            sys.path.insert(0, str(ML_PREPROCESS_DIR))
-        
-        from preprocess import extract_fields_from_text
-        
-        # Re-extract with full text to get severity keywords
-        acord_dict_extracted = extract_fields_from_text(acord_full_text, "acord") if acord_full_text else {}
-        loss_dict_extracted = extract_fields_from_text(loss_full_text, "loss") if loss_full_text else {}
-        hospital_dict_extracted = extract_fields_from_text(hospital_full_text, "hospital") if hospital_full_text else {}
-        fir_dict_extracted = extract_fields_from_text(fir_full_text, "police") if fir_full_text else {}
+        # Full text was extracted once during analysis; read it back from
+        # the analysis' text reference instead of re-opening the files.
+        from .ocr_service import document_text
+
+        def full_text(analysis: Optional[Dict], key: str) -> str:
+            if not analysis:
+                return ""
+            return document_text(analysis, file_paths.get(key) if file_paths else None)
+
+        def fields_from_text(analysis: Optional[Dict], text: str, doc_kind: str) -> Dict[str, Any]:
+            if not text:
+                return {}
+            digest = ((analysis or {}).get("text_summary") or {}).get("sha256")
+            return preprocess_fields(text, doc_kind, digest)
+
+        acord_full_text = full_text(acord_analysis, "acord")
+        loss_full_text = full_text(loss_analysis, "loss")
+        hospital_full_text = full_text(hospital_analysis, "hospital") if claim_type == "medical" else ""
+        fir_full_text = full_text(fir_analysis, "fir") if claim_type == "accident" else ""
+
+        # Extract entities with full text for severity keyword analysis
+        acord_dict_extracted = fields_from_text(acord_analysis, acord_full_text, "acord")
+        loss_dict_extracted = fields_from_text(loss_analysis, loss_full_text, "loss")
+        hospital_dict_extracted = fields_from_text(hospital_analysis, hospital_full_text, "hospital")
+        fir_dict_extracted = fields_from_text(fir_analysis, fir_full_text, "police")
         
         # Merge extracted fields with OCR entities (extracted fields take precedence for severity)
         acord_dict = {**acord_entities, **acord_dict_extracted, "raw_text": acord_full_text} if acord_entities else {**acord_dict_extracted, "raw_text": acord_full_text}
@@ -0,0 +1,135 @@
+"""
+Bounded process pool for page-level OCR.
+
+Scanned PDFs are rendered page by page (8-bit grayscale) in the request
+process and the rendered pixmaps are OCRed in parallel worker processes. Workers are
+long-lived: with tesserocr installed each one keeps a resident Tesseract
+engine (see tesseract_engine) and takes pages off the pool's call queue. Results are returned
+in page order. Each worker caps Tesseract's OpenMP threads so that
+workers x threads never exceeds the available cores.
+
+Config (env):
+  CLAIMWISE_OCR_WORKERS       number of worker processes (default: cores, max 4;
+                              0 or 1 disables the pool and OCRs inline)
+  CLAIMWISE_OCR_OMP_THREADS   OMP_THREAD_LIMIT per worker (default: cores // workers)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_CPU_COUNT = os.cpu_count() or 1
+
+WORKERS = int(os.getenv("CLAIMWISE_OCR_WORKERS", str(min(_CPU_COUNT, 4))))
+OMP_THREADS = int(os.getenv("CLAIMWISE_OCR_OMP_THREADS", str(max(1, _CPU_COUNT // max(WORKERS, 1)))))
+
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _init_worker(omp_threads: int) -> None:
+    # pytesseract spawns tesseract as a child, which inherits this env;
+    # libtesseract (tesserocr) reads it when the engine is created below
+    os.environ["OMP_THREAD_LIMIT"] = str(omp_threads)
+    from services import tesseract_engine
+
+    # Load traineddata once for the worker's lifetime instead of per page
+    if tesseract_engine.warm_up():
+        logger.debug("OCR worker using resident tesserocr engine")
+
+
+def gray_image(samples, width: int, height: int, stride: int):
+    """Wrap 8-bit grayscale samples as a PIL image without copying them."""
+    from PIL import Image  # type: ignore
+
+    return Image.frombuffer("L", (width, height), samples, "raw", "L", stride, 1)
+
+
+def _ocr_gray(
+    samples: bytes, width: int, height: int, stride: int, angle: int, psm: int, lang: str, timeout: Optional[float]
+) -> Dict[str, object]:
+    """Worker entry point: OCR a rendered grayscale page."""
+    from services.ocr_service import _ocr_page
+
+    with gray_image(samples, width, height, stride) as img:
+        return _ocr_page(img, angle, psm=psm, lang=lang, timeout=timeout)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if WORKERS <= 1:
+        return None
+    with _lock:
+        if _pool is None:
+            logger.info(f"Starting OCR pool: {WORKERS} workers, OMP_THREAD_LIMIT={OMP_THREADS}")
+            _pool = ProcessPoolExecutor(
+                max_workers=WORKERS,
+                initializer=_init_worker,
+                initargs=(OMP_THREADS,),
+            )
+        return _pool
+
+
+def submit(pix, angle: int = 0, psm: int = 3, lang: str = "eng", timeout: Optional[float] = None) -> Future:
+    """Queue one rendered page (a grayscale PyMuPDF Pixmap) for OCR at a known
+    document orientation.
+
+    Inline OCR reads the pixmap's samples in place; workers get a single
+    bytes copy of the samples (needed to cross the process boundary), with
+    no PNG encode/decode on either side. Runs inline when the pool is disabled.
+
+    timeout (seconds) is enforced inside Tesseract, so a runaway page frees
+    its worker instead of occupying it until the pool shuts down.
+    """
+    pool = _get_pool()
+    if pool is not None:
+        try:
+            return pool.submit(_ocr_gray, pix.samples, pix.width, pix.height, pix.stride, angle, psm, lang, timeout)
+        except RuntimeError as e:
+            # Pool shut down or broken; degrade to inline OCR
+            logger.warning(f"OCR pool unavailable, running inline: {e}")
+    fut: Future = Future()
+    try:
+        fut.set_result(_ocr_gray(pix.samples_mv, pix.width, pix.height, pix.stride, angle, psm, lang, timeout))
+    except Exception as e:
+        fut.set_exception(e)
+    return fut
+
+
+def gather(
+    futures: List[Future], deadline: Optional[float] = None
+) -> List[Tuple[Dict[str, object], Optional[BaseException]]]:
+    """Wait for page futures and return (page result, error) pairs in page order.
+
+    deadline is a time.monotonic() value. Pages not done by then come back
+    with a TimeoutError and are cancelled if they have not started yet;
+    running pages stop on their own per-page timeout.
+    """
+    results: List[Tuple[Dict[str, object], Optional[BaseException]]] = []
+    for fut in futures:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            results.append((fut.result(timeout=remaining) or {}, None))
+        except Exception as e:
+            # A page's own OcrTimeout is also a TimeoutError; only a future
+            # that is still pending means the document deadline passed.
+            if not fut.done():
+                fut.cancel()
+                e = TimeoutError("document OCR budget exhausted")
+            results.append(({}, e))
+    return results
+
+
+def shutdown() -> None:
+    """Stop worker processes (called on application shutdown)."""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
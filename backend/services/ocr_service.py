@@ -1,14 +1,143 @@
 import os
+import sys
 import shutil
 import io
-from typing import Dict, Optional, Tuple, List
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple, List
 import re
 import logging
+import time
+from contextlib import contextmanager
+
+from . import extraction_cache, field_specs, layout_extractor, ocr_pool, schema_registry, tesseract_engine
+
+# The shared keyword engine lives with the ML fraud system (see ml_service)
+ML_FRAUD_DIR = Path(__file__).resolve().parent.parent.parent / "ml" / "fraud_detection_system"
+if str(ML_FRAUD_DIR) not in sys.path:
+    sys.path.insert(0, str(ML_FRAUD_DIR))
+
+import image_preprocess  # noqa: E402
+import keyword_engine  # noqa: E402
+
+from .tesseract_engine import OcrTimeout  # noqa: E402
 
 # Optional deps: keep imports lazy and guarded
 
 logger = logging.getLogger(__name__)
 
+# Orientation is detected once per document on a probe no larger than this
+OSD_PROBE_MAX_SIDE = 1000
+# Pages whose mean word confidence falls below this get their own OSD pass
+OCR_LOW_CONFIDENCE = float(os.getenv("CLAIMWISE_OCR_LOW_CONFIDENCE", "60"))
+# Pages with fewer text-layer characters per square inch than this are OCRed
+# (a short one-page claim form is around 4-5)
+TEXT_LAYER_MIN_DENSITY = float(os.getenv("CLAIMWISE_TEXT_LAYER_MIN_DENSITY", "1.0"))
+# Scanned pages are first rendered at OCR_BASE_DPI; pages whose mean word
+# confidence is below OCR_ESCALATE_CONFIDENCE are re-rendered at OCR_HIGH_DPI.
+# Both are capped so a single render never exceeds OCR_MAX_PIXELS.
+OCR_BASE_DPI = int(os.getenv("CLAIMWISE_OCR_BASE_DPI", "150"))
+OCR_HIGH_DPI = int(os.getenv("CLAIMWISE_OCR_HIGH_DPI", "300"))
+OCR_ESCALATE_CONFIDENCE = float(os.getenv("CLAIMWISE_OCR_ESCALATE_CONFIDENCE", "70"))
+OCR_MAX_PIXELS = int(os.getenv("CLAIMWISE_OCR_MAX_PIXELS", str(12_000_000)))
+# Optional NumPy cleanup (grayscale/downscale/binarize/crop/deskew) for
+# standalone images such as phone photos of DL/RC cards
+OCR_PREPROCESS = os.getenv("CLAIMWISE_OCR_PREPROCESS", "0") == "1"
+# Time budgets (seconds, 0 disables): a single page's OCR is cancelled after
+# OCR_PAGE_TIMEOUT; pages not finished within OCR_DOC_TIMEOUT of the
+# document's first OCR are returned as partial (meta["ocr_timeouts"]).
+OCR_PAGE_TIMEOUT = float(os.getenv("CLAIMWISE_OCR_PAGE_TIMEOUT", "30"))
+OCR_DOC_TIMEOUT = float(os.getenv("CLAIMWISE_OCR_DOC_TIMEOUT", "120"))
+# classify_document gives up after this many pages if the type is still unknown
+CLASSIFY_MAX_PAGES = int(os.getenv("CLAIMWISE_CLASSIFY_MAX_PAGES", "2"))
+# Memory bounds for very large documents: only the first MAX_DOC_PAGES pages
+# and MAX_DOC_CHARS characters are kept, at most OCR_MAX_INFLIGHT rendered
+# pages wait for OCR at once, and no new page is started once this process
+# is above MAX_RSS_MB (0 disables) - the rest is returned as partial.
+MAX_DOC_PAGES = int(os.getenv("CLAIMWISE_MAX_DOC_PAGES", "500"))
+MAX_DOC_CHARS = int(os.getenv("CLAIMWISE_MAX_DOC_CHARS", str(2_000_000)))
+OCR_MAX_INFLIGHT = max(1, int(os.getenv("CLAIMWISE_OCR_MAX_INFLIGHT", str(ocr_pool.WORKERS * 2))))
+MAX_RSS_MB = float(os.getenv("CLAIMWISE_MAX_RSS_MB", "0"))
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MB (peak if unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        return 0.0
+
+
+class _MemoryMeter:
+    """Tracks peak RSS while one document is processed, sampled per page."""
+
+    def __init__(self):
+        self.start = self.peak = _rss_mb()
+
+    def sample(self) -> float:
+        rss = _rss_mb()
+        self.peak = max(self.peak, rss)
+        return rss
+
+    def over_limit(self) -> bool:
+        """True if RSS is above MAX_RSS_MB even after MuPDF's caches are dropped."""
+        if MAX_RSS_MB <= 0 or self.sample() < MAX_RSS_MB:
+            return False
+        _release_render_cache()
+        return _rss_mb() >= MAX_RSS_MB
+
+    def as_meta(self) -> Dict[str, float]:
+        self.sample()
+        return {"start": round(self.start, 1), "peak": round(self.peak, 1)}
+
+
+class _TextSink:
+    """Joins page texts with newlines into one buffer, up to max_chars.
+
+    Pages are written as they are finished instead of being collected and
+    joined, so a large document's text is held once.
+    """
+
+    def __init__(self, max_chars: int):
+        self._buf = io.StringIO()
+        self.remaining = max_chars
+        self.empty = True
+        self.truncated = False
+
+    def write(self, chunk: str) -> bool:
+        """Append one page; returns False once the cap is reached."""
+        if self.truncated:
+            return False
+        if not self.empty:
+            chunk = "\n" + chunk
+        if len(chunk) > self.remaining:
+            chunk = chunk[: self.remaining]
+            self.truncated = True
+        self._buf.write(chunk)
+        self.remaining -= len(chunk)
+        self.empty = False
+        return not self.truncated
+
+    def getvalue(self) -> str:
+        return self._buf.getvalue()
+
+
+def _release_render_cache() -> None:
+    """Drop MuPDF's cache of decoded images and fonts (rebuilt on demand)."""
+    try:
+        import fitz  # PyMuPDF  # type: ignore
+
+        fitz.TOOLS.store_shrink(100)
+    except Exception:
+        pass
+
 
 def _is_pdf(path: str) -> bool:
     return os.path.splitext(path)[1].lower() == ".pdf"
@@ -43,58 +172,458 @@ def _auto_orient(img) -> object:
     return img
 
 
-def _detect_and_fix_rotation(img) -> object:
-    """
-    Use Tesseract OSD to detect rotation; rotate if angle is 90/180/270.
-    """
+def _osd_angle(img) -> int:
+    """Return the Tesseract OSD rotation (0/90/180/270) for an image; 0 on failure."""
+    try:
+        return tesseract_engine.osd_rotation(img)
+    except tesseract_engine.EngineUnavailable:
+        pass
+    except Exception:
+        return 0
     try:
         import pytesseract  # type: ignore
         _configure_tesseract_cmd()
         osd = pytesseract.image_to_osd(img)
-        angle = 0
         for line in osd.splitlines():
             if "Rotate:" in line:
                 try:
                     angle = int(line.split(":")[1].strip())
                 except Exception:
                     angle = 0
-                break
-        if angle and angle in (90, 180, 270):
-            return img.rotate(360 - angle, expand=True)
+                return angle if angle in (90, 180, 270) else 0
     except Exception:
-        # OSD might fail; ignore and return original
-        return img
+        # OSD might fail; treat as upright
+        pass
+    return 0
+
+
+def _rotate(img, angle: int) -> object:
+    if angle in (90, 180, 270):
+        return img.rotate(360 - angle, expand=True)
     return img
 
 
-def _ocr_image_pil(img, psm: int = 3, lang: str = "eng") -> str:
-    """Perform OCR on a PIL Image with preprocessing."""
+def _detect_and_fix_rotation(img) -> object:
+    """
+    Use Tesseract OSD to detect rotation; rotate if angle is 90/180/270.
+    """
+    return _rotate(img, _osd_angle(img))
+
+
+def _probe_orientation(img) -> Tuple[int, float]:
+    """Detect orientation once for a whole document on a downscaled probe.
+
+    Returns (angle, seconds spent on OSD).
+    """
+    start = time.perf_counter()
+    probe = _auto_orient(img).copy()
+    probe.thumbnail((OSD_PROBE_MAX_SIDE, OSD_PROBE_MAX_SIDE))
+    angle = _osd_angle(probe)
+    return angle, time.perf_counter() - start
+
+
+def _ocr_with_confidence(img, psm: int = 3, lang: str = "eng", timeout: Optional[float] = None) -> Tuple[str, float]:
+    """OCR an image and return (text, mean word confidence 0-100).
+
+    Prefers the resident tesserocr engine; otherwise uses image_to_data so
+    text and confidences come from a single Tesseract call, with words
+    regrouped into lines in reading order. Raises OcrTimeout if the call
+    runs past timeout seconds (the tesseract process/recognition is stopped).
+    """
+    try:
+        return tesseract_engine.ocr(img, psm=psm, lang=lang, timeout=timeout)
+    except tesseract_engine.EngineUnavailable:
+        pass
+    import pytesseract  # type: ignore
+    _configure_tesseract_cmd()
+    config = f"--psm {psm} --oem 3"
+    try:
+        data = pytesseract.image_to_data(
+            img, lang=lang, config=config, output_type=pytesseract.Output.DICT, timeout=timeout or 0
+        )
+    except RuntimeError as e:
+        # pytesseract kills tesseract and raises RuntimeError on timeout
+        if "timeout" in str(e).lower():
+            raise OcrTimeout(f"OCR exceeded {timeout:.1f}s") from e
+        raise
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    confs: List[float] = []
+    for i, word in enumerate(data.get("text", [])):
+        if not word or not word.strip():
+            continue
+        try:
+            conf = float(data["conf"][i])
+        except (TypeError, ValueError):
+            conf = -1.0
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append(word)
+        if conf >= 0:
+            confs.append(conf)
+    text = "\n".join(" ".join(words) for words in lines.values())
+    return text, (sum(confs) / len(confs) if confs else 0.0)
+
+
+def _ocr_page(
+    img, angle: int, psm: int = 3, lang: str = "eng", timeout: Optional[float] = None
+) -> Dict[str, object]:
+    """OCR one page of a multi-page document using the document's orientation.
+
+    OSD is only re-run for this page if OCR confidence comes back low, and
+    the re-oriented result is kept only if it scores better. Pages come
+    from PyMuPDF renders, which carry no EXIF, so no auto-orient copy.
+
+    timeout bounds the whole page: the first pass raises OcrTimeout when it
+    runs out; a re-orientation retry that runs out keeps the first result.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    text, conf = _ocr_with_confidence(_rotate(img, angle), psm, lang, timeout)
+    result: Dict[str, object] = {"text": text, "confidence": round(conf, 1), "angle": angle, "osd_rerun": False}
+    if conf < OCR_LOW_CONFIDENCE:
+        remaining = deadline - time.monotonic() if deadline else None
+        if remaining is not None and remaining <= 0:
+            return result
+        result["osd_rerun"] = True
+        page_angle = _osd_angle(img)
+        if page_angle != angle:
+            remaining = deadline - time.monotonic() if deadline else None
+            if remaining is not None and remaining <= 0:
+                return result
+            try:
+                text2, conf2 = _ocr_with_confidence(_rotate(img, page_angle), psm, lang, remaining)
+            except OcrTimeout:
+                return result
+            if conf2 > conf:
+                result.update(text=text2, confidence=round(conf2, 1), angle=page_angle)
+    return result
+
+
+def _ocr_image_pil(
+    img,
+    psm: int = 3,
+    lang: str = "eng",
+    timings: Optional[Dict[str, float]] = None,
+    image_meta: Optional[Dict[str, object]] = None,
+) -> str:
+    """Perform OCR on a PIL Image with preprocessing.
+
+    With CLAIMWISE_OCR_PREPROCESS=1 the image first goes through
+    image_preprocess; its per-step timings (ms) are added to timings and
+    the skew it corrected to image_meta["deskew_degrees"].
+    """
     try:
-        import pytesseract  # type: ignore
-        _configure_tesseract_cmd()
         img = _auto_orient(img)
+        if OCR_PREPROCESS:
+            img, steps = image_preprocess.preprocess(img)
+            if timings is not None:
+                timings.update(steps)
+            if image_meta is not None and "deskew_degrees" in img.info:
+                image_meta["deskew_degrees"] = img.info["deskew_degrees"]
         img = _detect_and_fix_rotation(img)
+        try:
+            return tesseract_engine.ocr(img, psm=psm, lang=lang, timeout=OCR_PAGE_TIMEOUT or None)[0]
+        except tesseract_engine.EngineUnavailable:
+            pass
+        import pytesseract  # type: ignore
+        _configure_tesseract_cmd()
         config = f"--psm {psm} --oem 3"
-        text = pytesseract.image_to_string(img, lang=lang, config=config)
+        try:
+            text = pytesseract.image_to_string(img, lang=lang, config=config, timeout=OCR_PAGE_TIMEOUT)
+        except RuntimeError as e:
+            if "timeout" in str(e).lower():
+                raise OcrTimeout(f"OCR exceeded {OCR_PAGE_TIMEOUT:.1f}s") from e
+            raise
         return text or ""
+    except OcrTimeout:
+        raise
     except Exception as e:
         logger.warning(f"OCR failed: {e}")
         return ""
 
 
-def extract_text(file_path: str) -> Tuple[str, Dict[str, str]]:
+def _classify_page(page) -> Tuple[str, str]:
+    """Classify a PDF page by the density of its text layer.
+
+    Returns (kind, text_layer) where kind is:
+      - "text":  enough digital text to use as-is
+      - "ocr":   sparse/no text layer but the page carries images (scanned)
+      - "empty": no text and nothing to OCR
+    """
+    page_text = page.get_text("text") or ""
+    chars = len("".join(page_text.split()))
+    area_sq_in = max(page.rect.width * page.rect.height / (72.0 * 72.0), 1.0)
+    if chars / area_sq_in >= TEXT_LAYER_MIN_DENSITY:
+        return "text", page_text
+    if page.get_images(full=False):
+        return "ocr", page_text
+    return ("text" if chars else "empty"), page_text
+
+
+def _page_dpi(page, target_dpi: int) -> int:
+    """Clamp a render DPI so the page's pixmap stays under OCR_MAX_PIXELS."""
+    area_sq_in = max(page.rect.width * page.rect.height / (72.0 * 72.0), 1e-6)
+    cap = int((OCR_MAX_PIXELS / area_sq_in) ** 0.5)
+    return max(72, min(target_dpi, cap))
+
+
+def _render_gray(page, dpi: int):
+    """Render a page straight to an 8-bit grayscale pixmap (no alpha)."""
+    import fitz  # PyMuPDF  # type: ignore
+
+    return page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+
+
+@contextmanager
+def _pixmap_image(pix):
+    """View a grayscale pixmap as a PIL image over its samples, without copying.
+
+    The image is closed on exit so the pixmap's buffer can be freed.
+    """
+    img = ocr_pool.gray_image(pix.samples_mv, pix.width, pix.height, pix.stride)
+    try:
+        yield img
+    finally:
+        img.close()
+
+
+def _page_ranges(page_nums: List[int]) -> str:
+    """Format 0-based page numbers as 1-based ranges, e.g. "2-5, 9"."""
+    ranges: List[List[int]] = []
+    for n in sorted(page_nums):
+        if ranges and n == ranges[-1][1] + 1:
+            ranges[-1][1] = n
+        else:
+            ranges.append([n, n])
+    return ", ".join(f"{a + 1}" if a == b else f"{a + 1}-{b + 1}" for a, b in ranges)
+
+
+def _ocr_pdf_pages(
+    doc,
+    page_nums: List[int],
+    warnings: List[str],
+    timed_out: Optional[List[int]] = None,
+    memory: Optional[_MemoryMeter] = None,
+    skipped: Optional[List[int]] = None,
+) -> Tuple[Dict[int, str], Dict[str, object], Dict[str, int]]:
+    """OCR the given pages of an open PyMuPDF document on the OCR pool.
+
+    Pages are first rendered at a modest DPI; only pages whose OCR
+    confidence comes back below OCR_ESCALATE_CONFIDENCE are re-rendered at
+    OCR_HIGH_DPI, and the higher-confidence result is kept. Orientation is
+    probed once on the first page to OCR.
+
+    Each page is bounded by OCR_PAGE_TIMEOUT and the whole call by
+    OCR_DOC_TIMEOUT. Pages that run out are left out of the result, added
+    to timed_out (0-based) and reported in warnings; pages not yet started
+    when the document budget is spent are not rendered at all.
+
+    At most OCR_MAX_INFLIGHT rendered pages are queued at a time, and each
+    render's samples are dropped as soon as they are handed off. Pages not
+    started because memory passed MAX_RSS_MB are added to skipped.
+
+    Returns ({page_num: text}, orientation meta, {page number: dpi used}).
+    """
+    if timed_out is None:
+        timed_out = []
+    if skipped is None:
+        skipped = []
+    page_timeout = OCR_PAGE_TIMEOUT or None
+    deadline = time.monotonic() + OCR_DOC_TIMEOUT if OCR_DOC_TIMEOUT else None
+
+    def out_of_time() -> bool:
+        return deadline is not None and time.monotonic() >= deadline
+
+    def out_of_memory() -> bool:
+        return memory is not None and memory.over_limit()
+
+    def run_windowed(jobs, render, angle_of, timed_out_into, skipped_into):
+        """Render and submit (page_num, dpi) jobs, keeping at most
+        OCR_MAX_INFLIGHT pages queued; returns (page_num, dpi, result, error)."""
+        done, inflight = [], []
+
+        def drain(limit: int) -> None:
+            while len(inflight) > limit:
+                page_num, dpi, fut = inflight.pop(0)
+                (page_result, err), = ocr_pool.gather([fut], deadline)
+                done.append((page_num, dpi, page_result, err))
+
+        for i, (page_num, dpi) in enumerate(jobs):
+            if out_of_time():
+                timed_out_into.extend(n for n, _ in jobs[i:])
+                break
+            if out_of_memory():
+                skipped_into.extend(n for n, _ in jobs[i:])
+                break
+            try:
+                pix = render(page_num, dpi)
+                inflight.append((page_num, dpi, ocr_pool.submit(pix, angle_of(page_num), timeout=page_timeout)))
+                del pix
+            except Exception as e:
+                warnings.append(f"OCR failed for page {page_num + 1}: {e}")
+            drain(OCR_MAX_INFLIGHT - 1)
+        drain(0)
+        return done
+
+    angle, probe_seconds = None, 0.0
+
+    def render_probing(page_num: int, dpi: int):
+        nonlocal angle, probe_seconds
+        pix = _render_gray(doc[page_num], dpi)
+        if angle is None:
+            with _pixmap_image(pix) as first:
+                angle, probe_seconds = _probe_orientation(first)
+        return pix
+
+    first_done = run_windowed(
+        [(page_num, _page_dpi(doc[page_num], OCR_BASE_DPI)) for page_num in page_nums],
+        render_probing,
+        lambda page_num: angle or 0,
+        timed_out,
+        skipped,
+    )
+    angle = angle or 0
+
+    results: Dict[int, Dict[str, object]] = {}
+    page_dpi: Dict[str, int] = {}
+    osd_reruns = 0
+    # Pages whose first pass produced text: the ones the single probe served
+    probed_pages = 0
+    for page_num, dpi, page_result, err in first_done:
+        if isinstance(err, TimeoutError):
+            timed_out.append(page_num)
+            continue
+        if err:
+            warnings.append(f"OCR failed for page {page_num + 1}: {err}")
+            continue
+        osd_reruns += int(bool(page_result.get("osd_rerun")))
+        probed_pages += int(bool(str(page_result.get("text") or "").strip()))
+        results[page_num] = page_result
+        page_dpi[str(page_num + 1)] = dpi
+
+    # Second pass: re-render only low-confidence pages at a higher DPI,
+    # as long as the time and memory budgets last (the first-pass text is kept)
+    retry_jobs = []
+    for page_num in sorted(results):
+        if float(results[page_num].get("confidence") or 0.0) >= OCR_ESCALATE_CONFIDENCE:
+            continue
+        high_dpi = _page_dpi(doc[page_num], OCR_HIGH_DPI)
+        if high_dpi > page_dpi[str(page_num + 1)]:
+            retry_jobs.append((page_num, high_dpi))
+    # Retries that don't run keep their first-pass text, so aren't reported
+    retries_done = run_windowed(
+        retry_jobs,
+        lambda page_num, dpi: _render_gray(doc[page_num], dpi),
+        lambda page_num: int(results[page_num].get("angle") or 0),
+        [],
+        [],
+    )
+    for page_num, dpi, page_result, err in retries_done:
+        if err:
+            continue
+        osd_reruns += int(bool(page_result.get("osd_rerun")))
+        if float(page_result.get("confidence") or 0.0) > float(results[page_num].get("confidence") or 0.0):
+            results[page_num] = page_result
+            page_dpi[str(page_num + 1)] = dpi
+
+    if timed_out:
+        warnings.append(
+            f"OCR time budget exceeded; page(s) {_page_ranges(timed_out)} "
+            f"returned partial (text layer only, if any)"
+        )
+    if skipped:
+        warnings.append(
+            f"Memory limit of {MAX_RSS_MB:.0f} MB reached; OCR skipped for page(s) {_page_ranges(skipped)}"
+        )
+
+    # Per-page OSD would have cost one call per page; estimate the savings
+    # from the (downscaled, so conservative) probe.
+    osd_calls_saved = max(0, probed_pages - 1 - osd_reruns)
+    orientation = {
+        "angle": angle,
+        "probe_seconds": round(probe_seconds, 3),
+        "osd_reruns": osd_reruns,
+        "osd_calls_saved": osd_calls_saved,
+        "seconds_saved_est": round(osd_calls_saved * probe_seconds, 3),
+    }
+    texts = {page_num: str(r.get("text") or "") for page_num, r in results.items()}
+    return texts, orientation, page_dpi
+
+
+def extract_text(
+    file_path: str, use_cache: bool = True, data: Optional[bytes] = None, digest: Optional[str] = None
+) -> Tuple[str, Dict[str, str]]:
+    """Extract text from a file, reusing cached results for identical bytes.
+
+    Results are keyed by the SHA-256 of the file content (see
+    extraction_cache), so repeat uploads and re-reads of the same document
+    skip PyMuPDF/OCR entirely. meta["cache"] reports memory/disk/miss.
+
+    If data is given it is used as the file content and file_path only
+    supplies the name/extension, so an upload can be analysed from memory.
+    digest is the content's SHA-256 if the caller already computed it
+    (file_service hashes uploads while storing them).
+    """
+    if not use_cache:
+        return _extract_text_uncached(file_path, data)
+    try:
+        if digest is None:
+            digest = extraction_cache.digest_bytes(data) if data is not None else extraction_cache.digest_file(file_path)
+    except OSError as e:
+        logger.warning(f"Could not hash {file_path} for caching: {e}")
+        return _extract_text_uncached(file_path)
+
+    cached = extraction_cache.get(digest)
+    if cached is not None:
+        return cached
+
+    text, meta = _extract_text_uncached(file_path, data)
+    meta["sha256"] = digest
+    # Empty results usually mean missing OCR deps or a transient failure;
+    # don't pin those. Partial ones (OCR timeout) are kept briefly so
+    # document_text can read them back without OCRing again.
+    if text and meta.get("partial"):
+        extraction_cache.put_partial(digest, text, meta)
+    elif text:
+        extraction_cache.put(digest, text, meta)
+    meta["cache"] = "miss"
+    return text, meta
+
+
+def _extract_text_uncached(file_path: str, data: Optional[bytes] = None) -> Tuple[str, Dict[str, str]]:
     """Extract text from a file with OCR fallback for scanned PDFs.
 
-    - PDFs: PyMuPDF (primary) -> PyPDF2 (fallback) -> OCR (for scanned PDFs)
+    - PDFs: PyMuPDF (primary) -> PyPDF2 (fallback); pages without a usable
+      text layer are OCRed individually, so mixed digital/scanned PDFs keep
+      every page. meta["pages"] maps page number -> text/ocr/empty.
     - Images: pytesseract + Pillow (with preprocessing)
     - Fallback: read as UTF-8 text (best-effort)
 
+    data, when given, is the file content (read instead of file_path).
+
+    Large PDFs are bounded by MAX_DOC_PAGES, MAX_DOC_CHARS and MAX_RSS_MB;
+    meta["truncated"] says where reading stopped and meta["memory_mb"]
+    reports this process's start and peak RSS for the document.
+
     Returns (text, meta) where meta contains method and any warnings.
     """
     method = "unknown"
     warnings = []
+    orientation = None
+    page_methods: Dict[str, str] = {}
+    ocr_dpi: Dict[str, int] = {}
+    preprocess_ms: Dict[str, float] = {}
+    image_meta: Dict[str, object] = {}
+    ocr_timeouts: List[int] = []
+    ocr_skipped: List[int] = []
+    layout_lines: List[Tuple[str, str, str]] = []
+    truncated: Optional[Dict[str, object]] = None
+    memory = _MemoryMeter()
+    sink = _TextSink(MAX_DOC_CHARS)
     text = ""
-    text_chunks = []
+
+    def stop_reading(reason: str, pages_read: int, total_pages: int) -> None:
+        nonlocal truncated
+        if truncated is None:
+            truncated = {"reason": reason, "pages_read": pages_read, "total_pages": total_pages}
 
     if _is_pdf(file_path):
         # Try PyMuPDF first (better extraction and OCR support)
@@ -102,29 +631,52 @@ def extract_text(file_path: str) -> Tuple[str, Dict[str, str]]:
             import fitz  # PyMuPDF  # type: ignore
             method = "pdf-pymupdf"
             try:
-                with fitz.open(file_path) as doc:
-                    for page in doc:
-                        page_text = page.get_text("text") or ""
+                source = fitz.open(stream=data, filetype="pdf") if data is not None else fitz.open(file_path)
+                with source as doc:
+                    page_texts: Dict[int, str] = {}
+                    ocr_page_nums: List[int] = []
+                    total_pages = len(doc)
+                    layer_chars = 0
+                    for page_num in range(total_pages):
+                        if MAX_DOC_PAGES > 0 and page_num >= MAX_DOC_PAGES:
+                            stop_reading("page_limit", page_num, total_pages)
+                            break
+                        if layer_chars >= MAX_DOC_CHARS:
+                            stop_reading("char_limit", page_num, total_pages)
+                            break
+                        if memory.over_limit():
+                            stop_reading("memory_limit", page_num, total_pages)
+                            break
+                        page = doc[page_num]
+                        page_kind, page_text = _classify_page(page)
+                        page_methods[str(page_num + 1)] = page_kind
+                        if page_kind == "ocr":
+                            ocr_page_nums.append(page_num)
+                        elif page_kind == "text":
+                            layout_lines.extend(layout_extractor.page_lines(page, page_num))
+                            layer_chars += len(page_text)
                         if page_text.strip():
-                            text_chunks.append(page_text)
-                    
-                    # If no text extracted, fallback to OCR for scanned PDFs
-                    if not text_chunks:
-                        logger.info(f"No digital text found in {file_path}. Falling back to OCR.")
-                        method = "pdf-pymupdf-ocr"
-                        for page_num, page in enumerate(doc):
-                            try:
-                                # Render page to image at higher DPI for better OCR
-                                pix = page.get_pixmap(dpi=220)
-                                img_bytes = pix.tobytes("png")
-                                from PIL import Image  # type: ignore
-                                pil_img = Image.open(io.BytesIO(img_bytes))
-                                ocr_text = _ocr_image_pil(pil_img)
-                                if ocr_text:
-                                    text_chunks.append(ocr_text)
-                            except Exception as e:
-                                warnings.append(f"OCR failed for page {page_num + 1}: {e}")
-                                continue
+                            # Kept for OCR pages too, as a fallback if OCR fails
+                            page_texts[page_num] = page_text
+                        del page
+
+                    if ocr_page_nums:
+                        logger.info(
+                            f"{len(ocr_page_nums)}/{len(doc)} page(s) in {file_path} lack a text layer. Running OCR."
+                        )
+                        ocr_texts, orientation, ocr_dpi = _ocr_pdf_pages(
+                            doc, ocr_page_nums, warnings, ocr_timeouts, memory, ocr_skipped
+                        )
+                        for page_num, ocr_text in ocr_texts.items():
+                            if ocr_text.strip():
+                                page_texts[page_num] = ocr_text
+                        method = "pdf-pymupdf-ocr" if len(ocr_page_nums) == len(doc) else "pdf-pymupdf-hybrid"
+
+                    # Stream pages into the result, freeing each as it goes
+                    for page_num in sorted(page_texts):
+                        if not sink.write(page_texts.pop(page_num)):
+                            stop_reading("char_limit", page_num + 1, total_pages)
+                            break
             except Exception as e:
                 warnings.append(f"PyMuPDF extraction failed: {e}")
                 method = "pdf-pymupdf-failed"
@@ -134,13 +686,21 @@ def extract_text(file_path: str) -> Tuple[str, Dict[str, str]]:
                 import PyPDF2  # type: ignore
                 method = "pdf-pypdf2"
                 try:
-                    with open(file_path, "rb") as f:
+                    with (io.BytesIO(data) if data is not None else open(file_path, "rb")) as f:
                         reader = PyPDF2.PdfReader(f)
-                        for page in reader.pages:
+                        total_pages = len(reader.pages)
+                        for page_num, page in enumerate(reader.pages):
+                            if MAX_DOC_PAGES > 0 and page_num >= MAX_DOC_PAGES:
+                                stop_reading("page_limit", page_num, total_pages)
+                                break
+                            if memory.over_limit():
+                                stop_reading("memory_limit", page_num, total_pages)
+                                break
                             try:
                                 page_text = page.extract_text() or ""
-                                if page_text.strip():
-                                    text_chunks.append(page_text)
+                                if page_text.strip() and not sink.write(page_text):
+                                    stop_reading("char_limit", page_num + 1, total_pages)
+                                    break
                             except Exception:
                                 continue
                 except Exception as e:
@@ -153,42 +713,256 @@ def extract_text(file_path: str) -> Tuple[str, Dict[str, str]]:
             from PIL import Image  # type: ignore
             method = "image-pytesseract"
             try:
-                img = Image.open(file_path)
-                text = _ocr_image_pil(img)
+                img = Image.open(io.BytesIO(data) if data is not None else file_path)
+                text = _ocr_image_pil(img, timings=preprocess_ms, image_meta=image_meta)
+            except OcrTimeout as e:
+                ocr_timeouts.append(0)
+                warnings.append(f"Image OCR timed out: {e}")
             except Exception as e:
                 warnings.append(f"Image OCR failed: {e}")
         except ImportError as e:
             warnings.append(f"Image OCR deps missing: {e}")
 
-    # Combine text chunks from PDF pages
-    if text_chunks:
-        text = "\n".join(text_chunks)
+    # Text joined from PDF pages
+    if not sink.empty:
+        text = sink.getvalue()
+    del sink
+
+    partial = bool(ocr_timeouts or ocr_skipped or (truncated and truncated["reason"] == "memory_limit"))
 
-    # Fallback if nothing extracted
-    if not text:
+    # Fallback if nothing extracted (not for partial OCR: the raw bytes of
+    # a scanned PDF are not text)
+    if not text and not partial:
         try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                text = f.read()
+            if data is not None:
+                text = data[:MAX_DOC_CHARS].decode("utf-8", errors="ignore")
+            else:
+                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                    text = f.read(MAX_DOC_CHARS)
             if method == "unknown":
                 method = "raw-text"
         except Exception:
             pass
 
-    return text, {"method": method, "warnings": warnings}
+    meta = {"method": method, "warnings": warnings}
+    if page_methods:
+        meta["pages"] = page_methods
+    if ocr_dpi:
+        meta["ocr_dpi"] = ocr_dpi
+    if orientation is not None:
+        meta["orientation"] = orientation
+    if preprocess_ms:
+        meta["preprocess_ms"] = preprocess_ms
+    meta.update(image_meta)
+    if ocr_timeouts:
+        meta["ocr_timeouts"] = sorted(n + 1 for n in ocr_timeouts)
+    if ocr_skipped:
+        meta["ocr_skipped"] = sorted(n + 1 for n in ocr_skipped)
+    if truncated:
+        meta["truncated"] = truncated
+        warnings.append(
+            f"Document truncated ({truncated['reason']}): read {truncated['pages_read']} "
+            f"of {truncated['total_pages']} page(s)"
+        )
+    if partial:
+        meta["partial"] = True
+    meta["memory_mb"] = memory.as_meta()
+    layout = layout_extractor.build_layout(layout_lines)
+    if layout:
+        meta["layout"] = layout
+    return text, meta
+
+
+def _ocr_single_page(page, angle: Optional[int], deadline: Optional[float] = None) -> Tuple[str, int]:
+    """OCR one PyMuPDF page, escalating to OCR_HIGH_DPI on low confidence.
+
+    If angle is None, orientation is probed on this page first. Returns
+    (text, angle) so the caller can reuse the angle for later pages. Raises
+    TimeoutError (OcrTimeout included) if the page runs past OCR_PAGE_TIMEOUT
+    or the deadline (a time.monotonic() value); a failed retry keeps the
+    first-pass text.
+    """
+    dpi = _page_dpi(page, OCR_BASE_DPI)
+    pix = _render_gray(page, dpi)
+    if angle is None:
+        with _pixmap_image(pix) as img:
+            angle, _ = _probe_orientation(img)
+    timeout = OCR_PAGE_TIMEOUT or None
+    (result, err), = ocr_pool.gather([ocr_pool.submit(pix, angle, timeout=timeout)], deadline)
+    del pix
+    if err is not None:
+        raise err
+    in_time = deadline is None or time.monotonic() < deadline
+    if in_time and float(result.get("confidence") or 0.0) < OCR_ESCALATE_CONFIDENCE:
+        high_dpi = _page_dpi(page, OCR_HIGH_DPI)
+        if high_dpi > dpi:
+            try:
+                (retry, err), = ocr_pool.gather(
+                    [ocr_pool.submit(_render_gray(page, high_dpi), int(result.get("angle") or 0), timeout=timeout)],
+                    deadline,
+                )
+            except Exception as e:
+                retry, err = {}, e
+            if err is None and float(retry.get("confidence") or 0.0) > float(result.get("confidence") or 0.0):
+                result = retry
+    return str(result.get("text") or ""), angle
+
+
+def iter_text_pages(
+    file_path: str, data: Optional[bytes] = None, warnings: Optional[List[str]] = None
+) -> Iterator[Dict[str, object]]:
+    """Yield extracted text one page at a time.
+
+    Each item is {"page": 1-based number, "kind": text/ocr/empty/partial, "text": str}
+    ("partial": OCR ran out of time or memory, or failed; text layer only).
+    Pages are rendered and OCRed only when the consumer asks for them, so
+    closing the generator early (e.g. once the document type is known)
+    skips the rest of the document. Text already in extraction_cache is
+    yielded as a single "cached" item; non-PDFs yield one item with the
+    whole extract_text result.
+
+    The same bounds as extract_text apply: MAX_DOC_PAGES, OCR_DOC_TIMEOUT
+    from the first OCR'd page, and MAX_RSS_MB. Problems are reported in
+    warnings (if given) rather than raised.
+    """
+    if warnings is None:
+        warnings = []
+    try:
+        digest = extraction_cache.digest_bytes(data) if data is not None else extraction_cache.digest_file(file_path)
+        cached = extraction_cache.get(digest)
+    except OSError:
+        cached = None
+    if cached is not None:
+        yield {"page": 1, "kind": "cached", "text": cached[0]}
+        return
+
+    try:
+        import fitz  # PyMuPDF  # type: ignore
+    except ImportError:
+        fitz = None
+    if fitz is None or not _is_pdf(file_path):
+        text, meta = _extract_text_uncached(file_path, data)
+        warnings.extend(meta.get("warnings") or [])
+        yield {"page": 1, "kind": meta.get("method", "unknown"), "text": text}
+        return
+
+    source = fitz.open(stream=data, filetype="pdf") if data is not None else fitz.open(file_path)
+    with source as doc:
+        total_pages = len(doc)
+        angle = None
+        deadline: Optional[float] = None
+        memory = _MemoryMeter()
+        timed_out: List[int] = []
+        skipped: List[int] = []
+        try:
+            for page_num in range(total_pages):
+                if MAX_DOC_PAGES > 0 and page_num >= MAX_DOC_PAGES:
+                    warnings.append(f"Document truncated (page_limit): read {page_num} of {total_pages} page(s)")
+                    break
+                page = doc[page_num]
+                page_kind, page_text = _classify_page(page)
+                if page_kind == "ocr":
+                    if deadline is None and OCR_DOC_TIMEOUT:
+                        deadline = time.monotonic() + OCR_DOC_TIMEOUT
+                    if deadline is not None and time.monotonic() >= deadline:
+                        page_kind = "partial"
+                        timed_out.append(page_num)
+                    elif memory.over_limit():
+                        page_kind = "partial"
+                        skipped.append(page_num)
+                    else:
+                        try:
+                            ocr_text, angle = _ocr_single_page(page, angle, deadline)
+                            if ocr_text.strip():
+                                page_text = ocr_text
+                        except TimeoutError as e:
+                            page_kind = "partial"
+                            timed_out.append(page_num)
+                            logger.warning(f"OCR timed out for page {page_num + 1} of {file_path}: {e}")
+                        except Exception as e:
+                            page_kind = "partial"
+                            warnings.append(f"OCR failed for page {page_num + 1}: {e}")
+                            logger.warning(f"OCR failed for page {page_num + 1} of {file_path}: {e}")
+                del page
+                yield {"page": page_num + 1, "kind": page_kind, "text": page_text}
+        finally:
+            if timed_out:
+                warnings.append(
+                    f"OCR time budget exceeded; page(s) {_page_ranges(timed_out)} "
+                    f"returned partial (text layer only, if any)"
+                )
+            if skipped:
+                warnings.append(
+                    f"Memory limit of {MAX_RSS_MB:.0f} MB reached; OCR skipped for page(s) {_page_ranges(skipped)}"
+                )
+
+
+def classify_document(file_path: str, data: Optional[bytes] = None, max_pages: int = CLASSIFY_MAX_PAGES) -> dict:
+    """Detect insurance and document type from as few pages as possible.
+
+    Stops reading as soon as both types are known (or after max_pages),
+    without rendering or OCRing the remaining pages.
+    """
+    chunks: List[str] = []
+    insurance_type, document_type = "unknown", "unknown"
+    pages_read = 0
+    warnings: List[str] = []
+    pages = iter_text_pages(file_path, data, warnings)
+    try:
+        for item in pages:
+            pages_read += 1
+            if str(item["text"]).strip():
+                chunks.append(str(item["text"]))
+            text = "\n".join(chunks)
+            insurance_type = detect_insurance_type(text)
+            document_type = detect_document_type(text, insurance_type)
+            if (insurance_type != "unknown" and document_type != "unknown") or pages_read >= max_pages:
+                break
+    finally:
+        pages.close()
+    text = "\n".join(chunks)
+    return {
+        "insurance_type": insurance_type,
+        "document_type": document_type,
+        "pages_read": pages_read,
+        "text_summary": {
+            "chars": len(text),
+            "preview": text[:500],
+        },
+        "warnings": warnings,
+    }
+
+
+HEALTH_TOKENS = keyword_engine.register(
+    "ocr.health_tokens",
+    ["hospital", "patient", "diagnosis", "prescription", "medicine", "medical", "treatment"],
+)
+VEHICLE_TOKENS = keyword_engine.register(
+    "ocr.vehicle_tokens",
+    ["vehicle", "registration", " rc ", " dl ", "driver", "license", "chassis", "engine", "fir", "police"],
+)
+INSURANCE_HINTS = keyword_engine.register("ocr.insurance_hints", ["health", "motor", "vehicle"])
+DOCUMENT_LABELS = keyword_engine.register("ocr.document_labels", [
+    "policy number", "insurance start date", "insurance expiry date", "incident type", "incident date",
+    "patient id", "hospital code", "diagnosis", "admission date", "discharge date", "bill amount",
+    "prescription", "inspection date", "loss date", "inspection location", "approved repair amount",
+    "medical notes", "claim status", "rx", "police report filed", "total loss", "police report no",
+    "report date", "first information report", "police report", "rc no", "owner", "vehicle model",
+    "manufacture year", "fuel type", "color", "dl no", "valid from", "valid to", "issuing authority",
+    "dob", "address", "name",
+])
 
 
 def detect_insurance_type(text: str) -> str:
-    t = (text or "").lower()
-    health_tokens = ["hospital", "patient", "diagnosis", "prescription", "medicine", "medical", "treatment"]
-    vehicle_tokens = ["vehicle", "registration", " rc ", " dl ", "driver", "license", "chassis", "engine", "fir", "police"]
+    hits = keyword_engine.scan(text)
 
-    health_score = sum(tok in t for tok in health_tokens)
-    vehicle_score = sum(tok in t for tok in vehicle_tokens)
+    health_score = hits.hit_count("ocr.health_tokens")
+    vehicle_score = hits.hit_count("ocr.vehicle_tokens")
 
     # Direct keyword hints
-    if "health" in t:
+    if hits.has("health"):
         health_score += 2
-    if "motor" in t or "vehicle" in t:
+    if hits.has("motor") or hits.has("vehicle"):
         vehicle_score += 1
 
     if health_score > vehicle_score:
@@ -200,14 +974,13 @@ def detect_insurance_type(text: str) -> str:
 
 
 def detect_document_type(text: str, insurance_type: str) -> str:
-    t = (text or "").lower()
+    hits = keyword_engine.scan(text)
 
     if insurance_type == "health":
         # Score-based detection for health
         scores = {"accord": 0, "hospital": 0, "loss": 0, "prescription": 0}
 
-        def has(label: str) -> bool:
-            return label in t
+        has = hits.has
 
         # ACORD indicators (FNOL)
         if has("policy number"): scores["accord"] += 2
@@ -241,8 +1014,7 @@ def detect_document_type(text: str, insurance_type: str) -> str:
     # Vehicle: score-based detection using label presence
     scores = {"accord": 0, "loss": 0, "fir": 0, "rc": 0, "dl": 0}
 
-    def has(label: str) -> bool:
-        return label in t
+    has = hits.has
 
     # ACORD indicators
     if has("policy number"): scores["accord"] += 2
@@ -290,33 +1062,7 @@ def detect_document_type(text: str, insurance_type: str) -> str:
 
 
 def load_schema(insurance_type: str, document_type: str) -> Optional[dict]:
-    base_dir = os.path.join(os.path.dirname(__file__), "..", "schemas")
-    path = os.path.normpath(os.path.join(base_dir, insurance_type, f"{document_type}.schema.json"))
-    if not os.path.exists(path):
-        return None
-    try:
-        import json
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return None
-
-
-def _label_value(text: str, labels: List[str], value_pattern: str = r"([^\n\r]+)") -> Optional[str]:
-    pattern = re.compile(rf"(?im)\b(?:{'|'.join(map(re.escape, labels))})\b\s*[:\-]?\s*{value_pattern}")
-    m = pattern.search(text)
-    if m:
-        return m.group(1).strip()
-    return None
-
-
-def _regex_value(text: str, pattern: str, flags=re.I) -> Optional[str]:
-    m = re.search(pattern, text, flags)
-    if not m:
-        return None
-    # If a capturing group exists, use it; otherwise use the whole match
-    val = m.group(1) if m.lastindex else m.group(0)
-    return val.strip()
+    return schema_registry.load_schema(insurance_type, document_type)
 
 
 def _to_bool(val: Optional[str]) -> Optional[bool]:
@@ -347,193 +1093,49 @@ def _first(*candidates: Optional[str]) -> Optional[str]:
     return None
 
 
-def extract_entities(text: str, insurance_type: str, document_type: str) -> Dict[str, object]:
-    t = text or ""
+_CONVERTERS = {
+    "str": lambda v: _first(v),
+    "bool": lambda v: _to_bool(_first(v)),
+    "number": lambda v: _to_number(_first(v)),
+}
 
-    # Common patterns
-    claim_id = _first(
-        _label_value(t, ["Claim ID", "Claim"], r"([A-Z]{3,}-[A-Za-z0-9-]+)"),
-        _regex_value(t, r"\b(CL[Ml]-[A-Za-z0-9-]{6,})\b")
-    )
-    rc_no_generic = _first(
-        _label_value(t, ["RC No", "RC Number", "Registration Certificate"], r"([A-Za-z0-9-]+)"),
-        _regex_value(t, r"\bRC-?[A-Za-z0-9-]+\b")
-    )
-    dl_no_generic = _first(
-        _label_value(t, ["DL No", "Driving License", "Driver Licence"], r"([A-Za-z0-9-]+)"),
-        _regex_value(t, r"\bDL-?[A-Za-z0-9-]+\b")
-    )
-    registration_generic = _first(
-        _label_value(t, ["Registration", "Vehicle No", "Vehicle Number"], r"([A-Za-z]{2}\s*\d{1,2}\s*[A-Za-z]{1,3}\s*\d{3,5}|[A-Za-z0-9-]+)"),
-        _regex_value(t, r"\b[A-Z]{2}\s?\d{1,2}\s?[A-Z]{1,3}\s?\d{3,5}\b")
-    )
 
-    entities: Dict[str, object] = {}
-
-    if insurance_type == "vehicle":
-        if document_type == "accord":
-            entities.update({
-                "claim_id": claim_id,
-                "policy_number": _first(
-                    _label_value(t, ["Policy Number", "Policy No"], r"([A-Za-z0-9-]+)")
-                ),
-                "insurance_start_date": _first(
-                    _label_value(t, ["Insurance Start Date", "Policy Start"], r"(\d{4}-\d{2}-\d{2})")
-                ),
-                "insurance_expiry_date": _first(
-                    _label_value(t, ["Insurance Expiry Date", "Policy End"], r"(\d{4}-\d{2}-\d{2})")
-                ),
-                "incident_type": _first(
-                    _label_value(t, ["Incident Type", "Accident Type"])
-                ),
-                "incident_date": _first(
-                    _label_value(t, ["Incident Date", "Accident Date"], r"(\d{4}-\d{2}-\d{2})")
-                ),
-                "registration": registration_generic,
-                "location": _first(
-                    _label_value(t, ["Location", "Accident Location"])
-                ),
-                "rc_no": rc_no_generic,
-                "dl_no": dl_no_generic,
-                "injuries_reported": _to_bool(_first(
-                    _label_value(t, ["Injuries Reported", "Injuries"])
-                )),
-                "estimated_damage_cost": _to_number(_first(
-                    _label_value(t, ["Estimated Damage Cost", "Damage Cost", "Estimated Damage"], r"([\d,]+(?:\.\d+)?)")
-                )),
-                "police_report_filed": _to_bool(_first(
-                    _label_value(t, ["Police Report Filed"]) 
-                )),
-                "police_report_no": _first(
-                    _label_value(t, ["Police Report No", "PR No"], r"([A-Za-z0-9-]+)")
-                ),
-            })
-
-        elif document_type == "dl":
-            entities.update({
-                "claim_id": claim_id,
-                "dl_no": dl_no_generic,
-                "name": _first(_label_value(t, ["Name"])) ,
-                "dob": _first(_label_value(t, ["DOB", "Date of Birth"], r"(\d{4}-\d{2}-\d{2})")),
-                "address": _first(_label_value(t, ["Address"])),
-                "valid_from": _first(_label_value(t, ["Valid From", "Issue Date"], r"(\d{4}-\d{2}-\d{2})")),
-                "valid_to": _first(_label_value(t, ["Valid To", "Expiry Date"], r"(\d{4}-\d{2}-\d{2})")),
-                "issuing_authority": _first(_label_value(t, ["Issuing Authority", "RTO"])),
-                "remarks": _first(_label_value(t, ["Remarks", "Notes"]))
-            })
-
-        elif document_type == "loss":
-            entities.update({
-                "claim_id": claim_id,
-                "inspection_date": _first(_label_value(t, ["Inspection Date"], r"(\d{4}-\d{2}-\d{2})")),
-                "loss_date": _first(_label_value(t, ["Loss Date"], r"(\d{4}-\d{2}-\d{2})")),
-                "inspection_location": _first(_label_value(t, ["Inspection Location", "Assessment Site"])),
-                "registration": registration_generic,
-                "rc_no": rc_no_generic,
-                "dl_no": dl_no_generic,
-                "injuries_reported": _to_bool(_first(_label_value(t, ["Injuries Reported"]))),
-                "estimated_damage_cost": _to_number(_first(_label_value(t, ["Estimated Damage Cost", "Estimated Cost"], r"([\d,]+(?:\.\d+)?)"))),
-                "approved_repair_amount": _to_number(_first(_label_value(t, ["Approved Repair Amount", "Approved Amount"], r"([\d,]+(?:\.\d+)?)"))),
-                "total_loss": _to_bool(_first(_label_value(t, ["Total Loss"]))),
-                "claim_status": _first(_label_value(t, ["Claim Status", "Status"]))
-            })
-
-        elif document_type == "fir":
-            entities.update({
-                "police_report_no": _first(_label_value(t, ["Police Report No", "PR No"], r"([A-Za-z0-9-]+)")),
-                "claim_id": claim_id,
-                "report_date": _first(_label_value(t, ["Report Date"], r"(\d{4}-\d{2}-\d{2})")),
-                "incident_date": _first(_label_value(t, ["Incident Date"], r"(\d{4}-\d{2}-\d{2})")),
-                "location": _first(_label_value(t, ["Location"])),
-                "registration": registration_generic,
-                "rc_no": rc_no_generic,
-                "dl_no": dl_no_generic,
-                "injuries_reported": _to_bool(_first(_label_value(t, ["Injuries Reported"]))),
-                "estimated_damage_cost": _to_number(_first(_label_value(t, ["Estimated Damage Cost", "Damage Cost"], r"([\d,]+(?:\.\d+)?)")))
-            })
-
-        elif document_type == "rc":
-            entities.update({
-                "claim_id": claim_id,
-                "rc_no": rc_no_generic,
-                "registration": registration_generic,
-                "owner": _first(_label_value(t, ["Owner", "Owner Name"])),
-                "vehicle_model": _first(_label_value(t, ["Vehicle Model", "Model", "Make and Model"])),
-                "manufacture_year": _first(_label_value(t, ["Manufacture Year", "Year of Manufacture"], r"(\d{4})")),
-                "fuel_type": _first(_label_value(t, ["Fuel Type", "Fuel"])),
-                "color": _first(_label_value(t, ["Color", "Colour"])),
-                "notes": _first(_label_value(t, ["Notes", "Remarks"]))
-            })
-
-    elif insurance_type == "health":
-        if document_type == "accord":
-            entities.update({
-                "claim_id": claim_id,
-                "policy_number": _first(_label_value(t, ["Policy Number", "Policy No"], r"([A-Za-z0-9-]+)")),
-                "insurance_start_date": _first(_label_value(t, ["Insurance Start Date", "Policy Start"], r"(\d{4}-\d{2}-\d{2})")),
-                "insurance_expiry_date": _first(_label_value(t, ["Insurance Expiry Date", "Policy End"], r"(\d{4}-\d{2}-\d{2})")),
-                "incident_type": _first(_label_value(t, ["Incident Type"])),
-                "incident_date": _first(_label_value(t, ["Incident Date"], r"(\d{4}-\d{2}-\d{2})")),
-                "location": _first(_label_value(t, ["Location", "Treatment Location"])),
-                "patient_id": _first(_label_value(t, ["Patient ID"], r"([A-Za-z0-9-]+)")),
-                "hospital_code": _first(_label_value(t, ["Hospital Code"], r"([A-Za-z0-9-]+)")),
-                "injuries_reported": _to_bool(_first(_label_value(t, ["Injuries Reported", "Injuries"]))),
-                "estimated_damage_cost": _to_number(_first(_label_value(t, ["Estimated Damage Cost", "Estimated Cost"], r"([\d,]+(?:\.\d+)?)"))),
-                "police_report_filed": _to_bool(_first(_label_value(t, ["Police Report Filed"]))),
-                "police_report_no": _first(_label_value(t, ["Police Report No", "PR No"], r"([A-Za-z0-9-]+)")),
-                "diagnosis": _first(_label_value(t, ["Diagnosis"])),
-                "hospital": _first(_label_value(t, ["Hospital"]))
-            })
-
-        elif document_type == "hospital":
-            entities.update({
-                "claim_id": claim_id,
-                "patient_id": _first(_label_value(t, ["Patient ID"], r"([A-Za-z0-9-]+)")),
-                "hospital_code": _first(_label_value(t, ["Hospital Code"], r"([A-Za-z0-9-]+)")),
-                "prescription": _first(_label_value(t, ["Prescription"])),
-                "admission_date": _first(_label_value(t, ["Admission Date"], r"(\d{4}-\d{2}-\d{2})")),
-                "discharge_date": _first(_label_value(t, ["Discharge Date"], r"(\d{4}-\d{2}-\d{2})")),
-                "bill_amount": _to_number(_first(_label_value(t, ["Bill Amount", "Bill"], r"([\d,]+(?:\.\d+)?)")))
-            })
-
-        elif document_type == "loss":
-            entities.update({
-                "claim_id": claim_id,
-                "inspection_date": _first(_label_value(t, ["Inspection Date"], r"(\d{4}-\d{2}-\d{2})")),
-                "loss_date": _first(_label_value(t, ["Loss Date"], r"(\d{4}-\d{2}-\d{2})")),
-                "inspection_location": _first(_label_value(t, ["Inspection Location"])),
-                "injuries_reported": _to_bool(_first(_label_value(t, ["Injuries Reported"]))),
-                "estimated_damage_cost": _to_number(_first(_label_value(t, ["Estimated Damage Cost", "Estimated Cost"], r"([\d,]+(?:\.\d+)?)"))),
-                "approved_repair_amount": _to_number(_first(_label_value(t, ["Approved Repair Amount", "Approved Amount"], r"([\d,]+(?:\.\d+)?)"))),
-                "total_loss": _to_bool(_first(_label_value(t, ["Total Loss"]))),
-                "claim_status": _first(_label_value(t, ["Claim Status", "Status"])),
-                "medical_notes": _first(_label_value(t, ["Medical Notes", "Notes"]))
-            })
+def extract_entities(
+    text: str, insurance_type: str, document_type: str, layout: Optional[dict] = None
+) -> Dict[str, object]:
+    """Extract structured fields using the compiled spec for this document type.
+
+    Field definitions live in field_specs.FIELD_SPECS; each spec scans the
+    text for all of its labels in a single pass. With a layout (meta["layout"]
+    from extract_text), fields are read by position through a cached plan
+    for that layout and the text scan only fills what the plan misses.
+    """
+    spec = field_specs.COMPILED_SPECS.get((insurance_type, document_type))
+    if spec is None:
+        return {}
+    raw = layout_extractor.scan(spec, layout, text or "", insurance_type, document_type)
+    entities = {cf.field.name: _CONVERTERS[cf.field.kind](raw[cf.field.name]) for cf in spec.fields}
 
     # Remove None values to keep payload clean
     return {k: v for k, v in entities.items() if v is not None}
 
 
 def validate_against_schema(entities: dict, insurance_type: str, document_type: str) -> Dict[str, str]:
-    schema = load_schema(insurance_type, document_type)
-    if not schema:
-        return {"status": "skipped", "reason": "schema_pending"}
-    try:
-        try:
-            import jsonschema  # type: ignore
-        except Exception as e:
-            return {"status": "skipped", "reason": f"jsonschema_missing: {e}"}
-        jsonschema.validate(instance=entities, schema=schema)
-        return {"status": "valid"}
-    except Exception as e:
-        return {"status": "invalid", "error": str(e)}
+    return schema_registry.validate(entities, insurance_type, document_type)
 
 
-def analyze_claim_document(file_path: str) -> dict:
-    text, meta = extract_text(file_path)
+def analyze_claim_document(file_path: str, data: Optional[bytes] = None, digest: Optional[str] = None) -> dict:
+    """Extract, classify, and validate one document.
+
+    Pass data (the file bytes) to analyse an upload from memory, and digest
+    (its SHA-256) if already known.
+    """
+    text, meta = extract_text(file_path, data=data, digest=digest)
+    # Only needed for extraction; kept out of the persisted analysis
+    layout = meta.pop("layout", None)
     insurance_type = detect_insurance_type(text)
     document_type = detect_document_type(text, insurance_type)
-    entities = extract_entities(text, insurance_type, document_type)
+    entities = extract_entities(text, insurance_type, document_type, layout)
     validation = validate_against_schema(entities, insurance_type, document_type)
 
     return {
@@ -543,7 +1145,38 @@ def analyze_claim_document(file_path: str) -> dict:
         "validation": validation,
         "text_summary": {
             "chars": len(text or ""),
-            "preview": (text or "")[:500]
+            "preview": (text or "")[:500],
+            # Reference to the full text in extraction_cache (see document_text)
+            "sha256": meta.get("sha256"),
         },
         "meta": meta,
     }
+
+
+def document_text(analysis: dict, file_path: Optional[str] = None) -> str:
+    """Return the full text extracted by analyze_claim_document.
+
+    The analysis only carries a preview plus the content digest; the full text
+    is read back from the extraction cache so scoring never re-runs
+    PyMuPDF/OCR. Falls back to extracting file_path (e.g. the entry was
+    evicted), then to the preview. A partial extraction (OCR ran out of
+    time) is never extracted again: that could take another full timeout.
+    """
+    summary = (analysis or {}).get("text_summary") or {}
+    preview = summary.get("preview") or ""
+    if summary.get("chars", 0) <= len(preview):
+        return preview
+    digest = summary.get("sha256")
+    if digest:
+        cached = extraction_cache.get(digest, allow_partial=True)
+        if cached is not None:
+            return cached[0]
+    if ((analysis or {}).get("meta") or {}).get("partial"):
+        return preview
+    if file_path:
+        try:
+            text, _ = extract_text(file_path)
+            return text
+        except Exception as e:
+            logger.warning(f"Failed to re-extract full text from {file_path}: {e}")
+    return preview
@@ -141,7 +141,7 @@ def apply_routing_rules(ml_scores: Dict[str, Any], claim_data: Optional[Dict[str
     if fraud_score >= 0.6:
         routing_team = "SIU (Fraud)"
         adjuster = "SIU Investigator"
-        routing_reason = f"Fraud score is {(fraud_score * 100).toFixed(1)}% so routed to this team"
+        routing_reason = f"Fraud score is {fraud_score * 100:.1f}% so routed to this team"
     else:
         # Route by department and level
         routing_team = f"{dept_name} - {level}"
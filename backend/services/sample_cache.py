@@ -0,0 +1,192 @@
+"""
+Precomputed analyses and ML scores for the dataset sample claims.
+
+/upload/auto is used as a synthetic traffic generator, so it keeps analysing
+and scoring the same ~200 sample claims. scripts/precompute_samples.py runs
+the full pipeline over every sample once and writes the results here; the
+auto path then goes straight to routing and persistence for any sample found
+in the store (pass pipeline=full to exercise analysis and scoring anyway).
+
+The store is a gzipped NDJSON file: a header line with the fingerprint it was
+built against, then one {"base", "claim_type", "analyses", "ml_scores"} line
+per sample. Lines are kept as raw strings in memory and parsed per request,
+so every caller gets its own copy. The whole store is ignored while its
+fingerprint (store version, extractor version, model files, dataset folder
+mtimes) differs from the current one; re-run the script after changing any
+of them.
+
+Config (env):
+  CLAIMWISE_SAMPLE_CACHE_PATH  store file (default: data/sample_analyses.ndjson.gz)
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from . import dataset_index
+from .extraction_cache import EXTRACTOR_VERSION
+
+logger = logging.getLogger(__name__)
+
+STORE_PATH = Path(os.getenv(
+    "CLAIMWISE_SAMPLE_CACHE_PATH",
+    str(Path(__file__).parent.parent / "data" / "sample_analyses.ndjson.gz"),
+))
+
+# Bump when analysis or scoring changes in a way the fingerprint cannot see
+STORE_VERSION = 1
+
+_lock = threading.Lock()
+_entries: Optional[Dict[str, str]] = None  # base id -> raw NDJSON line
+_loaded_fingerprint: Optional[Dict[str, Any]] = None
+_loaded_mtime: Optional[int] = None
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "loads": 0}
+
+
+def fingerprint() -> Dict[str, Any]:
+    """Everything a precomputed result depends on besides the sample bytes."""
+    from .ml_service import MODELS_DIR
+
+    models = {}
+    try:
+        for entry in sorted(os.scandir(MODELS_DIR), key=lambda e: e.name):
+            if entry.is_file():
+                st = entry.stat()
+                models[entry.name] = [st.st_mtime_ns, st.st_size]
+    except OSError:
+        pass
+    return {
+        "version": STORE_VERSION,
+        "extractor": EXTRACTOR_VERSION,
+        "models": models,
+        "dataset": dataset_index.fingerprint(),
+    }
+
+
+def _store_mtime() -> Optional[int]:
+    try:
+        return STORE_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _load() -> Dict[str, str]:
+    global _entries, _loaded_fingerprint, _loaded_mtime
+    mtime = _store_mtime()
+    if _entries is not None and mtime == _loaded_mtime:
+        return _entries
+    with _lock:
+        if _entries is not None and mtime == _loaded_mtime:
+            return _entries
+        entries: Dict[str, str] = {}
+        header = None
+        if mtime is not None:
+            try:
+                with gzip.open(STORE_PATH, "rt", encoding="utf-8") as f:
+                    header = json.loads(f.readline())
+                    for line in f:
+                        if line.strip():
+                            entries[json.loads(line)["base"]] = line
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable sample cache {STORE_PATH}: {e}")
+                entries, header = {}, None
+            else:
+                _stats["loads"] += 1
+                logger.info(f"Loaded {len(entries)} precomputed samples from {STORE_PATH}")
+        _entries = entries
+        _loaded_fingerprint = (header or {}).get("fingerprint")
+        _loaded_mtime = mtime
+        return _entries
+
+
+def get(base: str) -> Optional[Dict[str, Any]]:
+    """The precomputed {"claim_type", "analyses", "ml_scores"} of a sample, or None.
+
+    None when the sample is not in the store or the store is stale.
+    """
+    entries = _load()
+    line = entries.get(base)
+    if line is None or _loaded_fingerprint != fingerprint():
+        _stats["misses"] += 1
+        return None
+    _stats["hits"] += 1
+    return json.loads(line)
+
+
+def build(
+    analyze: Callable[[str], Dict[str, Any]],
+    score: Callable[[Dict[str, Dict], str, Dict[str, str]], Dict[str, Any]],
+    claim_types=("accident", "medical"),
+    progress: Optional[Callable[[str, int, int], None]] = None,
+    replace: bool = False,
+) -> int:
+    """Analyse and score every indexed sample of claim_types and write the store.
+
+    Samples of other claim types already in the store are kept as long as
+    the store is still current, so rebuilding one type does not drop the
+    other; with replace=True the store holds only what this call computed.
+    Returns the number of samples computed.
+
+    analyze/score are analyze_claim_document and score_claim_multi_file,
+    passed in so this module does not import the ML stack at load time.
+    """
+    report = progress or (lambda base, done, total: None)
+    current = fingerprint()
+    kept = []
+    if not replace:
+        existing = _load()
+        if _loaded_fingerprint == current:
+            kept = [line for line in existing.values() if json.loads(line)["claim_type"] not in claim_types]
+    samples = [
+        (claim_type, base)
+        for claim_type in claim_types
+        for base in dataset_index.bases(claim_type)
+    ]
+    STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STORE_PATH.with_name(STORE_PATH.name + ".tmp")
+    started = time.perf_counter()
+    written = 0
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"fingerprint": current}) + "\n")
+        f.writelines(kept)
+        for done, (claim_type, base) in enumerate(samples, start=1):
+            found = dataset_index.lookup(base)
+            if found is None:
+                continue
+            files = {k: str(v) for k, v in found[1].items()}
+            analyses = {k: analyze(path) for k, path in files.items()}
+            ml_scores = score(analyses, claim_type, files)
+            if ml_scores.get("error"):
+                logger.warning(f"Not caching {base}: scoring failed ({ml_scores['error']})")
+                continue
+            entry = {"base": base, "claim_type": claim_type, "analyses": analyses, "ml_scores": ml_scores}
+            f.write(json.dumps(entry, default=_json_default) + "\n")
+            written += 1
+            report(base, done, len(samples))
+    os.replace(tmp, STORE_PATH)
+    logger.info(
+        f"Precomputed {written} samples in {time.perf_counter() - started:.1f}s "
+        f"(kept {len(kept)}) -> {STORE_PATH}"
+    )
+    return written
+
+
+def _json_default(value: Any) -> Any:
+    # NumPy scalars from feature building
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        **_stats,
+        "samples": len(_entries) if _entries is not None else 0,
+        "path": str(STORE_PATH),
+    }
@@ -0,0 +1,186 @@
+"""
+Compiled JSON-schema validators for extracted entities.
+
+Each backend/schemas/<insurance_type>/<document_type>.schema.json is read,
+checked against its metaschema and turned into a validator instance once, then
+reused for every document of that type. A cached validator is rebuilt when the
+schema file's mtime changes, so schema edits are picked up without a restart.
+
+High-throughput runs can validate only a sample of documents per type.
+
+Config (env):
+  CLAIMWISE_SCHEMA_VALIDATION    full (default) | sample | off
+  CLAIMWISE_SCHEMA_SAMPLE_RATES  per-type rates for "sample" mode, e.g.
+                                 "vehicle/accord=1,health/hospital=0.1,*=0.25"
+                                 ("*" is the default for unlisted types; 0 skips)
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "schemas"))
+
+MODE = os.getenv("CLAIMWISE_SCHEMA_VALIDATION", "full").strip().lower()
+
+
+def _parse_rates(raw: str) -> Dict[str, float]:
+    rates: Dict[str, float] = {}
+    for item in raw.split(","):
+        key, sep, value = item.partition("=")
+        if not sep:
+            continue
+        try:
+            rates[key.strip().lower()] = min(max(float(value), 0.0), 1.0)
+        except ValueError:
+            logger.warning(f"Ignoring bad CLAIMWISE_SCHEMA_SAMPLE_RATES entry: {item!r}")
+    return rates
+
+
+SAMPLE_RATES = _parse_rates(os.getenv("CLAIMWISE_SCHEMA_SAMPLE_RATES", "*=0.1"))
+
+_lock = threading.Lock()
+# schema path -> (mtime_ns, schema, validator)
+_validators: Dict[str, Tuple[int, dict, Any]] = {}
+
+
+def schema_path(insurance_type: str, document_type: str) -> str:
+    return os.path.normpath(os.path.join(SCHEMA_DIR, insurance_type, f"{document_type}.schema.json"))
+
+
+def _stat_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _compile(path: str, mtime: int) -> Optional[Tuple[int, dict, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            schema = json.load(f)
+    except Exception:
+        return None
+    if not schema:
+        return None
+    import jsonschema  # type: ignore
+
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)  # raises SchemaError once, not per document
+    return mtime, schema, cls(schema)
+
+
+def _entry(insurance_type: str, document_type: str) -> Optional[Tuple[int, dict, Any]]:
+    """Return the cached (mtime, schema, validator), rebuilding it if the file changed."""
+    path = schema_path(insurance_type, document_type)
+    mtime = _stat_mtime(path)
+    if mtime is None:
+        return None
+    cached = _validators.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached
+    with _lock:
+        cached = _validators.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached
+        entry = _compile(path, mtime)
+        if entry is None:
+            _validators.pop(path, None)
+        else:
+            _validators[path] = entry
+            logger.debug(f"Compiled schema validator for {insurance_type}/{document_type}")
+        return entry
+
+
+def load_schema(insurance_type: str, document_type: str) -> Optional[dict]:
+    """Return the parsed schema for a document type (cached), or None."""
+    path = schema_path(insurance_type, document_type)
+    mtime = _stat_mtime(path)
+    if mtime is None:
+        return None
+    cached = _validators.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def get_validator(insurance_type: str, document_type: str):
+    entry = _entry(insurance_type, document_type)
+    return entry[2] if entry else None
+
+
+def _sample_rate(insurance_type: str, document_type: str) -> float:
+    for key in (f"{insurance_type}/{document_type}", document_type, insurance_type, "*"):
+        if key.lower() in SAMPLE_RATES:
+            return SAMPLE_RATES[key.lower()]
+    return 1.0
+
+
+def should_validate(insurance_type: str, document_type: str) -> Tuple[bool, Optional[str]]:
+    """Decide whether this document is validated under the configured mode."""
+    if MODE == "off":
+        return False, "validation_disabled"
+    if MODE == "sample":
+        rate = _sample_rate(insurance_type, document_type)
+        if rate <= 0.0 or random.random() >= rate:
+            return False, "not_sampled"
+    return True, None
+
+
+def validate(entities: dict, insurance_type: str, document_type: str) -> Dict[str, str]:
+    """Validate entities against the compiled schema for their document type."""
+    enabled, reason = should_validate(insurance_type, document_type)
+    if not enabled:
+        return {"status": "skipped", "reason": reason}
+    if _stat_mtime(schema_path(insurance_type, document_type)) is None:
+        return {"status": "skipped", "reason": "schema_pending"}
+    try:
+        try:
+            import jsonschema  # type: ignore
+        except Exception as e:
+            return {"status": "skipped", "reason": f"jsonschema_missing: {e}"}
+        validator = get_validator(insurance_type, document_type)
+        if validator is None:
+            return {"status": "skipped", "reason": "schema_pending"}
+        error = jsonschema.exceptions.best_match(validator.iter_errors(entities))
+        if error is not None:
+            raise error
+        return {"status": "valid"}
+    except Exception as e:
+        return {"status": "invalid", "error": str(e)}
+
+
+def preload() -> int:
+    """Compile every schema under SCHEMA_DIR; returns the number compiled."""
+    count = 0
+    if not os.path.isdir(SCHEMA_DIR):
+        return count
+    for insurance_type in sorted(os.listdir(SCHEMA_DIR)):
+        type_dir = os.path.join(SCHEMA_DIR, insurance_type)
+        if not os.path.isdir(type_dir):
+            continue
+        for name in sorted(os.listdir(type_dir)):
+            if not name.endswith(".schema.json"):
+                continue
+            try:
+                if _entry(insurance_type, name[: -len(".schema.json")]) is not None:
+                    count += 1
+            except Exception as e:
+                logger.warning(f"Schema {insurance_type}/{name} failed to compile: {e}")
+    return count
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        compiled = sorted(os.path.relpath(p, SCHEMA_DIR) for p in _validators)
+    return {"mode": MODE, "sample_rates": dict(SAMPLE_RATES), "compiled": compiled}
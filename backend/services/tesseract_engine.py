@@ -0,0 +1,121 @@
+"""
+Long-lived Tesseract engines via tesserocr (libtesseract C API).
+
+pytesseract forks a `tesseract` process and reloads eng.traineddata on every
+call. When tesserocr is installed, each OCR worker (see ocr_pool) instead
+keeps one initialised engine per thread and feeds it page images directly,
+so language data is loaded once per worker for its lifetime.
+
+Callers should treat EngineUnavailable as "use the pytesseract path".
+
+Config (env):
+  CLAIMWISE_OCR_ENGINE   auto (default) | tesserocr | pytesseract
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENGINE = os.getenv("CLAIMWISE_OCR_ENGINE", "auto").strip().lower()
+
+_local = threading.local()
+
+try:
+    if ENGINE == "pytesseract":
+        raise ImportError("disabled by CLAIMWISE_OCR_ENGINE")
+    import tesserocr  # type: ignore
+    HAS_TESSEROCR = True
+except ImportError as e:
+    if ENGINE == "tesserocr":
+        logger.warning(f"CLAIMWISE_OCR_ENGINE=tesserocr but tesserocr is unavailable: {e}")
+    HAS_TESSEROCR = False
+
+
+class EngineUnavailable(RuntimeError):
+    pass
+
+
+class OcrTimeout(TimeoutError):
+    """Raised when a page's OCR runs past its time budget."""
+
+
+def _engines() -> Dict[Tuple[str, str], object]:
+    engines = getattr(_local, "engines", None)
+    if engines is None:
+        engines = _local.engines = {}
+    return engines
+
+
+def _get_api(kind: str, lang: str):
+    """Return this thread's engine for (kind, lang), creating it on first use."""
+    if not HAS_TESSEROCR:
+        raise EngineUnavailable("tesserocr not installed")
+    engines = _engines()
+    key = (kind, lang)
+    api = engines.get(key)
+    if api is None:
+        try:
+            if kind == "osd":
+                api = tesserocr.PyTessBaseAPI(lang="osd", psm=tesserocr.PSM.OSD_ONLY)
+            else:
+                api = tesserocr.PyTessBaseAPI(lang=lang)
+        except Exception as e:
+            raise EngineUnavailable(f"tesserocr init failed: {e}") from e
+        engines[key] = api
+    return api
+
+
+def warm_up(lang: str = "eng") -> bool:
+    """Load language data ahead of the first page (used by pool workers)."""
+    try:
+        _get_api("ocr", lang)
+        _get_api("osd", "osd")
+        return True
+    except EngineUnavailable:
+        return False
+
+
+def ocr(img, psm: int = 3, lang: str = "eng", timeout: Optional[float] = None) -> Tuple[str, float]:
+    """OCR a PIL image on the resident engine; returns (text, mean word confidence).
+
+    With a timeout (seconds), recognition is cancelled by Tesseract's own
+    progress monitor once it runs out and OcrTimeout is raised.
+    """
+    api = _get_api("ocr", lang)
+    api.SetPageSegMode(psm)
+    api.SetImage(img)
+    try:
+        if timeout and not api.Recognize(timeout=max(1, int(timeout * 1000))):
+            raise OcrTimeout(f"OCR exceeded {timeout:.1f}s")
+        return api.GetUTF8Text() or "", float(api.MeanTextConf())
+    finally:
+        api.Clear()
+
+
+def osd_rotation(img) -> int:
+    """Return the clockwise rotation (0/90/180/270) needed to make img upright.
+
+    Matches the "Rotate:" value reported by pytesseract.image_to_osd.
+    """
+    api = _get_api("osd", "osd")
+    api.SetImage(img)
+    try:
+        result = api.DetectOrientationScript() or {}
+    finally:
+        api.Clear()
+    return (360 - int(result.get("orient_deg", 0))) % 360
+
+
+def close() -> None:
+    """Release this thread's engines."""
+    engines = _engines()
+    for api in engines.values():
+        try:
+            api.End()
+        except Exception:
+            pass
+    engines.clear()
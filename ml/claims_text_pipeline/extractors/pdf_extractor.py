@@ -4,7 +4,6 @@ import logging
 
 import fitz  # PyMuPDF
 from PIL import Image
-import io
 
 from utils.file_utils import ensure_dirs
 from .shared_ocr import ocr_image_pil
@@ -27,11 +26,16 @@ def extract_from_pdf(file_path: Path) -> Dict:
         if not text_chunks:
             logger.info(f"No digital text found in {file_path.name}. Falling back to OCR.")
             for page_num, page in enumerate(doc):
-                # Render page to image
-                pix = page.get_pixmap(dpi=220)  # slightly higher DPI for better OCR
-                img_bytes = pix.tobytes("png")
-                pil_img = Image.open(io.BytesIO(img_bytes))
-                ocr_text = ocr_image_pil(pil_img)
+                # Render straight to 8-bit grayscale and OCR the pixmap's
+                # samples in place (no PNG encode/decode, no extra copies)
+                pix = page.get_pixmap(dpi=220, colorspace=fitz.csGRAY, alpha=False)  # slightly higher DPI for better OCR
+                pil_img = Image.frombuffer("L", (pix.width, pix.height), pix.samples_mv, "raw", "L", pix.stride, 1)
+                try:
+                    ocr_text = ocr_image_pil(pil_img)
+                finally:
+                    # Release the view before the pixmap is freed
+                    pil_img.close()
+                    del pil_img, pix
                 if ocr_text:
                     text_chunks.append(ocr_text)
 
@@ -1,11 +1,33 @@
 import logging
 import os
 import shutil
-from typing import Optional
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Optional
 
 import pytesseract
 from PIL import Image, ImageOps
 
+# Optional: tesserocr keeps a resident libtesseract engine per thread so
+# eng.traineddata is loaded once instead of on every pytesseract fork.
+try:
+    import tesserocr  # type: ignore
+    HAS_TESSEROCR = os.getenv("CLAIMWISE_OCR_ENGINE", "auto").strip().lower() != "pytesseract"
+except ImportError:
+    HAS_TESSEROCR = False
+
+# Shared NumPy image cleanup lives with the fraud detection system
+_FRAUD_SYSTEM_DIR = Path(__file__).resolve().parents[2] / "fraud_detection_system"
+if str(_FRAUD_SYSTEM_DIR) not in sys.path:
+    sys.path.append(str(_FRAUD_SYSTEM_DIR))
+
+import image_preprocess  # noqa: E402
+
+PREPROCESS = os.getenv("CLAIMWISE_OCR_PREPROCESS", "0") == "1"
+
+_local = threading.local()
+
 
 def _configure_tesseract_cmd() -> None:
     """
@@ -18,6 +40,25 @@ def _configure_tesseract_cmd() -> None:
         pytesseract.pytesseract.tesseract_cmd = common_win_path
 
 
+def _engine(kind: str, lang: str):
+    """Return this thread's tesserocr engine for (kind, lang), or None."""
+    if not HAS_TESSEROCR:
+        return None
+    engines: Dict = getattr(_local, "engines", None) or {}
+    _local.engines = engines
+    key = (kind, lang)
+    if key not in engines:
+        try:
+            if kind == "osd":
+                engines[key] = tesserocr.PyTessBaseAPI(lang="osd", psm=tesserocr.PSM.OSD_ONLY)
+            else:
+                engines[key] = tesserocr.PyTessBaseAPI(lang=lang)
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"tesserocr init failed, using pytesseract: {e}")
+            engines[key] = None
+    return engines[key]
+
+
 def auto_orient(img: Image.Image) -> Image.Image:
     try:
         img = ImageOps.exif_transpose(img)
@@ -31,6 +72,15 @@ def detect_and_fix_rotation(img: Image.Image) -> Image.Image:
     Use Tesseract OSD to detect rotation; rotate if angle is 90/180/270.
     """
     try:
+        api = _engine("osd", "osd")
+        if api is not None:
+            api.SetImage(img)
+            try:
+                orient_deg = int((api.DetectOrientationScript() or {}).get("orient_deg", 0))
+            finally:
+                api.Clear()
+            angle = (360 - orient_deg) % 360
+            return img.rotate(360 - angle, expand=True) if angle else img
         _configure_tesseract_cmd()
         osd = pytesseract.image_to_osd(img)
         # osd contains a line like: "Rotate: 90"
@@ -50,13 +100,24 @@ def detect_and_fix_rotation(img: Image.Image) -> Image.Image:
     return img
 
 
-def ocr_image_pil(img: Image.Image, psm: int = 3, lang: str = "eng") -> str:
+def ocr_image_pil(img: Image.Image, psm: int = 3, lang: str = "eng", preprocess: Optional[bool] = None) -> str:
     _configure_tesseract_cmd()
     img = auto_orient(img)
+    if PREPROCESS if preprocess is None else preprocess:
+        img, timings = image_preprocess.preprocess(img)
+        logging.getLogger(__name__).debug(f"Image preprocessing (ms): {timings}")
     img = detect_and_fix_rotation(img)
     # Use a standard OCR configuration; tweak as needed
     config = f"--psm {psm} --oem 3"
     try:
+        api = _engine("ocr", lang)
+        if api is not None:
+            api.SetPageSegMode(psm)
+            api.SetImage(img)
+            try:
+                return api.GetUTF8Text() or ""
+            finally:
+                api.Clear()
         text = pytesseract.image_to_string(img, lang=lang, config=config)
         return text or ""
     except Exception as e:
@@ -1,11 +1,20 @@
 """Enrichment: word count, sentiment, fraud flags."""
+import sys
+from pathlib import Path
 from typing import Dict, List
 
 from textblob import TextBlob
 
-FRAUD_KEYWORDS = [
+# Shared keyword engine lives with the fraud detection system
+_FRAUD_SYSTEM_DIR = Path(__file__).resolve().parents[2] / "fraud_detection_system"
+if str(_FRAUD_SYSTEM_DIR) not in sys.path:
+    sys.path.append(str(_FRAUD_SYSTEM_DIR))
+
+import keyword_engine  # noqa: E402
+
+FRAUD_KEYWORDS = keyword_engine.register("enricher.fraud", [
     "late", "missing", "stolen", "fire", "arson", "total loss", "inflated", "fraud",
-]
+])
 
 
 def _word_count(text: str) -> int:
@@ -20,8 +29,7 @@ def _sentiment(text: str) -> float:
 
 
 def _fraud_flags(text: str) -> List[str]:
-    t = (text or "").lower()
-    return [kw for kw in FRAUD_KEYWORDS if kw in t]
+    return keyword_engine.scan(text).matched("enricher.fraud")
 
 
 def enrich_record(structured: Dict) -> Dict:
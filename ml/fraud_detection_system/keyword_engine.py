@@ -0,0 +1,179 @@
+"""
+Shared multi-pattern keyword engine.
+
+Modules register named keyword sets at import time (insurance/document-type
+hints, cost labels, severity words, legal terms, ...). A document is then
+lowercased and scanned once against every registered keyword, and all
+callers read hit counts and positions from that one result instead of each
+re-lowercasing and re-scanning the text with `kw in text.lower()`.
+
+Matching is case-insensitive substring matching, i.e. exactly the semantics
+of `kw.lower() in text.lower()`. The automaton is pyahocorasick when it is
+installed; otherwise a str.find-based scanner produces identical results.
+Recent scan results are memoised by a hash of the text, so the backend's
+detect_* helpers, preprocess and triage share one scan of the same document;
+only match positions are kept, never the documents themselves.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import ahocorasick  # type: ignore
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+_SCAN_CACHE_SIZE = 256
+# Total match positions held by the scan cache across all entries
+_SCAN_CACHE_MAX_POSITIONS = 200_000
+
+_lock = threading.RLock()
+_sets: Dict[str, Tuple[str, ...]] = {}
+_registered: Dict[str, None] = {}  # union of all sets, insertion-ordered
+_generation = 0
+_automaton = None
+_automaton_generation = -1
+# (generation, text hash) -> (keyword -> start offsets, number of offsets)
+_scan_cache: "OrderedDict[Tuple[int, bytes], Tuple[Dict[str, List[int]], int]]" = OrderedDict()
+_scan_cache_positions = 0
+
+
+class KeywordHits:
+    """Result of scanning one document against every registered keyword."""
+
+    def __init__(self, text: str, positions: Dict[str, List[int]], lowered: Optional[str] = None):
+        self._text = text
+        self._lowered = lowered
+        self.positions = positions  # keyword -> sorted start offsets
+
+    @property
+    def lowered(self) -> str:
+        """The lowercased text, built only when an unregistered keyword is asked for."""
+        if self._lowered is None:
+            self._lowered = self._text.lower()
+        return self._lowered
+
+    def has(self, keyword: str) -> bool:
+        kw = keyword.lower()
+        if kw in self.positions:
+            return True
+        if _is_registered(kw):
+            return False
+        # Unregistered keyword: answer directly rather than silently miss
+        return kw in self.lowered
+
+    def count(self, keyword: str) -> int:
+        kw = keyword.lower()
+        if kw in self.positions or _is_registered(kw):
+            return len(self.positions.get(kw, ()))
+        return self.lowered.count(kw)
+
+    def first(self, keyword: str) -> int:
+        """Offset of the first occurrence, or -1 (like str.find)."""
+        kw = keyword.lower()
+        found = self.positions.get(kw)
+        if found:
+            return found[0]
+        if _is_registered(kw):
+            return -1
+        return self.lowered.find(kw)
+
+    def matched(self, set_name: str) -> List[str]:
+        """Keywords of a registered set present in the text, in set order."""
+        return [kw for kw in _sets[set_name] if kw in self.positions]
+
+    def hit_count(self, set_name: str) -> int:
+        """Number of distinct keywords from a set present in the text."""
+        return sum(1 for kw in _sets[set_name] if kw in self.positions)
+
+    def any(self, keywords: Iterable[str]) -> bool:
+        return any(self.has(kw) for kw in keywords)
+
+
+def _is_registered(kw: str) -> bool:
+    return kw in _registered
+
+
+def register(name: str, keywords: Iterable[str]) -> Tuple[str, ...]:
+    """Register (or replace) a named keyword set; returns the lowercased keywords."""
+    global _generation
+    words = tuple(dict.fromkeys(kw.lower() for kw in keywords if kw))
+    with _lock:
+        if _sets.get(name) != words:
+            _sets[name] = words
+            _registered.clear()
+            _registered.update((kw, None) for ws in _sets.values() for kw in ws)
+            _generation += 1
+    return words
+
+
+def keyword_set(name: str) -> Tuple[str, ...]:
+    return _sets[name]
+
+
+def _build_automaton():
+    global _automaton, _automaton_generation
+    with _lock:
+        if _automaton_generation == _generation:
+            return _automaton
+        automaton = None
+        if HAS_AHOCORASICK:
+            automaton = ahocorasick.Automaton()
+            for kw in _registered:
+                automaton.add_word(kw, kw)
+            if len(automaton):
+                automaton.make_automaton()
+            else:
+                automaton = None
+        _automaton = automaton
+        _automaton_generation = _generation
+        return automaton
+
+
+def _scan_uncached(lowered: str) -> Dict[str, List[int]]:
+    positions: Dict[str, List[int]] = {}
+    automaton = _build_automaton()
+    if automaton is not None:
+        for end, kw in automaton.iter(lowered):
+            positions.setdefault(kw, []).append(end - len(kw) + 1)
+        return positions
+    for kw in list(_registered):
+        start = lowered.find(kw)
+        while start != -1:
+            positions.setdefault(kw, []).append(start)
+            start = lowered.find(kw, start + 1)
+    return positions
+
+
+def _text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def scan(text: Optional[str]) -> KeywordHits:
+    """Scan a document once against every registered keyword set."""
+    global _scan_cache_positions
+    text = text or ""
+    with _lock:
+        key = (_generation, _text_key(text))
+        cached = _scan_cache.get(key)
+        if cached is not None:
+            _scan_cache.move_to_end(key)
+            return KeywordHits(text, cached[0])
+    lowered = text.lower()
+    hits = KeywordHits(text, _scan_uncached(lowered), lowered)
+    size = sum(len(found) for found in hits.positions.values())
+    if size > _SCAN_CACHE_MAX_POSITIONS:
+        return hits
+    with _lock:
+        previous = _scan_cache.pop(key, None)
+        if previous is not None:
+            _scan_cache_positions -= previous[1]
+        _scan_cache[key] = (hits.positions, size)
+        _scan_cache_positions += size
+        while len(_scan_cache) > _SCAN_CACHE_SIZE or _scan_cache_positions > _SCAN_CACHE_MAX_POSITIONS:
+            _scan_cache_positions -= _scan_cache.popitem(last=False)[1][1]
+    return hits
@@ -8,6 +8,8 @@ from typing import Dict, List, Optional, Tuple
 import fitz  # PyMuPDF
 import pandas as pd
 
+import keyword_engine
+
 DATASET_ROOT = Path(__file__).resolve().parent.parent / "dataset"
 # Prefer nested accident folders if present (dataset/accident/accord_form_100),
 # otherwise fall back to dataset root folders (dataset/accord_form_100)
@@ -119,6 +121,20 @@ class DocFields:
     total_loss_flag: Optional[int] = None    # 1/0
 
 
+COST_KEYWORDS = keyword_engine.register("preprocess.cost", [
+    "estimated damage cost", "estimated damage", "damage estimate", "damage cost",
+    "total amount", "total cost", "bill amount", "charges", "amount due",
+    "claim amount", "settlement amount",
+])
+SEVERITY_KEYWORDS_HIGH = keyword_engine.register("preprocess.severity_high", [
+    "critical", "severe", "major", "catastrophic", "totaled", "write-off",
+    "life-threatening", "hospitalized", "surgery", "fracture", "broken",
+])
+SEVERITY_KEYWORDS_MED = keyword_engine.register("preprocess.severity_med", [
+    "moderate", "significant", "substantial", "serious", "injury", "damaged",
+])
+
+
 def extract_fields_from_text(text: str, source: str) -> Dict:
     d: Dict = {"source": source}
 
@@ -193,11 +209,10 @@ def extract_fields_from_text(text: str, source: str) -> Dict:
 
     # estimated damage / cost extraction (works for both vehicle and health claims)
     cost = None
+    hits = keyword_engine.scan(text)
     # Try multiple cost-related keywords
-    for key in ("estimated damage cost", "estimated damage", "damage estimate", "damage cost", 
-                "total amount", "total cost", "bill amount", "charges", "amount due", 
-                "claim amount", "settlement amount"):
-        idx = text.lower().find(key)
+    for key in COST_KEYWORDS:
+        idx = hits.first(key)
         if idx != -1:
             tail = text[idx: idx + 150]  # Increased search window
             mm = MONEY_PAT.search(tail)
@@ -232,13 +247,8 @@ def extract_fields_from_text(text: str, source: str) -> Dict:
     
     # Additional severity indicators from text
     # Look for severity keywords in the text itself
-    severity_keywords_high = ["critical", "severe", "major", "catastrophic", "totaled", "write-off", 
-                              "life-threatening", "hospitalized", "surgery", "fracture", "broken"]
-    severity_keywords_med = ["moderate", "significant", "substantial", "serious", "injury", "damaged"]
-    
-    text_lower = text.lower()
-    high_severity_count = sum(1 for kw in severity_keywords_high if kw in text_lower)
-    med_severity_count = sum(1 for kw in severity_keywords_med if kw in text_lower)
+    high_severity_count = hits.hit_count("preprocess.severity_high")
+    med_severity_count = hits.hit_count("preprocess.severity_med")
     
     if high_severity_count >= 2:
         d["text_severity_indicator"] = "high"
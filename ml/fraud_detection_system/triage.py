@@ -3,6 +3,10 @@ from typing import Dict, Optional, Tuple, List
 import re
 
 from fraud_match_model import fraud_score
+import keyword_engine
+
+LEGAL_KEYWORDS = keyword_engine.register("triage.legal", ["attorney", "legal", "lawsuit", "notice of claim"])
+REAR_END_KEYWORDS = keyword_engine.register("triage.rear_end", ["rear collision", "rear-end", "rear end"])
 
 
 def _bool(v) -> Optional[int]:
@@ -20,8 +24,7 @@ def _bool(v) -> Optional[int]:
 def _text_has(text: Optional[str], patterns: List[str]) -> bool:
     if not text:
         return False
-    t = text.lower()
-    return any(p.lower() in t for p in patterns)
+    return keyword_engine.scan(text).any(patterns)
 
 
 def _combine_texts(ac_text: Optional[str], pr_text: Optional[str], lr_text: Optional[str]) -> str:
@@ -47,7 +50,7 @@ def assess_litigation(ac: Dict, pr: Dict, lr: Dict, feats: Dict, texts: Tuple[Op
         reasons.append("Police report present")
 
     text_all = _combine_texts(ac_text, pr_text, lr_text)
-    if _text_has(text_all, ["attorney", "legal", "lawsuit", "notice of claim"]):
+    if _text_has(text_all, LEGAL_KEYWORDS):
         score += 0.35
         reasons.append("Legal keywords present")
 
@@ -61,7 +64,7 @@ def assess_subrogation(ac: Dict, pr: Dict, lr: Dict, feats: Dict, texts: Tuple[O
     score = 0.0
 
     text_all = _combine_texts(ac_text, pr_text, lr_text)
-    if _text_has(text_all, ["rear collision", "rear-end", "rear end"]):
+    if _text_has(text_all, REAR_END_KEYWORDS):
         score += 0.35
         reasons.append("Rear-end scenario")
 